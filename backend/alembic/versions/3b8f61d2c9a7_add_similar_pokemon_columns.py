@@ -0,0 +1,20 @@
+"""add precomputed similar pokemon columns"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "3b8f61d2c9a7"
+down_revision = "7c2e9a41d5b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("pokemon", sa.Column("similar_ids", postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.add_column("pokemon", sa.Column("similar_scores", postgresql.ARRAY(sa.REAL()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("pokemon", "similar_scores")
+    op.drop_column("pokemon", "similar_ids")
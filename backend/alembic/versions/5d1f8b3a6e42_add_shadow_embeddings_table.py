@@ -0,0 +1,29 @@
+"""add shadow embeddings table for candidate models"""
+
+from alembic import op
+import pgvector.sqlalchemy
+import sqlalchemy as sa
+
+revision = "5d1f8b3a6e42"
+down_revision = "3b8f61d2c9a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pokemon_shadow_embeddings",
+        sa.Column(
+            "pokemon_id",
+            sa.Integer(),
+            sa.ForeignKey("pokemon.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("model_name", sa.String(length=100), primary_key=True),
+        sa.Column("embedding", pgvector.sqlalchemy.HALFVEC(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pokemon_shadow_embeddings")
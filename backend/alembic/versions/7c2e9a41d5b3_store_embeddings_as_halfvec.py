@@ -0,0 +1,69 @@
+"""store pokemon embeddings as halfvec
+
+Requires the pgvector extension 0.7.0 or newer; the upgrade stops before touching the
+table when the installed extension is older.
+"""
+
+import re
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "7c2e9a41d5b3"
+down_revision = "fca3c3721fe3"
+branch_labels = None
+depends_on = None
+
+MIN_PGVECTOR_VERSION = (0, 7, 0)
+
+
+def upgrade() -> None:
+    _require_halfvec()
+    op.drop_index("ix_pokemon_embedding", table_name="pokemon")
+    op.execute(
+        "ALTER TABLE pokemon ALTER COLUMN embedding TYPE halfvec(512) "
+        "USING embedding::halfvec(512)"
+    )
+    op.create_index(
+        "ix_pokemon_embedding",
+        "pokemon",
+        ["embedding"],
+        postgresql_using="ivfflat",
+        postgresql_with={"lists": 100},
+        postgresql_ops={"embedding": "halfvec_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pokemon_embedding", table_name="pokemon")
+    op.execute(
+        "ALTER TABLE pokemon ALTER COLUMN embedding TYPE vector(512) "
+        "USING embedding::vector(512)"
+    )
+    op.create_index(
+        "ix_pokemon_embedding",
+        "pokemon",
+        ["embedding"],
+        postgresql_using="ivfflat",
+        postgresql_with={"lists": 100},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def _require_halfvec() -> None:
+    if op.get_context().as_sql:
+        # Offline (--sql) mode: nothing to query; the DBA applies the script by hand.
+        return
+    installed = (
+        op.get_bind()
+        .execute(sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        .scalar()
+    )
+    version = tuple(int(part) for part in re.findall(r"\d+", installed or "")[:3])
+    if version < MIN_PGVECTOR_VERSION:
+        raise RuntimeError(
+            "Storing embeddings as halfvec needs pgvector 0.7.0 or newer, but the database "
+            f"has {installed or 'no vector extension'}. Install a newer pgvector (the "
+            "pgvector/pgvector:0.7.4-pg15 image or later), run ALTER EXTENSION vector UPDATE, "
+            "then rerun alembic upgrade head."
+        )
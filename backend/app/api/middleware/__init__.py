@@ -1,5 +1,5 @@
 """Middleware helpers for FastAPI."""
 
-from . import rate_limiter, error_handler
+from . import rate_limiter, error_handler, profiler
 
-__all__ = ["rate_limiter", "error_handler"]
+__all__ = ["rate_limiter", "error_handler", "profiler"]
@@ -0,0 +1,192 @@
+"""Opt-in statistical CPU profiling of individual requests.
+
+A profiled request gets a sampler thread that snapshots the stacks of the serving
+thread and of every busy worker thread (decode, preprocess and in-process inference
+run in ``asyncio.to_thread`` workers) every ``profiling_interval_ms``. It writes the
+counts in collapsed-stack format (``thread;frame;frame count`` per line, the root
+frame naming the thread). flamegraph.pl, speedscope and inferno all read it directly.
+
+The middleware is only installed when profiling is configured (see
+``profiling_configured``), so the disabled path costs nothing per request. Samples
+cover whatever runs while the request is in flight. Concurrent requests can show up
+in each other's profiles, so profile under light load when exact attribution
+matters. Work sent to the inference pool's processes appears only as the awaiting
+frame.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+from uuid import uuid4
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from structlog import get_logger
+
+from app.config import Settings, get_settings
+
+PROFILE_HEADER = b"x-profile"
+SIGNATURE_MAX_AGE_SECONDS = 300
+# A thread whose innermost frame is in one of these is blocked waiting for work.
+_IDLE_MODULES = frozenset({"threading.py", "queue.py", "selectors.py"})
+
+
+def profiling_configured(settings: Settings) -> bool:
+    header_allowed = settings.profiling_secret is not None and settings.environment != "production"
+    return settings.profiling_enabled or header_allowed
+
+
+def sign_profile_request(secret: str, path: str, timestamp: int | None = None) -> str:
+    """Build an ``X-Profile`` header value for ``path`` (used by clients and tests)."""
+
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}:{path}".encode(), hashlib.sha256)
+    return f"{timestamp}:{digest.hexdigest()}"
+
+
+def verify_profile_signature(secret: str, path: str, header_value: str, now: float) -> bool:
+    timestamp_text, _, signature = header_value.partition(":")
+    if not timestamp_text.isdigit() or not signature:
+        return False
+    if abs(now - int(timestamp_text)) > SIGNATURE_MAX_AGE_SECONDS:
+        return False
+    expected = sign_profile_request(secret, path, int(timestamp_text)).partition(":")[2]
+    return hmac.compare_digest(expected, signature)
+
+
+class StackSampler:
+    """Sample Python stacks on a background thread, labelled by thread name.
+
+    ``thread_id`` (the serving thread) is sampled even when idle; with
+    ``all_threads`` any other thread is sampled while it is not waiting for work.
+    """
+
+    def __init__(
+        self, thread_id: int, interval_seconds: float, *, all_threads: bool = True
+    ) -> None:
+        self._thread_id = thread_id
+        self._interval = interval_seconds
+        self._all_threads = all_threads
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._names: Dict[int, str] = {}
+        self.samples: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id != self._thread_id and (not self._all_threads or _is_idle(frame)):
+                    continue
+                self.samples[f"{self._thread_name(thread_id)};{collapse_stack(frame)}"] += 1
+
+    def _thread_name(self, thread_id: int) -> str:
+        if thread_id not in self._names:
+            for thread in threading.enumerate():
+                # Collapsed stacks separate frames with ";" and the count with a space.
+                self._names[thread.ident] = re.sub(r"[;\s]+", "_", thread.name)
+        return self._names.get(thread_id, f"thread-{thread_id}")
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return Path(frame.f_code.co_filename).name in _IDLE_MODULES
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+def write_collapsed(path: Path, samples: Dict[str, int]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {count}" for stack, count in sorted(samples.items())]
+    path.write_text("\n".join(lines) + ("\n" if lines else ""))
+    return path
+
+
+class ProfilingMiddleware:
+    """Profile sampled or explicitly signed requests and write collapsed stacks to disk."""
+
+    def __init__(self, app: ASGIApp, settings: Settings | None = None) -> None:
+        self.app = app
+        self.settings = settings or get_settings()
+        self._logger = get_logger(__name__)
+        self._header_secret = (
+            self.settings.profiling_secret if self.settings.environment != "production" else None
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+
+        async def send_with_header(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.settings.profiling_interval_ms / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            samples = sampler.stop()
+            target = self.settings.profiling_dir / _profile_filename(scope, profile_id)
+            try:
+                await asyncio.to_thread(write_collapsed, target, dict(samples))
+            except OSError as exc:
+                self._logger.warning("failed to write request profile", exc_info=exc)
+            else:
+                self._logger.info(
+                    "request profiled",
+                    path=scope["path"],
+                    samples=sum(samples.values()),
+                    profile=str(target),
+                )
+
+    def _should_profile(self, scope: Scope) -> bool:
+        settings = self.settings
+        if settings.profiling_enabled and random.random() < settings.profiling_sample_rate:
+            return True
+        if self._header_secret is None:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                return verify_profile_signature(
+                    self._header_secret, scope["path"], value.decode("latin-1"), time.time()
+                )
+        return False
+
+
+def _profile_filename(scope: Scope, profile_id: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return f"{stamp}-{scope.get('method', 'GET')}-{slug}-{profile_id}.folded"
@@ -0,0 +1,47 @@
+"""Operator endpoints for maintenance tasks."""
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import get_settings
+from app.dependencies import get_catalog_manager
+from app.services.catalog_manager import CatalogManager
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+async def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    settings = get_settings()
+    expected = settings.admin_token
+    if expected is None and settings.environment != "production":
+        return
+    if expected is None or x_admin_token is None or not hmac.compare_digest(
+        x_admin_token, expected
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"error": "forbidden", "message": "A valid X-Admin-Token header is required"},
+        )
+
+
+@router.post("/catalog/refresh")
+async def refresh_catalog(
+    _: None = Depends(require_admin_token),
+    catalog_manager: CatalogManager = Depends(get_catalog_manager),
+) -> dict:
+    """Rebuild this worker's catalog now; other workers follow on their next version poll."""
+    try:
+        refreshed = await catalog_manager.refresh(force=True)
+    except (SQLAlchemyError, OSError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": "service_unavailable", "message": "Catalog source unavailable"},
+        ) from exc
+    current = catalog_manager.current
+    return {
+        "status": "refreshed" if refreshed else "unchanged",
+        "catalog_version": catalog_manager.catalog_version,
+        "pokemon_count": len(current.by_id) if current is not None else 0,
+    }
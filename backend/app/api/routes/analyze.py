@@ -1,61 +1,198 @@
 """Image analysis endpoint."""
 
+import hashlib
 from time import perf_counter
+from typing import List, Tuple
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status, Request
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
 
 from app.api.middleware.rate_limiter import enforce_rate_limit
-from app.dependencies import get_pokedex_repository
-from app.models import AnalysisResult, MatchResult
+from app.dependencies import (
+    get_admission_controller,
+    get_inference_pool,
+    get_pokedex_repository,
+    get_shadow_evaluator,
+)
+from app.models import AnalysisResult, Pokemon
 from app.repositories.pokedex_repository import PokedexRepository
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.analysis_rendering import render_analysis
 from app.services.image_processor import ImageProcessor
+from app.services.inference_pool import InferencePool
+from app.services.shadow_evaluation import ShadowEvaluator
+from app.utils.metrics import (
+    ANALYZE_COALESCED,
+    ANALYZE_IN_FLIGHT,
+    ANALYZE_REQUESTS,
+    observe_stages,
+)
+from app.utils.single_flight import SingleFlight
+from app.utils.timing import StageTimer
 
 router = APIRouter(prefix="/analyze", tags=["analysis"])
 
 _image_processor = ImageProcessor()
+# Identical uploads that arrive together (a viral image) share one embedding + search.
+_in_flight: SingleFlight[List[Tuple[Pokemon, float]]] = SingleFlight()
+
+
 @router.post("/", response_model=AnalysisResult, status_code=status.HTTP_200_OK)
 async def analyze_image(
     request: Request,
     image: UploadFile = File(...),
     top_n: int = Query(5, ge=1, le=10),
+    include_embeddings: bool = Query(
+        False, description="Include each match's 512-float CLIP embedding in the response."
+    ),
     _: None = Depends(enforce_rate_limit),
     repository: PokedexRepository = Depends(get_pokedex_repository),
-) -> AnalysisResult:
-    payload = await image.read()
+    admission: AdmissionController = Depends(get_admission_controller),
+    inference_pool: InferencePool | None = Depends(get_inference_pool),
+    shadow: ShadowEvaluator | None = Depends(get_shadow_evaluator),
+) -> Response:
+    timer = StageTimer()
+    outcome = "error"
+    ANALYZE_IN_FLIGHT.inc()
     try:
-        embedding = _image_processor.process(payload, image.content_type)
-    except ValueError as exc:
+        response = await _analyze(
+            request,
+            image,
+            top_n,
+            include_embeddings,
+            repository,
+            admission,
+            inference_pool,
+            shadow,
+            timer,
+        )
+        outcome = "ok"
+        return response
+    except AdmissionRejected as exc:
+        outcome = "shed"
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "invalid_image", "message": str(exc)},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "overloaded",
+                "message": "Too many analyses in progress; retry shortly.",
+                "details": {"reason": exc.reason, "retry_after_seconds": exc.retry_after_seconds},
+            },
+            headers={"Retry-After": str(exc.retry_after_seconds)},
         ) from exc
+    except HTTPException as exc:
+        outcome = "rejected" if exc.status_code < 500 else "unavailable"
+        raise
+    finally:
+        ANALYZE_IN_FLIGHT.dec()
+        ANALYZE_REQUESTS.labels(outcome=outcome).inc()
+        observe_stages(timer.stages)
 
-    start = perf_counter()
-    matches_with_scores = await repository.find_similar_by_embedding(embedding, top_n)
-    if not matches_with_scores:
+
+async def _analyze(
+    request: Request,
+    image: UploadFile,
+    top_n: int,
+    include_embeddings: bool,
+    repository: PokedexRepository,
+    admission: AdmissionController,
+    inference_pool: InferencePool | None,
+    shadow: ShadowEvaluator | None,
+    timer: StageTimer,
+) -> Response:
+    # Shed before buffering the upload when the queue is already full.
+    admission.check()
+    with timer.stage("read"):
+        payload = await image.read()
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+
+    started = perf_counter()
+    matches, shared = await _in_flight.do(
+        (digest, image.content_type, top_n),
+        lambda: _match(
+            payload,
+            image.content_type,
+            top_n,
+            repository,
+            admission,
+            inference_pool,
+            shadow,
+            timer,
+        ),
+    )
+    if shared:
+        ANALYZE_COALESCED.inc()
+        timer.add("coalesced", (perf_counter() - started) * 1000)
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={"error": "service_unavailable", "message": "Pokédex cache is empty"},
         )
-    duration_ms = int((perf_counter() - start) * 1000)
-    matches = [
-        MatchResult(pokemon=pokemon, similarity_score=score, rank=index)
-        for index, (pokemon, score) in enumerate(matches_with_scores, start=1)
-    ]
-
-    result = AnalysisResult(
-        id=str(uuid4()),
-        matches=matches,
-        processing_time_ms=duration_ms,
-    )
-    if matches:
+
+    top_match, top_score = matches[0]
+    with timer.stage("telemetry"):
         await repository.record_analysis_request(
             ip_address=request.client.host if request.client else None,
             user_agent=request.headers.get("user-agent"),
-            processing_time_ms=duration_ms,
-            top_match_id=matches[0].pokemon.id,
-            top_match_score=matches[0].similarity_score,
+            processing_time_ms=int(timer.total_ms),
+            top_match_id=top_match.id,
+            top_match_score=top_score,
+        )
+
+    # processing_time_ms covers everything up to serialization, which cannot time itself;
+    # the serialize stage is only reported in Server-Timing and metrics.
+    result = AnalysisResult(id=str(uuid4()), processing_time_ms=int(timer.total_ms))
+    with timer.stage("serialize"):
+        body = render_analysis(
+            result,
+            matches,
+            include_embeddings=include_embeddings,
+            catalog=repository.shared_catalog,
         )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Server-Timing": timer.server_timing()},
+    )
+
+
+async def _match(
+    payload: bytes,
+    content_type: str | None,
+    top_n: int,
+    repository: PokedexRepository,
+    admission: AdmissionController,
+    inference_pool: InferencePool | None,
+    shadow: ShadowEvaluator | None,
+    timer: StageTimer,
+) -> List[Tuple[Pokemon, float]]:
+    with timer.stage("queue"):
+        await admission.acquire()
+    try:
+        try:
+            embedding = await _image_processor.process_async(
+                payload, content_type, timer=timer, pool=inference_pool
+            )
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error": "invalid_image", "message": str(exc)},
+            ) from exc
 
-    return result
+        with timer.stage("search"):
+            matches = await repository.find_similar_by_embedding(embedding, top_n)
+        if shadow is not None:
+            # Only scheduled here; the candidate model runs after the response is sent.
+            shadow.maybe_submit(payload, [pokemon.id for pokemon, _ in matches])
+        return matches
+    finally:
+        admission.release()
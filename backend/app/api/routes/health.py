@@ -3,28 +3,72 @@
 from datetime import datetime, timezone
 from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 
-from app.dependencies import get_pokedex_repository
+from app.database import pool_status
+from app.dependencies import (
+    get_admission_controller,
+    get_catalog_manager,
+    get_inference_pool,
+    get_pokedex_repository,
+    get_warmup,
+)
 from app.repositories.pokedex_repository import PokedexRepository
+from app.services.admission import AdmissionController
+from app.services.catalog_manager import CatalogManager
 from app.services.image_processor import ImageProcessor
+from app.services.inference_pool import InferencePool
+from app.services.warmup import Warmup
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("/")
-async def health(repository: PokedexRepository = Depends(get_pokedex_repository)) -> dict:
-    pokemon_count = len(await repository.get_all_pokemon())
+async def health(
+    repository: PokedexRepository = Depends(get_pokedex_repository),
+    catalog_manager: CatalogManager = Depends(get_catalog_manager),
+    admission: AdmissionController = Depends(get_admission_controller),
+    inference_pool: InferencePool | None = Depends(get_inference_pool),
+    warmup: Warmup = Depends(get_warmup),
+) -> dict:
+    pokemon_count = await repository.count_pokemon()
     now = datetime.now(timezone.utc)
-    model_status: Literal["loaded", "unloaded"] = (
-        "loaded" if ImageProcessor._clip_model is not None else "unloaded"
+    model_loaded = (
+        inference_pool.started
+        if inference_pool is not None
+        else ImageProcessor._clip_model is not None
     )
+    model_status: Literal["loaded", "unloaded"] = "loaded" if model_loaded else "unloaded"
     overall_status = "healthy" if pokemon_count and model_status == "loaded" else "degraded"
     return {
         "status": overall_status,
+        "ready": _ready(admission, warmup),
         "timestamp": now.isoformat(),
         "checks": {
             "pokedex_cache": "loaded" if pokemon_count else "empty",
             "pokemon_count": pokemon_count,
+            "catalog_version": catalog_manager.catalog_version,
             "clip_model": model_status,
+            "db_pool": pool_status(),
+            "inference": admission.status(),
+            "warmup": warmup.status(),
         },
     }
+
+
+@router.get("/ready")
+async def ready(
+    admission: AdmissionController = Depends(get_admission_controller),
+    warmup: Warmup = Depends(get_warmup),
+) -> JSONResponse:
+    """Readiness probe: 503 until startup warmup is done and while new analyses would be shed."""
+
+    is_ready = _ready(admission, warmup)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": is_ready, "inference": admission.status(), "warmup": warmup.status()},
+    )
+
+
+def _ready(admission: AdmissionController, warmup: Warmup) -> bool:
+    return warmup.done and not admission.saturated
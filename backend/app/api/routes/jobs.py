@@ -0,0 +1,161 @@
+"""Bulk analysis job endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import zipfile
+from typing import AsyncIterator, Iterator, List, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.api.middleware.rate_limiter import enforce_rate_limit
+from app.dependencies import get_job_store
+from app.services.bulk_jobs import Job, JobLimitExceeded, JobNotFound, JobResult, JobStore
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+STREAM_POLL_SECONDS = 0.5
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    request: Request,
+    files: List[UploadFile] = File(default=[]),
+    archive: UploadFile | None = File(default=None, description="A .zip of images"),
+    top_n: int = Query(5, ge=1, le=10),
+    _: None = Depends(enforce_rate_limit),
+    store: JobStore = Depends(get_job_store),
+) -> dict:
+    """Queue a set of images (multipart ``files`` and/or a zip ``archive``) for analysis."""
+
+    if not files and archive is None:
+        raise _bad_request("empty_job", "Upload images as `files` or a zip as `archive`")
+    try:
+        job = await run_in_threadpool(
+            store.create, _uploaded_images(files, archive, store.max_image_bytes), top_n=top_n
+        )
+    except zipfile.BadZipFile as exc:
+        raise _bad_request("invalid_archive", "The archive is not a valid zip file") from exc
+    except JobLimitExceeded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail={"error": "job_too_large", "message": str(exc)},
+        ) from exc
+    except ValueError as exc:
+        raise _bad_request("empty_job", str(exc)) from exc
+    return {**store.status(job), "links": _links(request, job)}
+
+
+@router.get("/{job_id}")
+async def get_job(
+    request: Request,
+    job_id: str,
+    store: JobStore = Depends(get_job_store),
+) -> dict:
+    job = _get_job(store, job_id)
+    return {**store.status(job), "links": _links(request, job)}
+
+
+@router.get("/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    store: JobStore = Depends(get_job_store),
+) -> dict:
+    """A page of finished results, in submission order."""
+
+    job = _get_job(store, job_id)
+    results = await run_in_threadpool(store.results, job, offset, limit)
+    next_offset = offset + len(results)
+    return {
+        "job": store.status(job),
+        "results": [_result_payload(result) for result in results],
+        "next_offset": next_offset if next_offset < job.total else None,
+    }
+
+
+@router.get("/{job_id}/stream")
+async def stream_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    store: JobStore = Depends(get_job_store),
+) -> StreamingResponse:
+    """Newline-delimited JSON results as they are produced, then a final status line."""
+
+    job = _get_job(store, job_id)
+    return StreamingResponse(_follow(store, job, offset), media_type="application/x-ndjson")
+
+
+async def _follow(store: JobStore, job: Job, offset: int) -> AsyncIterator[bytes]:
+    while True:
+        done = store.is_done(job) or store.is_failed(job)
+        results = await run_in_threadpool(store.results, job, offset)
+        for result in results:
+            yield orjson.dumps(_result_payload(result)) + b"\n"
+        offset += len(results)
+        if done or offset >= job.total:
+            break
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+    yield orjson.dumps({"event": "end", **store.status(job)}) + b"\n"
+
+
+def _uploaded_images(
+    files: List[UploadFile],
+    archive: UploadFile | None,
+    max_image_bytes: int,
+) -> Iterator[Tuple[str, bytes]]:
+    # Read one byte past the limit so the store can tell an oversized image apart.
+    for upload in files:
+        yield upload.filename or "image", upload.file.read(max_image_bytes + 1)
+    if archive is None:
+        return
+    with zipfile.ZipFile(archive.file) as bundle:
+        for info in bundle.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or name.rsplit("/", 1)[-1][:1] == ".":
+                continue
+            if info.file_size > max_image_bytes:
+                raise JobLimitExceeded(f"{name} exceeds the {max_image_bytes} byte image limit")
+            with bundle.open(info) as member:
+                yield name, member.read(max_image_bytes + 1)
+
+
+def _get_job(store: JobStore, job_id: str) -> Job:
+    try:
+        return store.get(job_id)
+    except JobNotFound as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "job_not_found", "message": "Unknown or expired job"},
+        ) from exc
+
+
+def _result_payload(result: JobResult) -> dict:
+    # Scores are stored as float16, good to about three decimals.
+    payload: dict = {
+        "index": result.index,
+        "name": result.name,
+        "matches": [
+            {"pokemon_id": pokemon_id, "similarity_score": round(score, 3)}
+            for pokemon_id, score in result.matches
+        ],
+    }
+    if result.error is not None:
+        payload["error"] = result.error
+    return payload
+
+
+def _links(request: Request, job: Job) -> dict:
+    base = str(request.url_for("get_job", job_id=job.id))
+    return {"self": base, "results": f"{base}/results", "stream": f"{base}/stream"}
+
+
+def _bad_request(error: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={"error": error, "message": message},
+    )
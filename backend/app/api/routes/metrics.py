@@ -0,0 +1,15 @@
+"""Prometheus scrape endpoint."""
+
+from fastapi import APIRouter, Response
+
+from app.database import engine
+from app.utils.metrics import DB_POOL_CHECKED_OUT, render_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    DB_POOL_CHECKED_OUT.set(engine.pool.checkedout())
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -2,11 +2,15 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 
 from app.dependencies import get_pokedex_repository
 from app.models import Pokemon
+from app.models.analysis import pokemon_payload
 from app.repositories.pokedex_repository import PokedexRepository
+from app.services.catalog_search import RANGE_FIELDS, SORT_FIELDS, SearchQuery, StatRange
+from app.services.name_suggest import MAX_QUERY_LENGTH
 
 router = APIRouter(prefix="/pokemon", tags=["pokemon"])
 
@@ -14,20 +18,131 @@ router = APIRouter(prefix="/pokemon", tags=["pokemon"])
 @router.get("", response_model=List[Pokemon])
 async def list_pokemon(
     repository: PokedexRepository = Depends(get_pokedex_repository),
-) -> List[Pokemon]:
+) -> ORJSONResponse:
     """List all Pokémon in the database."""
-    return await repository.get_all_pokemon()
+    # Rendered by hand: snapshot-backed embeddings are mapped arrays pydantic can't dump.
+    pokemon = await repository.get_all_pokemon()
+    return ORJSONResponse([pokemon_payload(entry, include_embedding=True) for entry in pokemon])
+
+
+@router.get("/search")
+async def search_pokemon(
+    type: List[str] = Query([], description="Must have every listed type"),
+    ability: List[str] = Query([], description="Must have at least one listed ability"),
+    generation: List[int] = Query([], description="Must be from one of these generations"),
+    stat: List[str] = Query(
+        [],
+        description="Inclusive range as `field:min..max`, either side optional "
+        "(e.g. `attack:100..`, `total:500..600`). Fields: " + ", ".join(RANGE_FIELDS),
+    ),
+    sort: str = Query("id", description="Sort field, `-` prefix for descending"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    repository: PokedexRepository = Depends(get_pokedex_repository),
+) -> dict:
+    """Filter and sort the catalog from in-memory indexes, without a database query."""
+
+    descending = sort.startswith("-")
+    sort_field = sort.lstrip("-")
+    if sort_field not in SORT_FIELDS:
+        raise _bad_request("invalid_sort", f"Sort by one of: {', '.join(SORT_FIELDS)}")
+    query = SearchQuery(
+        types=tuple(type),
+        abilities=tuple(ability),
+        generations=tuple(generation),
+        ranges=tuple(_parse_range(value) for value in stat),
+        sort=sort_field,
+        descending=descending,
+        offset=offset,
+        limit=limit,
+    )
+    total, page = await repository.search_pokemon(query)
+    next_offset = offset + len(page)
+    return {
+        "total": total,
+        "results": [pokemon_payload(pokemon, include_embedding=False) for pokemon in page],
+        "next_offset": next_offset if next_offset < total else None,
+    }
+
+
+@router.get("/suggest")
+async def suggest_pokemon(
+    q: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH),
+    limit: int = Query(10, ge=1, le=25),
+    repository: PokedexRepository = Depends(get_pokedex_repository),
+) -> dict:
+    """Name autocomplete: exact and prefix matches on name or genus first, then typos."""
+
+    suggestions = await repository.suggest_pokemon(q, limit)
+    return {
+        "query": q,
+        "suggestions": [
+            {"id": suggestion.id, "name": suggestion.name, "match": suggestion.match}
+            for suggestion in suggestions
+        ],
+    }
 
 
 @router.get("/{pokemon_id}", response_model=Pokemon)
 async def get_pokemon(
     pokemon_id: int,
     repository: PokedexRepository = Depends(get_pokedex_repository),
-) -> Pokemon:
+) -> ORJSONResponse:
     pokemon = await repository.get_pokemon_by_id(pokemon_id)
     if not pokemon:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"error": "pokemon_not_found", "message": "Pokémon not found"},
         )
-    return pokemon
+    return ORJSONResponse(pokemon_payload(pokemon, include_embedding=True))
+
+
+@router.get("/{pokemon_id}/similar")
+async def similar_pokemon(
+    pokemon_id: int,
+    limit: int = Query(6, ge=1, le=50),
+    repository: PokedexRepository = Depends(get_pokedex_repository),
+) -> dict:
+    """Pokémon whose artwork embeddings are closest to this one's, most similar first."""
+
+    similar = await repository.similar_pokemon(pokemon_id, limit)
+    if similar is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "pokemon_not_found", "message": "Pokémon not found"},
+        )
+    return {
+        "pokemon_id": pokemon_id,
+        "similar": [
+            {
+                "pokemon": pokemon_payload(pokemon, include_embedding=False),
+                "similarity_score": round(score, 4),
+            }
+            for pokemon, score in similar
+        ],
+    }
+
+
+def _parse_range(value: str) -> StatRange:
+    field, _, bounds = value.partition(":")
+    low, separator, high = bounds.partition("..")
+    if field not in RANGE_FIELDS or not separator or not (low or high):
+        raise _bad_request(
+            "invalid_stat_range",
+            f"Expected `field:min..max` with field one of {', '.join(RANGE_FIELDS)}, got {value!r}",
+        )
+    try:
+        return StatRange(
+            field=field,
+            low=float(low) if low else None,
+            high=float(high) if high else None,
+        )
+    except ValueError as exc:
+        raise _bad_request("invalid_stat_range", f"Bounds must be numbers, got {value!r}") from exc
+
+
+def _bad_request(error: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={"error": error, "message": message},
+    )
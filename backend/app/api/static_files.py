@@ -0,0 +1,70 @@
+"""Static artwork delivery.
+
+Content-hashed variants (see ``write_artwork_variants``) are served with a one-year
+immutable ``Cache-Control``. Requests for a ``.webp`` variant get its ``.avif`` sibling
+instead when the client accepts AVIF. Anything else (the original ``<id>.png`` files)
+is revalidated through the ETag that ``StaticFiles`` already sends.
+
+With ``ARTWORK_ACCEL_REDIRECT`` set, file bodies are handed to the fronting nginx via
+``X-Accel-Redirect`` so it can ``sendfile`` them instead of streaming through Python.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import PurePosixPath
+
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.utils.pokemon_images import is_artwork_variant
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class ArtworkStaticFiles(StaticFiles):
+    def __init__(self, *, directory: os.PathLike | str, accel_redirect: str | None = None):
+        super().__init__(directory=directory)
+        self.accel_redirect = accel_redirect.rstrip("/") if accel_redirect else None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        name = PurePosixPath(path).name
+        hashed = is_artwork_variant(name)
+        response: Response | None = None
+        if hashed and name.endswith(".webp") and _accepts_avif(scope):
+            try:
+                response = await super().get_response(path[: -len(".webp")] + ".avif", scope)
+            except HTTPException:
+                response = None
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if hashed:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            if name.endswith(".webp"):
+                response.headers["Vary"] = "Accept"
+        else:
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        if self.accel_redirect and isinstance(response, FileResponse):
+            return self._accel_response(response)
+        return response
+
+    def _accel_response(self, response: FileResponse) -> Response:
+        relative = os.path.relpath(response.path, self.directory)
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key not in ("content-length", "last-modified", "etag")
+        }
+        headers["X-Accel-Redirect"] = f"{self.accel_redirect}/{PurePosixPath(relative)}"
+        return Response(status_code=response.status_code, headers=headers)
+
+
+def _accepts_avif(scope: Scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"accept":
+            return b"image/avif" in value
+    return False
@@ -1,17 +1,107 @@
+import asyncio
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any
 
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 from app.models.db import Base
+from app.utils.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CHECKOUT_TIMEOUTS
+
+
+@dataclass(slots=True)
+class PoolCheckoutStats:
+    """Running totals of how long callers waited to check a connection out of the pool."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record(self, wait_seconds: float, *, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        DB_POOL_CHECKOUT_SECONDS.observe(wait_seconds)
+        if timed_out:
+            self.timeouts += 1
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+
+
+checkout_stats = PoolCheckoutStats()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time, including pre-ping and overflow connects."""
+
+    def connect(self):  # type: ignore[override]
+        start = perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            checkout_stats.record(perf_counter() - start, timed_out=True)
+            raise
+        checkout_stats.record(perf_counter() - start)
+        return connection
+
+
+def engine_options(settings: Settings) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "echo": False,
+        "future": True,
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if make_url(settings.database_url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": settings.db_statement_cache_size}
+    return options
 
 
 settings = get_settings()
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+engine = create_async_engine(settings.database_url, **engine_options(settings))
 SessionMaker = async_sessionmaker(engine, expire_on_commit=False)
 
 
+class LazySession:
+    """Stand-in for ``AsyncSession`` that only creates the session on first use.
+
+    Requests answered from in-process caches never touch the session, so they never
+    create one and never wait on the connection pool.
+    """
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession] = SessionMaker) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
 @asynccontextmanager
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Provide a transactional scope around a series of operations."""
@@ -28,6 +118,42 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_lazy_db_session() -> AsyncGenerator[LazySession, None]:
+    session = LazySession()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def pool_status() -> dict[str, Any]:
+    pool = engine.pool
+    average_wait_ms = (
+        checkout_stats.total_wait_seconds / checkout_stats.checkouts * 1000
+        if checkout_stats.checkouts
+        else 0.0
+    )
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": checkout_stats.checkouts,
+        "checkout_timeouts": checkout_stats.timeouts,
+        "avg_checkout_wait_ms": round(average_wait_ms, 3),
+        "max_checkout_wait_ms": round(checkout_stats.max_wait_seconds * 1000, 3),
+    }
+
+
+async def prime_pool(connections: int) -> None:
+    """Open ``connections`` pooled connections at once so early requests skip the connect."""
+
+    async def ping() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
 async def init_models() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -1,13 +1,143 @@
 """Common FastAPI dependencies."""
 
+from datetime import timedelta
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db_session
+from app.config import get_settings
+from app.database import LazySession, get_lazy_db_session, get_session
 from app.repositories.pokedex_repository import PokedexRepository
+from app.services.admission import AdmissionController
+from app.services.bulk_jobs import BulkJobWorker, JobStore
+from app.services.image_processor import ImageProcessor
+from app.services.inference_pool import InferencePool
+from app.services.catalog_manager import CatalogManager
+from app.services.catalog_snapshot import SharedCatalog
+from app.services.shadow_evaluation import ShadowEvaluator, ShadowModel
+from app.services.warmup import Warmup
+
+
+async def _probe_catalog_version() -> str | None:
+    async with get_session() as session:
+        return await PokedexRepository(session=session).fetch_catalog_version()
+
+
+async def _load_catalog(overwrite: bool) -> SharedCatalog | None:
+    async with get_session() as session:
+        return await PokedexRepository(session=session).build_shared_catalog(overwrite=overwrite)
+
+
+@lru_cache
+def get_catalog_manager() -> CatalogManager:
+    """Return the process-wide catalog manager."""
+
+    return CatalogManager(probe=_probe_catalog_version, load=_load_catalog)
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide inference admission controller."""
+
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrency=settings.inference_max_concurrency,
+        max_queue_depth=settings.inference_max_queue_depth,
+        queue_timeout_seconds=settings.inference_queue_timeout_seconds,
+    )
+
+
+@lru_cache
+def get_inference_pool() -> InferencePool | None:
+    """Return the process's inference pool, or None when inference runs in-process."""
+
+    settings = get_settings()
+    if settings.inference_workers <= 0:
+        return None
+    return InferencePool(
+        processes=settings.inference_workers,
+        torch_threads=settings.inference_torch_threads,
+        model_name=settings.clip_model_name,
+    )
+
+
+async def _load_shadow_catalog() -> Tuple[np.ndarray, np.ndarray]:
+    async with get_session() as session:
+        repository = PokedexRepository(session=session)
+        return await repository.fetch_shadow_embeddings(get_settings().shadow_model_name)
+
+
+@lru_cache
+def get_shadow_evaluator() -> ShadowEvaluator | None:
+    """Return the process's shadow evaluator, or None when no candidate model is set."""
+
+    settings = get_settings()
+    if not settings.shadow_model_name or settings.shadow_sample_rate <= 0:
+        return None
+    return ShadowEvaluator(
+        ShadowModel(settings.shadow_model_name),
+        settings.shadow_sample_rate,
+        _load_shadow_catalog,
+        max_pending=settings.shadow_max_pending,
+    )
+
+
+@lru_cache
+def get_warmup() -> Warmup:
+    """Return this process's startup warmup state."""
+
+    return Warmup()
+
+
+@lru_cache
+def get_job_store() -> JobStore:
+    settings = get_settings()
+    return JobStore(
+        settings.bulk_jobs_dir,
+        retention=timedelta(hours=settings.bulk_job_retention_hours),
+        max_images=settings.bulk_job_max_images,
+        max_image_bytes=settings.max_upload_bytes,
+        max_total_bytes=settings.bulk_job_max_bytes,
+        max_attempts=settings.bulk_job_max_attempts,
+        retry_backoff_seconds=settings.bulk_job_retry_backoff_seconds,
+    )
+
+
+async def _embed_bulk(images: List[bytes]) -> List[List[float] | ValueError]:
+    processor = ImageProcessor()
+    return await processor.extract_embeddings_async(images, pool=get_inference_pool())
+
+
+async def _search_bulk(
+    embeddings: List[List[float]], top_n: int
+) -> List[List[Tuple[int, float]]]:
+    session = LazySession()
+    try:
+        repository = PokedexRepository(session=session, catalog_manager=get_catalog_manager())
+        found = await repository.find_similar_in_catalog(embeddings, top_n)
+    finally:
+        await session.close()
+    return [[(pokemon.id, score) for pokemon, score in matches] for matches in found]
+
+
+@lru_cache
+def get_bulk_job_worker() -> BulkJobWorker:
+    """Return this process's background worker for bulk analysis jobs."""
+
+    return BulkJobWorker(
+        get_job_store(),
+        get_admission_controller(),
+        _embed_bulk,
+        _search_bulk,
+        batch_size=get_settings().bulk_job_batch_size,
+    )
 
 
 async def get_pokedex_repository(
-    session: AsyncSession = Depends(get_db_session),
+    session: LazySession = Depends(get_lazy_db_session),
+    catalog_manager: CatalogManager = Depends(get_catalog_manager),
 ) -> PokedexRepository:
-    return PokedexRepository(session=session)
+    return PokedexRepository(session=session, catalog_manager=catalog_manager)
@@ -1,24 +1,115 @@
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator, List
 
+import numpy as np
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 
-from app.api.routes import analyze, pokemon, health
+from app.api.routes import admin, analyze, jobs, pokemon, health, metrics
 from app.api.middleware import error_handler
-from app.config import get_settings
+from app.api.middleware.profiler import ProfilingMiddleware, profiling_configured
+from app.api.static_files import ArtworkStaticFiles
+from app.config import Settings, get_settings
+from app.database import get_session, prime_pool
+from app.dependencies import (
+    get_bulk_job_worker,
+    get_catalog_manager,
+    get_inference_pool,
+    get_shadow_evaluator,
+    get_warmup,
+)
+from app.repositories.pokedex_repository import PokedexRepository
+from app.services.catalog_manager import CatalogManager
+from app.services.image_processor import ImageProcessor
+from app.services.inference_pool import InferencePool
+from app.services.warmup import WarmupPhase
 from app.utils.pokemon_images import image_store_dir
 from app.utils.logging import configure_logging
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    catalog_manager = get_catalog_manager()
+    catalog_manager.start(settings.catalog_refresh_interval_seconds)
+    inference_pool = get_inference_pool()
+    if inference_pool is not None:
+        inference_pool.start()
+    warmup = get_warmup()
+    warmup_task: asyncio.Task[None] | None = None
+    if settings.warmup_enabled:
+        warmup_task = asyncio.create_task(
+            warmup.run(_warmup_phases(settings, catalog_manager, inference_pool))
+        )
+    else:
+        warmup.skip()
+    shadow = get_shadow_evaluator()
+    bulk_worker = get_bulk_job_worker() if settings.bulk_jobs_enabled else None
+    if bulk_worker is not None:
+        bulk_worker.start()
+    try:
+        yield
+    finally:
+        if bulk_worker is not None:
+            await bulk_worker.stop()
+        if warmup_task is not None:
+            warmup_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await warmup_task
+        await catalog_manager.stop()
+        if shadow is not None:
+            await shadow.close()
+        if inference_pool is not None:
+            inference_pool.close()
+
+
+def _warmup_phases(
+    settings: Settings,
+    catalog_manager: CatalogManager,
+    inference_pool: InferencePool | None,
+) -> List[WarmupPhase]:
+    async def database() -> None:
+        await prime_pool(settings.db_pool_size)
+
+    async def catalog() -> None:
+        async with get_session() as session:
+            repository = PokedexRepository(session=session, catalog_manager=catalog_manager)
+            await repository.get_all_pokemon()
+            shared = repository.shared_catalog
+            if shared is not None:
+                # One scan faults the mapped embedding pages in before a user's query does.
+                query = np.ones(shared.snapshot.dimension, dtype=np.float32)
+                shared.matcher.find_best_matches((query / np.linalg.norm(query)).tolist())
+
+    async def inference() -> None:
+        await ImageProcessor().warm_up(
+            settings.warmup_inference_passes,
+            pool=inference_pool,
+            batch_size=settings.bulk_job_batch_size if settings.bulk_jobs_enabled else 0,
+        )
+
+    return [("database", database), ("catalog", catalog), ("inference", inference)]
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
-    configure_logging()
+    configure_logging(
+        logging.getLevelName(settings.log_level),
+        queue_size=settings.log_queue_size,
+        throttle_seconds=settings.log_throttle_seconds,
+    )
     app = FastAPI(
         title="Pokémon Vision API",
         version="0.1.0",
         docs_url=f"{settings.api_prefix}/docs",
         redoc_url=f"{settings.api_prefix}/redoc",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     app.add_middleware(
@@ -28,14 +119,23 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
         allow_credentials=True,
     )
+    if profiling_configured(settings):
+        app.add_middleware(ProfilingMiddleware, settings=settings)
 
     app.include_router(analyze.router, prefix=settings.api_prefix)
+    app.include_router(jobs.router, prefix=settings.api_prefix)
     app.include_router(pokemon.router, prefix=settings.api_prefix)
     app.include_router(health.router, prefix=settings.api_prefix)
+    app.include_router(admin.router, prefix=settings.api_prefix)
+    app.include_router(metrics.router)
 
     images_dir = image_store_dir()
     images_dir.mkdir(parents=True, exist_ok=True)
-    app.mount("/static/pokemon", StaticFiles(directory=images_dir), name="pokemon-images")
+    app.mount(
+        "/static/pokemon",
+        ArtworkStaticFiles(directory=images_dir, accel_redirect=settings.artwork_accel_redirect),
+        name="pokemon-images",
+    )
 
     error_handler.register_error_handlers(app)
 
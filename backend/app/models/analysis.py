@@ -1,13 +1,50 @@
-from dataclasses import asdict
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import uuid4
 
+import numpy as np
 from pydantic import BaseModel, Field, ConfigDict, field_serializer
 
 from app.models.pokemon import Pokemon
 
 
+def pokemon_payload(pokemon: Pokemon, *, include_embedding: bool) -> Dict[str, Any]:
+    """The public JSON shape of a Pokémon, built field by field (no ``asdict`` copy)."""
+
+    stats = pokemon.stats
+    payload: Dict[str, Any] = {
+        "id": pokemon.id,
+        "name": pokemon.name,
+        "types": pokemon.types,
+        "description": pokemon.description,
+        "image_url": pokemon.image_url,
+        "genus": pokemon.genus,
+        "generation": pokemon.generation,
+        "height": pokemon.height,
+        "weight": pokemon.weight,
+        "abilities": pokemon.abilities,
+        "stats": {
+            "hp": stats.hp,
+            "attack": stats.attack,
+            "defense": stats.defense,
+            "special_attack": stats.special_attack,
+            "special_defense": stats.special_defense,
+            "speed": stats.speed,
+        },
+    }
+    if include_embedding:
+        payload["embedding"] = embedding_array(pokemon.embedding)
+    return payload
+
+
+def embedding_array(embedding: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+    """A plain float32 array for any stored row (list, mapped row or ``DequantizedRow``)."""
+
+    if embedding is None:
+        return None
+    return np.asarray(embedding, dtype=np.float32)
+
+
 class MatchResult(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     pokemon: Pokemon
@@ -16,10 +53,9 @@ class MatchResult(BaseModel):
 
     @field_serializer("pokemon")
     def serialize_pokemon(self, value: Pokemon) -> dict:
-        payload = asdict(value)
-        embedding = payload.get("embedding")
-        if embedding is not None:
-            payload["embedding"] = [float(value) for value in embedding]
+        payload = pokemon_payload(value, include_embedding=True)
+        if payload["embedding"] is not None:
+            payload["embedding"] = payload["embedding"].tolist()
         return payload
 
 
@@ -7,8 +7,8 @@ from typing import List, Optional
 from uuid import UUID as PyUUID
 from uuid import uuid4
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, Float, Integer, String, Text
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import REAL, DateTime, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.dialects.postgresql import ARRAY, INET
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
@@ -38,8 +38,30 @@ class PokemonRecord(Base):
     special_attack: Mapped[int | None] = mapped_column(Integer)
     special_defense: Mapped[int | None] = mapped_column(Integer)
     speed: Mapped[int | None] = mapped_column(Integer)
-    embedding: Mapped[Optional[List[float]]] = mapped_column(Vector(512), nullable=True)
+    embedding: Mapped[Optional[List[float]]] = mapped_column(HALFVEC(512), nullable=True)
     model_version: Mapped[Optional[str]] = mapped_column(String(100))
+    # Precomputed nearest neighbours (ids, best first) and their cosine similarities.
+    similar_ids: Mapped[Optional[List[int]]] = mapped_column(ARRAY(Integer))
+    similar_scores: Mapped[Optional[List[float]]] = mapped_column(ARRAY(REAL))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class ShadowEmbeddingRecord(Base):
+    """Artwork embeddings from a candidate model, kept apart from the serving column."""
+
+    __tablename__ = "pokemon_shadow_embeddings"
+
+    pokemon_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("pokemon.id", ondelete="CASCADE"), primary_key=True
+    )
+    model_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    # No fixed dimension: candidate models need not match the serving model's 512.
+    embedding: Mapped[List[float]] = mapped_column(HALFVEC(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
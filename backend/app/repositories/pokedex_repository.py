@@ -5,42 +5,94 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import json
+from collections import ChainMap
+from dataclasses import replace
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
 
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import numpy as np
+from pgvector import HalfVector
+
+from app.config import get_settings
 from app.models import Pokemon, PokemonStats
-from app.models.db import PokemonRecord
+from app.models.db import PokemonRecord, ShadowEmbeddingRecord
 from structlog import get_logger
 
+from app.services.catalog_manager import CatalogManager
+from app.services.catalog_search import CatalogSearchIndex, SearchQuery
+from app.services.catalog_snapshot import (
+    DEFAULT_SNAPSHOT_PATH,
+    SharedCatalog,
+    SnapshotFormatError,
+    catalog_version_for,
+    open_shared_snapshot,
+    publish_shared_snapshot,
+)
+from app.services.name_suggest import NameSuggestIndex, Suggestion
 from app.services.pokemon_matcher import PokemonMatcher
+from app.services.similarity_graph import SimilarityGraph
+from app.utils.metrics import CATALOG_CACHE, SEARCH_FALLBACKS, SIMILAR_FALLBACKS
 from app.utils.pokemon_images import sprite_fallback_url
+from app.utils.single_flight import SingleFlight
+
+# Process-wide, so concurrent cache misses in different repositories share one publish.
+_publishing: SingleFlight[SharedCatalog] = SingleFlight()
 
 
 class PokedexRepository:
-    """Serve Pokémon metadata from Postgres with a local JSON fallback."""
+    """Serve Pokémon metadata from Postgres with a snapshot or JSON fallback."""
 
     def __init__(
         self,
         session: AsyncSession | None = None,
         data_path: Path | None = None,
         image_store_dir: Path | None = None,
+        snapshot_path: Path | None = None,
+        catalog_manager: CatalogManager | None = None,
     ) -> None:
         self._logger = get_logger(__name__)
         self._session = session
+        self._catalog_manager = catalog_manager
+        if snapshot_path is None and data_path is None:
+            # An explicit seed file means the caller wants that seed, not the default snapshot.
+            snapshot_path = get_settings().catalog_snapshot_path or DEFAULT_SNAPSHOT_PATH
+        self.snapshot_path = snapshot_path
         self.data_path = (
             data_path or Path(__file__).resolve().parent.parent / "data" / "pokemon_seed.json"
         )
         self._image_store_dir = image_store_dir
-        self._pokemon_by_id: Dict[int, Pokemon] = {}
+        self._pokemon_by_id: MutableMapping[int, Pokemon] = {}
+        self._matcher: PokemonMatcher | None = None
+        self._search_index: CatalogSearchIndex | None = None
+        self._suggest_index: NameSuggestIndex | None = None
+        self._similarity_graph: SimilarityGraph | None = None
+        self._shared_catalog: SharedCatalog | None = None
         self._lock = asyncio.Lock()
 
+    @property
+    def shared_catalog(self) -> SharedCatalog | None:
+        """The mapped catalog this repository serves from, or the process's current one."""
+
+        if self._shared_catalog is not None:
+            return self._shared_catalog
+        return self._catalog_manager.current if self._catalog_manager else None
+
     async def get_all_pokemon(self) -> List[Pokemon]:
         await self._ensure_cache()
-        return [self._with_local_image(pokemon) for pokemon in self._pokemon_by_id.values()]
+        return [self._with_local_image(pokemon) for pokemon in self._catalog_entries()]
+
+    async def count_pokemon(self) -> int:
+        """Catalog size without building an entry per Pokémon."""
+
+        await self._ensure_cache()
+        if not isinstance(self._pokemon_by_id, ChainMap):
+            return len(self._pokemon_by_id)
+        overlay, shared = self._pokemon_by_id.maps
+        return len(shared) + sum(1 for pokemon_id in overlay if pokemon_id not in shared)
 
     async def get_pokemon_by_id(self, pokemon_id: int) -> Optional[Pokemon]:
         await self._ensure_cache()
@@ -49,6 +101,111 @@ class PokedexRepository:
             return None
         return self._with_local_image(pokemon)
 
+    async def search_pokemon(self, query: SearchQuery) -> Tuple[int, List[Pokemon]]:
+        """Filter and sort the catalog in memory; returns the match count and one page."""
+
+        await self._ensure_cache()
+        if self._search_index is None:
+            self._search_index = CatalogSearchIndex(list(self._catalog_entries()))
+        page = self._search_index.search(query)
+        # The index only knows ids; entries come from this repository's (newest) cache.
+        return page.total, [
+            self._with_local_image(self._pokemon_by_id[pokemon_id]) for pokemon_id in page.ids
+        ]
+
+    async def suggest_pokemon(self, query: str, limit: int) -> List[Suggestion]:
+        """Ranked name completions for ``query``, tolerating small typos."""
+
+        await self._ensure_cache()
+        if self._suggest_index is None:
+            self._suggest_index = NameSuggestIndex(list(self._catalog_entries()))
+        return self._suggest_index.suggest(query, limit)
+
+    async def similar_pokemon(
+        self, pokemon_id: int, limit: int
+    ) -> Optional[List[Tuple[Pokemon, float]]]:
+        """Nearest catalog neighbours of a Pokémon, or None when the id is unknown.
+
+        Served from the precomputed graph when the catalog has one; otherwise (seed data,
+        graph not computed yet) from a vector search with the Pokémon's own embedding.
+        """
+
+        await self._ensure_cache()
+        pokemon = self._pokemon_by_id.get(pokemon_id)
+        if pokemon is None:
+            return None
+        graph = self._similarity_graph
+        if graph is not None and pokemon_id in graph:
+            ids, scores = graph.neighbours_of(pokemon_id, limit)
+            return [
+                (self._with_local_image(self._pokemon_by_id[neighbour_id]), score)
+                for neighbour_id, score in zip(ids.tolist(), scores.tolist())
+                if neighbour_id in self._pokemon_by_id
+            ]
+        if pokemon.embedding is None:
+            return []
+        SIMILAR_FALLBACKS.inc()
+        matches = self._find_matches_offline(pokemon.embedding, limit + 1)
+        return [(match, score) for match, score in matches if match.id != pokemon_id][:limit]
+
+    async def refresh_similarity_graph(
+        self, changed_ids: Iterable[int], *, k: int | None = None
+    ) -> int:
+        """Update the stored neighbour lists after ``changed_ids`` got new embeddings.
+
+        Only rows whose lists actually change are written; returns how many were. The
+        first run (or a changed ``k``) computes the whole graph.
+        """
+
+        if self._session is None:
+            return 0
+        k = k or get_settings().similar_pokemon_k
+        result = await self._session.execute(
+            select(
+                PokemonRecord.id,
+                PokemonRecord.embedding,
+                PokemonRecord.similar_ids,
+                PokemonRecord.similar_scores,
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+        embeddings = [_embedding_values(row.embedding) for row in rows]
+        dimension = next((len(values) for values in embeddings if values), 512)
+        matrix = np.zeros((len(rows), dimension), dtype=np.float32)
+        mask = np.zeros(len(rows), dtype=bool)
+        for index, values in enumerate(embeddings):
+            if values:
+                matrix[index] = values
+                mask[index] = True
+        # A stored list is only trusted when it was built with this ``k``.
+        expected = min(k, max(int(mask.sum()) - 1, 0))
+        stored = [
+            (row.id, row.similar_ids, row.similar_scores)
+            for row, has_embedding in zip(rows, mask)
+            if row.similar_ids is not None
+            and len(row.similar_ids) == (expected if has_embedding else 0)
+        ]
+        previous = SimilarityGraph.from_lists(stored, k=k)
+        graph, updated = await asyncio.to_thread(
+            previous.update, [row.id for row in rows], matrix, set(changed_ids), mask=mask
+        )
+        if updated.size:
+            values = []
+            for pokemon_id in updated.tolist():
+                neighbour_ids, scores = graph.neighbours_of(pokemon_id)
+                values.append(
+                    {
+                        "id": pokemon_id,
+                        "similar_ids": neighbour_ids.tolist(),
+                        "similar_scores": scores.tolist(),
+                    }
+                )
+            await self._session.execute(update(PokemonRecord), values)
+            await self._session.flush()
+        return int(updated.size)
+
     async def add_or_update(self, pokemon: Pokemon) -> None:
         if self._session is None:
             await self._hydrate_cache_from_payload([pokemon])
@@ -58,6 +215,10 @@ class PokedexRepository:
         await self._session.merge(record)
         await self._session.flush()
         self._pokemon_by_id[pokemon.id] = pokemon
+        self._matcher = None
+        self._search_index = None
+        self._suggest_index = None
+        self._similarity_graph = None
 
     async def bulk_upsert(self, pokemon_list: Iterable[Pokemon]) -> None:
         for pokemon in pokemon_list:
@@ -70,9 +231,7 @@ class PokedexRepository:
         model_version: str,
     ) -> None:
         if self._session is None:
-            pokemon = self._pokemon_by_id.get(pokemon_id)
-            if pokemon:
-                pokemon.embedding = embedding
+            self._replace_cached_embedding(pokemon_id, embedding)
             return
 
         stmt = (
@@ -82,8 +241,85 @@ class PokedexRepository:
         )
         await self._session.execute(stmt)
         await self._session.flush()
-        if pokemon_id in self._pokemon_by_id:
-            self._pokemon_by_id[pokemon_id].embedding = embedding
+        self._replace_cached_embedding(pokemon_id, embedding)
+
+    async def save_image_url(self, pokemon_id: int, image_url: str) -> None:
+        if self._session is not None:
+            stmt = (
+                update(PokemonRecord)
+                .where(PokemonRecord.id == pokemon_id)
+                .values(image_url=image_url)
+            )
+            await self._session.execute(stmt)
+            await self._session.flush()
+        pokemon = self._pokemon_by_id.get(pokemon_id)
+        if pokemon is not None:
+            self._pokemon_by_id[pokemon_id] = replace(pokemon, image_url=image_url)
+
+    async def save_shadow_embedding(
+        self,
+        pokemon_id: int,
+        embedding: List[float],
+        model_name: str,
+    ) -> None:
+        """Store a candidate model's embedding; the serving column is left alone."""
+
+        if self._session is None:
+            raise RuntimeError("Shadow embeddings need a database session")
+        await self._session.merge(
+            ShadowEmbeddingRecord(pokemon_id=pokemon_id, model_name=model_name, embedding=embedding)
+        )
+        await self._session.flush()
+
+    async def fetch_shadow_embeddings(self, model_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and unit-normalized float32 embeddings stored for ``model_name``."""
+
+        if self._session is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        result = await self._session.execute(
+            select(ShadowEmbeddingRecord.pokemon_id, ShadowEmbeddingRecord.embedding)
+            .where(ShadowEmbeddingRecord.model_name == model_name)
+            .order_by(ShadowEmbeddingRecord.pokemon_id)
+        )
+        rows = result.all()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        ids = np.array([pokemon_id for pokemon_id, _ in rows], dtype=np.int64)
+        matrix = np.array([_embedding_values(value) for _, value in rows], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return ids, matrix
+
+    def _replace_cached_embedding(self, pokemon_id: int, embedding: List[float]) -> None:
+        # Cached entries may belong to a process-wide mapped catalog; never mutate them.
+        pokemon = self._pokemon_by_id.get(pokemon_id)
+        if pokemon:
+            self._pokemon_by_id[pokemon_id] = replace(pokemon, embedding=embedding)
+            self._matcher = None
+            self._similarity_graph = None
+
+    async def fetch_catalog_version(self) -> str | None:
+        """Cheap version probe: one aggregate query, no rows transferred."""
+
+        if self._session is None:
+            return None
+        result = await self._session.execute(
+            select(func.max(PokemonRecord.updated_at), func.count(PokemonRecord.id))
+        )
+        latest, count = result.one()
+        if not count:
+            return None
+        return catalog_version_for(latest, count)
+
+    async def build_shared_catalog(self, *, overwrite: bool = False) -> SharedCatalog | None:
+        """Load every record and publish it as this node's shared catalog."""
+
+        if self._session is None:
+            return None
+        result = await self._session.execute(select(PokemonRecord))
+        rows = result.scalars().all()
+        if not rows:
+            return None
+        return await self._publish_records_off_loop(rows, overwrite=overwrite)
 
     async def record_analysis_request(
         self,
@@ -123,7 +359,8 @@ class PokedexRepository:
         )
         if self._session is None:
             await self._ensure_cache()
-            self._logger.warning("pgvector fallback", reason="no_db_session")
+            self._logger.warning("pgvector fallback", reason="no_db_session", throttle=True)
+            SEARCH_FALLBACKS.labels(reason="no_db_session").inc()
             return self._find_matches_offline(embedding, top_n)
 
         try:
@@ -132,7 +369,9 @@ class PokedexRepository:
             self._logger.warning(
                 "pgvector lookup failed; falling back to cache",
                 exc_info=exc,
+                throttle=True,
             )
+            SEARCH_FALLBACKS.labels(reason="lookup_failed").inc()
             return await self._find_matches_with_cache(embedding, top_n)
 
         matches: List[Tuple[Pokemon, float]] = []
@@ -146,16 +385,34 @@ class PokedexRepository:
         self._logger.warning(
             "pgvector returned no matches; falling back to cache",
             reason="empty_embedding_set",
+            throttle=True,
         )
+        SEARCH_FALLBACKS.labels(reason="empty_embedding_set").inc()
         return await self._find_matches_with_cache(embedding, top_n)
 
+    async def find_similar_in_catalog(
+        self,
+        embeddings: Sequence[List[float]],
+        top_n: int = 5,
+    ) -> List[List[Tuple[Pokemon, float]]]:
+        """Search many embeddings against the in-process catalog (no per-row pgvector query)."""
+
+        await self._ensure_cache()
+        if not self._pokemon_by_id:
+            return [[] for _ in embeddings]
+        return [self._find_matches_offline(embedding, top_n) for embedding in embeddings]
+
     def _find_matches_offline(
         self,
         embedding: List[float],
         top_n: int,
     ) -> List[Tuple[Pokemon, float]]:
-        matcher = PokemonMatcher(list(self._pokemon_by_id.values()))
-        matches = matcher.find_best_matches(embedding, top_n=top_n)
+        if self._matcher is None:
+            self._matcher = PokemonMatcher(
+                list(self._catalog_entries()),
+                precision=get_settings().embedding_precision,
+            )
+        matches = self._matcher.find_best_matches(embedding, top_n=top_n)
         return [(match.pokemon, match.similarity_score) for match in matches]
 
     async def _find_matches_with_cache(
@@ -172,25 +429,118 @@ class PokedexRepository:
         if self._pokemon_by_id:
             return
         if self._session is not None:
+            current = self._catalog_manager.current if self._catalog_manager else None
+            if current is not None:
+                # Served from the process catalog: no query, no pool checkout.
+                CATALOG_CACHE.labels(result="hit").inc()
+                self._use_shared_catalog(current)
+                return
+            CATALOG_CACHE.labels(result="miss").inc()
             try:
                 result = await self._session.execute(select(PokemonRecord))
-            except SQLAlchemyError:
+            except (SQLAlchemyError, OSError):
+                # OSError: asyncpg connect failures (e.g. refused) are not wrapped.
                 await self._hydrate_from_seed()
                 return
             rows = result.scalars().all()
             if rows:
-                for row in rows:
-                    pokemon = self._record_to_domain(row)
-                    self._pokemon_by_id[pokemon.id] = pokemon
+                shared = await self._hydrate_from_records(rows)
+                if shared is not None and self._catalog_manager is not None:
+                    self._catalog_manager.install(shared)
                 return
         await self._hydrate_from_seed()
 
+    async def _hydrate_from_records(self, rows: List[PokemonRecord]) -> SharedCatalog | None:
+        try:
+            shared = await self._publish_records_off_loop(rows)
+        except (OSError, SnapshotFormatError) as exc:
+            self._logger.warning(
+                "shared catalog unavailable; keeping embeddings in process memory",
+                exc_info=exc,
+            )
+            for row in rows:
+                pokemon = self._record_to_domain(row)
+                self._pokemon_by_id[pokemon.id] = pokemon
+            return None
+        self._use_shared_catalog(shared)
+        return shared
+
+    async def _publish_records_off_loop(
+        self,
+        rows: List[PokemonRecord],
+        *,
+        overwrite: bool = False,
+    ) -> SharedCatalog:
+        # Writing (with fsync) and mapping the snapshot and building its indexes is
+        # blocking work; concurrent cold requests for one version share a single build.
+        key = (_records_version(rows), overwrite)
+        shared, _ = await _publishing.do(
+            key, lambda: asyncio.to_thread(self._publish_records, rows, overwrite=overwrite)
+        )
+        return shared
+
+    def _publish_records(
+        self,
+        rows: List[PokemonRecord],
+        *,
+        overwrite: bool = False,
+    ) -> SharedCatalog:
+        model_version = max((row.model_version or "" for row in rows), default="") or None
+        catalog_version = _records_version(rows)
+        return publish_shared_snapshot(
+            catalog_version,
+            lambda: [self._record_to_domain(row) for row in rows],
+            model_version=model_version,
+            overwrite=overwrite,
+            similarity_graph=lambda: _stored_similarity_graph(rows, catalog_version),
+        )
+
+    def _catalog_entries(self) -> Iterator[Pokemon]:
+        if not isinstance(self._pokemon_by_id, ChainMap):
+            yield from self._pokemon_by_id.values()
+            return
+        # Scan the mapped catalog column-wise; going through by_id would build and cache a
+        # view per id, evicting the hot ones.
+        overlay, shared = self._pokemon_by_id.maps
+        for pokemon in self._shared_catalog.snapshot.pokemon:
+            yield overlay.get(pokemon.id, pokemon)
+        if overlay:
+            yield from (
+                pokemon for pokemon_id, pokemon in overlay.items() if pokemon_id not in shared
+            )
+
+    def _use_shared_catalog(self, shared: SharedCatalog) -> None:
+        self._shared_catalog = shared
+        # Writes land in the front dict; the shared catalog is never copied or mutated.
+        self._pokemon_by_id = ChainMap({}, shared.by_id)
+        self._matcher = shared.matcher
+        self._search_index = shared.search_index
+        self._suggest_index = shared.suggest_index
+        self._similarity_graph = shared.similarity_graph
+
     async def _hydrate_from_seed(self) -> None:
+        if await self._hydrate_from_snapshot():
+            return
         if not self.data_path.exists():
             return
         payload = json.loads(self.data_path.read_text())
         await self._hydrate_cache_from_payload(payload)
 
+    async def _hydrate_from_snapshot(self) -> bool:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        try:
+            shared = await asyncio.to_thread(open_shared_snapshot, self.snapshot_path)
+        except (OSError, SnapshotFormatError) as exc:
+            self._logger.warning(
+                "catalog snapshot unreadable; falling back to JSON seed",
+                path=str(self.snapshot_path),
+                exc_info=exc,
+            )
+            return False
+        self._use_shared_catalog(shared)
+        return True
+
     async def _hydrate_cache_from_payload(self, payload: Iterable[dict | Pokemon]) -> None:
         async with self._lock:
             for entry in payload:
@@ -199,6 +549,10 @@ class PokedexRepository:
                 else:
                     pokemon = self._build_pokemon(entry)
                 self._pokemon_by_id[pokemon.id] = pokemon
+            self._matcher = None
+            self._search_index = None
+            self._suggest_index = None
+            self._similarity_graph = None
 
     def _build_pokemon(self, entry: dict) -> Pokemon:
         stats_payload = entry.get("stats", {})
@@ -232,6 +586,11 @@ class PokedexRepository:
             embedding=embedding,
         )
 
+    def records_to_domain(self, records: Iterable[PokemonRecord]) -> List[Pokemon]:
+        """Convert rows without caching them or publishing a shared catalog."""
+
+        return [self._record_to_domain(record) for record in records]
+
     def _record_to_domain(self, record: PokemonRecord) -> Pokemon:
         stats = PokemonStats(
             hp=record.hp or 0,
@@ -254,9 +613,7 @@ class PokedexRepository:
             weight=record.weight or 0.0,
             abilities=record.abilities or [],
             stats=stats,
-            embedding=[float(x) for x in record.embedding]
-            if record.embedding is not None
-            else None,
+            embedding=_embedding_values(record.embedding),
         )
 
     def _domain_to_record(self, pokemon: Pokemon) -> PokemonRecord:
@@ -281,15 +638,14 @@ class PokedexRepository:
         )
 
     def _embedding_from_seed(self, seed_value: str) -> List[float]:
-        digest = hashlib.sha256(seed_value.encode("utf-8")).digest()
-        values: List[float] = []
-        seed = digest
-        while len(values) < 512:
+        seed = hashlib.sha256(seed_value.encode("utf-8")).digest()
+        blocks = []
+        for _ in range(512 // len(seed)):
             seed = hashlib.sha256(seed).digest()
-            values.extend(byte / 255 for byte in seed)
-        trimmed = values[:512]
-        norm = sum(v * v for v in trimmed) ** 0.5 or 1.0
-        return [v / norm for v in trimmed]
+            blocks.append(seed)
+        values = np.frombuffer(b"".join(blocks), dtype=np.uint8) / 255
+        norm = float(np.sqrt(values @ values)) or 1.0
+        return (values / norm).tolist()
 
     def _local_image_url(self, pokemon_id: int) -> str | None:
         # Local images require same-origin serving which doesn't work with
@@ -308,3 +664,29 @@ class PokedexRepository:
             pokemon.image_url = local_url
             self._pokemon_by_id[pokemon.id] = pokemon
         return pokemon
+
+
+def _records_version(rows: List[PokemonRecord]) -> str:
+    return catalog_version_for(max(row.updated_at for row in rows), len(rows))
+
+
+def _stored_similarity_graph(
+    rows: List[PokemonRecord], catalog_version: str
+) -> SimilarityGraph | None:
+    stored = [row for row in rows if row.similar_ids is not None]
+    if not stored:
+        return None
+    return SimilarityGraph.from_lists(
+        ((row.id, row.similar_ids, row.similar_scores) for row in stored),
+        k=max(len(row.similar_ids) for row in stored) or 1,
+        catalog_version=catalog_version,
+    )
+
+
+def _embedding_values(value) -> List[float] | None:
+    if value is None:
+        return None
+    # halfvec columns come back as HalfVector, which is not iterable.
+    if isinstance(value, HalfVector):
+        return value.to_list()
+    return [float(x) for x in value]
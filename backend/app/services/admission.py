@@ -0,0 +1,135 @@
+"""Admission control for inference work.
+
+At most ``max_concurrency`` analyses run at once. Up to ``max_queue_depth`` more may
+wait, in arrival order, for at most ``queue_timeout`` seconds each. Anything beyond
+that is shed straight away with ``AdmissionRejected`` so a burst turns into fast
+503s instead of unbounded latency and memory growth.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque
+
+from app.utils.metrics import INFERENCE_ACTIVE, INFERENCE_QUEUE_DEPTH, INFERENCE_SHED
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get an inference slot in time."""
+
+    def __init__(self, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(f"inference queue {reason.replace('_', ' ')}")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Bounded FIFO of requests waiting for one of a fixed number of inference slots."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_depth: int,
+        queue_timeout_seconds: float,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._active = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self.shed_total = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new request would be shed without waiting."""
+
+        return self._active >= self.max_concurrency and self.queue_depth >= self.max_queue_depth
+
+    @property
+    def retry_after_seconds(self) -> int:
+        return max(1, math.ceil(self.queue_timeout_seconds))
+
+    def status(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "shed": self.shed_total,
+        }
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def check(self) -> None:
+        """Shed early (before reading the upload) when the queue is already full."""
+
+        if self.saturated:
+            self._shed("queue_full")
+
+    async def acquire(self) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._set_active(self._active + 1)
+            return
+        if self.queue_depth >= self.max_queue_depth:
+            self._shed("queue_full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        INFERENCE_QUEUE_DEPTH.set(self.queue_depth)
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                await waiter
+        except TimeoutError:
+            if not _granted(waiter):
+                self._shed("deadline")
+        except asyncio.CancelledError:
+            if _granted(waiter):
+                # The slot was handed over just as the caller went away; pass it on.
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            INFERENCE_QUEUE_DEPTH.set(self.queue_depth)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; the active count is unchanged.
+                waiter.set_result(None)
+                INFERENCE_QUEUE_DEPTH.set(self.queue_depth)
+                return
+        self._set_active(self._active - 1)
+
+    def _set_active(self, value: int) -> None:
+        self._active = value
+        INFERENCE_ACTIVE.set(value)
+
+    def _shed(self, reason: str) -> None:
+        self.shed_total += 1
+        INFERENCE_SHED.labels(reason=reason).inc()
+        raise AdmissionRejected(reason, self.retry_after_seconds)
+
+
+def _granted(waiter: asyncio.Future[None]) -> bool:
+    return waiter.done() and not waiter.cancelled()
@@ -0,0 +1,63 @@
+"""JSON rendering for ``/analyze`` responses.
+
+Responses are assembled as bytes instead of going through ``AnalysisResult``
+validation and ``model_dump_json``. Each Pokémon's metadata is rendered once per
+catalog (``SharedCatalog.fragments``) and spliced in, so a cached match costs a dict
+lookup. Embeddings are left out unless the client opts in: five of them are about
+95% of a response that includes them.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import orjson
+
+from app.models import AnalysisResult, Pokemon
+from app.models.analysis import pokemon_payload
+from app.services.catalog_snapshot import SharedCatalog
+
+
+def render_pokemon(pokemon: Pokemon, *, include_embedding: bool = False) -> bytes:
+    return orjson.dumps(
+        pokemon_payload(pokemon, include_embedding=include_embedding),
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def pokemon_fragment(pokemon: Pokemon, catalog: SharedCatalog | None) -> bytes:
+    """Pre-rendered JSON for ``pokemon`` (without its embedding).
+
+    Only Pokémon that are the catalog's own objects are cached there; anything else
+    (e.g. rows just read from Postgres) is rendered on the spot.
+    """
+
+    if catalog is None or catalog.by_id.get(pokemon.id) is not pokemon:
+        return render_pokemon(pokemon)
+    fragment = catalog.fragments.get(pokemon.id)
+    if fragment is None:
+        fragment = catalog.fragments[pokemon.id] = render_pokemon(pokemon)
+    return fragment
+
+
+def render_analysis(
+    result: AnalysisResult,
+    matches: Sequence[Tuple[Pokemon, float]],
+    *,
+    include_embeddings: bool = False,
+    catalog: SharedCatalog | None = None,
+) -> bytes:
+    """Serialize ``result`` with ``matches`` (ranked in order) as its match list."""
+
+    rendered = []
+    for rank, (pokemon, score) in enumerate(matches, start=1):
+        if include_embeddings:
+            fragment = render_pokemon(pokemon, include_embedding=True)
+        else:
+            fragment = pokemon_fragment(pokemon, catalog)
+        rendered.append(
+            b'{"pokemon":%b,"similarity_score":%b,"rank":%d}'
+            % (fragment, orjson.dumps(float(score)), rank)
+        )
+    envelope = result.model_dump_json(exclude={"matches"}).encode("utf-8")
+    return b"%b,\"matches\":[%b]}" % (envelope[:-1], b",".join(rendered))
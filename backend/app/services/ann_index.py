@@ -0,0 +1,291 @@
+"""Inverted-file (IVF) approximate nearest-neighbour index over catalog embeddings.
+
+Vectors are L2-normalized and grouped by their nearest k-means centroid; a query
+scans only the ``nprobe`` lists whose centroids score highest. ``nprobe`` trades
+recall for speed at query time (``nprobe == nlist`` is an exact search).
+
+The indexed vectors are stored at the catalog's embedding precision (see
+``app.services.embedding_precision``), so a float16 or int8 catalog's index is as
+compact as its snapshot, and probed lists are scored the same way as a flat scan.
+
+On disk the index is one file, mapped read-only like the catalog snapshot::
+
+    header    | magic, format version, dtype code, nlist, dim, indexed count,
+              | catalog version length
+    version   | utf-8 catalog version the index was built from
+    padding   | zero bytes up to a 64-byte boundary
+    centroids | nlist x dim float32
+    offsets   | (nlist + 1) int64 list boundaries into ids/vectors
+    ids       | count int32 catalog row numbers, grouped by list
+    vectors   | count x dim normalized vectors (float32, float16 or int8), same order as ids
+    scales    | count float32 per-row scales, int8 only
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import struct
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from app.services.embedding_precision import matvec, precision_dtype, precision_of, quantize
+
+ANN_MAGIC = b"PKDXIVF1"
+ANN_FORMAT_VERSION = 2
+ANN_SUFFIX = ".ivf"
+
+_DTYPE_CODES = {"float32": 1, "float16": 2, "int8": 3}
+_HEADER = struct.Struct("<8sHHIIIQ")
+_ALIGNMENT = 64
+
+
+class IvfIndex:
+    """Read-only IVF index; arrays may be memory maps."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        scales: np.ndarray | None = None,
+        *,
+        catalog_version: str = "",
+        nprobe: int = 8,
+    ) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.scales = scales
+        self.catalog_version = catalog_version
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.centroids.shape[1])
+
+    @property
+    def precision(self) -> str:
+        return precision_of(self.vectors)
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        *,
+        mask: np.ndarray | None = None,
+        nlist: int | None = None,
+        iterations: int = 15,
+        sample_size: int = 65_536,
+        seed: int = 0,
+        catalog_version: str = "",
+        precision: str = "float32",
+    ) -> "IvfIndex":
+        """Train spherical k-means on (a sample of) ``embeddings`` and bucket every row.
+
+        Rows where ``mask`` is False (no embedding) are left out of the index. Training
+        runs in float32; the bucketed vectors are stored at ``precision``.
+        """
+
+        rows = np.arange(embeddings.shape[0]) if mask is None else np.flatnonzero(mask)
+        vectors = _normalize(np.asarray(embeddings[rows], dtype=np.float32))
+        count = vectors.shape[0]
+        if count == 0:
+            raise ValueError("Cannot build an ANN index without embeddings")
+        nlist = max(1, min(nlist or default_nlist(count), count))
+
+        rng = np.random.default_rng(seed)
+        training = vectors
+        if count > sample_size:
+            training = vectors[rng.choice(count, size=sample_size, replace=False)]
+        centroids = training[rng.choice(training.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _assign(training, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, training)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            # Re-seed empty lists from random points so no centroid goes to waste.
+            sums[empty] = training[rng.choice(training.shape[0], size=int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        values, scales = quantize(vectors[order], precision)
+        return cls(
+            centroids.astype(np.float32),
+            offsets,
+            rows[order].astype(np.int32),
+            np.ascontiguousarray(values),
+            scales,
+            catalog_version=catalog_version,
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_n: int,
+        nprobe: int | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (catalog row numbers, cosine scores) of the best ``top_n`` candidates."""
+
+        norm = float(np.linalg.norm(query))
+        if not norm or not len(self):
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32) / norm
+
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        centroid_scores = self.centroids @ query
+        if nprobe < self.nlist:
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.nlist)
+
+        id_parts = []
+        score_parts = []
+        for probe in probes:
+            start, end = int(self.offsets[probe]), int(self.offsets[probe + 1])
+            if end > start:
+                id_parts.append(self.ids[start:end])
+                # Rows were unit length before quantization; int8 ones only need their scale.
+                scores = matvec(self.vectors[start:end], query)
+                if self.scales is not None:
+                    scores *= self.scales[start:end]
+                score_parts.append(scores)
+        if not id_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+
+        if top_n < scores.size:
+            best = np.argpartition(-scores, top_n - 1)[:top_n]
+        else:
+            best = np.arange(scores.size)
+        best = best[np.lexsort((ids[best], -scores[best]))]
+        return ids[best], scores[best]
+
+    def save(self, path: Path) -> Path:
+        version = self.catalog_version.encode("utf-8")
+        precision = self.precision
+        header = _HEADER.pack(
+            ANN_MAGIC,
+            ANN_FORMAT_VERSION,
+            _DTYPE_CODES[precision],
+            self.nlist,
+            self.dimension,
+            len(self),
+            len(version),
+        )
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(header)
+            handle.write(version)
+            handle.write(b"\0" * (_align(len(header) + len(version)) - len(header) - len(version)))
+            for array, dtype in (
+                (self.centroids, "<f4"),
+                (self.offsets, "<i8"),
+                (self.ids, "<i4"),
+                (self.vectors, precision_dtype(precision)),
+            ):
+                handle.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            if self.scales is not None:
+                handle.write(np.ascontiguousarray(self.scales, dtype="<f4").tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, *, nprobe: int = 8, mmap: bool = True) -> "IvfIndex":
+        path = Path(path)
+        with path.open("rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} is too small to be an ANN index")
+            magic, version, dtype_code, nlist, dimension, count, version_length = (
+                _HEADER.unpack(header)
+            )
+            if magic != ANN_MAGIC or version != ANN_FORMAT_VERSION:
+                raise ValueError(f"{path} is not a supported ANN index")
+            precision = next(
+                (name for name, code in _DTYPE_CODES.items() if code == dtype_code), None
+            )
+            if precision is None:
+                raise ValueError(f"{path} has an unsupported dtype code {dtype_code}")
+            catalog_version = handle.read(version_length).decode("utf-8")
+
+        offset = _align(_HEADER.size + version_length)
+        blocks = [
+            ("<f4", (nlist, dimension)),
+            ("<i8", (nlist + 1,)),
+            ("<i4", (count,)),
+            (precision_dtype(precision), (count, dimension)),
+        ]
+        if precision == "int8":
+            blocks.append(("<f4", (count,)))
+        arrays = []
+        for dtype, shape in blocks:
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if mmap and size:
+                arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+            else:
+                arrays.append(
+                    np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset)
+                    .reshape(shape)
+                )
+            offset += size
+        centroids, offsets, ids, vectors, *scales = arrays
+        return cls(
+            centroids,
+            offsets,
+            ids,
+            vectors,
+            scales[0] if scales else None,
+            catalog_version=catalog_version,
+            nprobe=nprobe,
+        )
+
+
+def default_nlist(count: int) -> int:
+    """Common IVF heuristic: about 4 * sqrt(n) lists."""
+
+    return max(1, int(4 * math.sqrt(count)))
+
+
+def ann_index_path(snapshot_path: Path) -> Path:
+    """The index sidecar lives next to the catalog snapshot it was built from."""
+
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(snapshot_path.name + ANN_SUFFIX)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch: int = 16_384) -> np.ndarray:
+    assignment = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], batch):
+        block = vectors[start : start + batch]
+        assignment[start : start + batch] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -0,0 +1,533 @@
+"""Asynchronous bulk analysis jobs.
+
+Jobs live on disk under ``BULK_JOBS_DIR`` so every worker process on a node (or every
+node, on shared storage) can answer polls for any job::
+
+    <job id>/
+        job.json      | id, top_n, image names, created_at, expires_at
+        input/        | spooled uploads, ``000000`` ... in submission order
+        results.bin   | one fixed-size record per image, appended in order
+        errors.jsonl  | {"index", "error"} for images that could not be analyzed
+        worker.lock   | owner token of the process working on the job; mtime is its heartbeat
+        attempts.json | {"count", "retry_at", "error"} after a batch failed unexpectedly
+        done          | written once every image has a record
+        failed        | the last error, once the job has failed ``max_attempts`` times
+
+A result record is ``top_n`` int32 Pokémon ids plus ``top_n`` float16 scores (30
+bytes at top 5). Failed images get ids of -1. Progress is the size of
+``results.bin``, so no counter is ever rewritten and a crashed job resumes where its
+last record ends. Inputs are deleted when a job finishes. Whole jobs are deleted
+once ``expires_at`` has passed.
+
+``BulkJobWorker`` runs in each API process, claims queued jobs and embeds them in
+batches. It only starts a batch while no interactive analysis holds or waits for an
+inference slot, so ``/analyze`` keeps latency precedence. It keeps heartbeating while it
+waits, and checks the lock still carries its token before every append: a worker whose
+claim went stale and was taken over stops instead of writing to the same ``results.bin``.
+A batch that fails for any reason other than a bad image (which is recorded per image)
+puts the job back with an exponential backoff; after ``max_attempts`` it is marked failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+from structlog import get_logger
+
+from app.services.admission import AdmissionController
+from app.utils.metrics import BULK_IMAGES
+from app.utils.files import write_atomic
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+FAILED_ID = -1
+
+Embedder = Callable[[List[bytes]], Awaitable[List[List[float] | Exception]]]
+Searcher = Callable[[List[List[float]], int], Awaitable[List[List[Tuple[int, float]]]]]
+
+
+class JobNotFound(LookupError):
+    """Raised for unknown, malformed or expired job ids."""
+
+
+class JobLimitExceeded(ValueError):
+    """Raised while spooling a submission that is too large."""
+
+
+class LockLost(RuntimeError):
+    """Raised when another worker has taken over a job this process had claimed."""
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    id: str
+    path: Path
+    top_n: int
+    names: List[str]
+    created_at: datetime
+    expires_at: datetime
+
+    @property
+    def total(self) -> int:
+        return len(self.names)
+
+    @property
+    def record_dtype(self) -> np.dtype:
+        return result_dtype(self.top_n)
+
+
+@dataclass(frozen=True, slots=True)
+class JobResult:
+    index: int
+    name: str
+    matches: List[Tuple[int, float]]
+    error: Optional[str] = None
+
+
+def result_dtype(top_n: int) -> np.dtype:
+    return np.dtype([("ids", "<i4", (top_n,)), ("scores", "<f2", (top_n,))])
+
+
+class JobStore:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        retention: timedelta,
+        max_images: int,
+        max_image_bytes: int,
+        max_total_bytes: int,
+        stale_lock_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retry_backoff_seconds: float = 30.0,
+    ) -> None:
+        self.root = root
+        self.retention = retention
+        self.max_images = max_images
+        self.max_image_bytes = max_image_bytes
+        self.max_total_bytes = max_total_bytes
+        self.stale_lock_seconds = stale_lock_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        # job id -> the token this process wrote into the job's worker.lock
+        self._tokens: dict[str, str] = {}
+
+    # -- submission ---------------------------------------------------------------
+
+    def create(self, images: Iterable[Tuple[str, bytes]], *, top_n: int) -> Job:
+        """Spool ``images`` into a new queued job.
+
+        Raises ``JobLimitExceeded`` when the submission is too big and ``ValueError``
+        when it is empty.
+        """
+
+        job_id = uuid4().hex
+        path = self.root / job_id
+        (path / "input").mkdir(parents=True)
+        names: List[str] = []
+        total_bytes = 0
+        try:
+            for name, data in images:
+                if len(names) >= self.max_images:
+                    raise JobLimitExceeded(f"A job holds at most {self.max_images} images")
+                if len(data) > self.max_image_bytes:
+                    raise JobLimitExceeded(
+                        f"{name} exceeds the {self.max_image_bytes} byte image limit"
+                    )
+                total_bytes += len(data)
+                if total_bytes > self.max_total_bytes:
+                    raise JobLimitExceeded(f"A job holds at most {self.max_total_bytes} bytes")
+                (path / "input" / _input_name(len(names))).write_bytes(data)
+                names.append(name)
+            if not names:
+                raise ValueError("The submission contains no images")
+            created_at = datetime.now(timezone.utc)
+            job = Job(
+                id=job_id,
+                path=path,
+                top_n=top_n,
+                names=names,
+                created_at=created_at,
+                expires_at=created_at + self.retention,
+            )
+            # job.json appears last: until then workers and pollers ignore the directory.
+            write_atomic(path / "job.json", json.dumps(_job_metadata(job)).encode("utf-8"))
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        return job
+
+    # -- reading ------------------------------------------------------------------
+
+    def get(self, job_id: str) -> Job:
+        if not JOB_ID.match(job_id):
+            raise JobNotFound(job_id)
+        path = self.root / job_id
+        try:
+            metadata = json.loads((path / "job.json").read_text())
+        except (FileNotFoundError, ValueError) as exc:
+            raise JobNotFound(job_id) from exc
+        job = Job(
+            id=metadata["id"],
+            path=path,
+            top_n=metadata["top_n"],
+            names=metadata["names"],
+            created_at=datetime.fromisoformat(metadata["created_at"]),
+            expires_at=datetime.fromisoformat(metadata["expires_at"]),
+        )
+        if job.expires_at <= datetime.now(timezone.utc):
+            raise JobNotFound(job_id)
+        return job
+
+    def processed(self, job: Job) -> int:
+        try:
+            size = (job.path / "results.bin").stat().st_size
+        except FileNotFoundError:
+            return 0
+        return size // job.record_dtype.itemsize
+
+    def is_done(self, job: Job) -> bool:
+        return (job.path / "done").exists()
+
+    def is_failed(self, job: Job) -> bool:
+        return (job.path / "failed").exists()
+
+    def status(self, job: Job) -> dict:
+        processed = self.processed(job)
+        error = None
+        if self.is_done(job):
+            state = "completed"
+        elif self.is_failed(job):
+            state = "failed"
+            error = (job.path / "failed").read_text(encoding="utf-8")
+        elif self._lock_is_fresh(job):
+            state = "running"
+        else:
+            state = "queued"
+        return {
+            "id": job.id,
+            "status": state,
+            "total": job.total,
+            "processed": processed,
+            "failed": len(self._errors(job)),
+            "error": error,
+            "created_at": job.created_at.isoformat(),
+            "expires_at": job.expires_at.isoformat(),
+        }
+
+    def results(self, job: Job, offset: int = 0, limit: int | None = None) -> List[JobResult]:
+        dtype = job.record_dtype
+        available = self.processed(job)
+        count = max(0, min(available, offset + limit if limit is not None else available) - offset)
+        if count == 0:
+            return []
+        with open(job.path / "results.bin", "rb") as handle:
+            handle.seek(offset * dtype.itemsize)
+            records = np.frombuffer(handle.read(count * dtype.itemsize), dtype=dtype)
+        errors = self._errors(job) if np.any(records["ids"][:, 0] == FAILED_ID) else {}
+        results = []
+        for position, record in enumerate(records):
+            index = offset + position
+            ids = record["ids"].tolist()
+            scores = record["scores"].astype(np.float32).tolist()
+            matches = [(pid, score) for pid, score in zip(ids, scores) if pid != FAILED_ID]
+            results.append(JobResult(index, job.names[index], matches, errors.get(index)))
+        return results
+
+    # -- processing ---------------------------------------------------------------
+
+    def claim_next(self) -> Job | None:
+        """Take the oldest unfinished job nobody (alive) is working on."""
+
+        for job in self._pending_jobs():
+            if self._try_lock(job):
+                return job
+        return None
+
+    def read_inputs(self, job: Job, start: int, stop: int) -> List[bytes]:
+        return [(job.path / "input" / _input_name(i)).read_bytes() for i in range(start, stop)]
+
+    def append_results(
+        self,
+        job: Job,
+        matches: Sequence[List[Tuple[int, float]] | Exception],
+    ) -> None:
+        self._check_owner(job)
+        start = self.processed(job)
+        records = np.full(len(matches), 0, dtype=job.record_dtype)
+        records["ids"] = FAILED_ID
+        errors = []
+        for row, outcome in enumerate(matches):
+            if isinstance(outcome, Exception):
+                message = str(outcome) or type(outcome).__name__
+                errors.append({"index": start + row, "error": message})
+                continue
+            for column, (pokemon_id, score) in enumerate(outcome[: job.top_n]):
+                records["ids"][row, column] = pokemon_id
+                records["scores"][row, column] = score
+        if errors:
+            with open(job.path / "errors.jsonl", "a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(error) + "\n" for error in errors)
+        with open(job.path / "results.bin", "ab") as handle:
+            handle.write(records.tobytes())
+        os.utime(job.path / "worker.lock")
+
+    def heartbeat(self, job: Job) -> None:
+        """Keep this process's claim on ``job`` fresh; raises ``LockLost`` if it was taken."""
+
+        self._check_owner(job)
+        os.utime(job.path / "worker.lock")
+
+    def finish(self, job: Job) -> None:
+        (job.path / "done").touch()
+        shutil.rmtree(job.path / "input", ignore_errors=True)
+        self.release(job)
+
+    def record_failure(self, job: Job, error: BaseException) -> int:
+        """Count a failed attempt and give up the claim; returns the attempts so far.
+
+        The job is retried after an exponential backoff, and marked failed (its inputs
+        deleted) once it has failed ``max_attempts`` times.
+        """
+
+        message = str(error) or type(error).__name__
+        count = self._attempts(job).get("count", 0) + 1
+        if count >= self.max_attempts:
+            write_atomic(job.path / "failed", message.encode("utf-8"))
+            shutil.rmtree(job.path / "input", ignore_errors=True)
+        else:
+            retry_at = time.time() + self.retry_backoff_seconds * 2 ** (count - 1)
+            attempts = {"count": count, "retry_at": retry_at, "error": message}
+            write_atomic(job.path / "attempts.json", json.dumps(attempts).encode("utf-8"))
+        self.release(job)
+        return count
+
+    def release(self, job: Job) -> None:
+        """Give up this process's claim; a lock another worker took over is left alone."""
+
+        if self._owns(job):
+            (job.path / "worker.lock").unlink(missing_ok=True)
+        self._tokens.pop(job.id, None)
+
+    def sweep_expired(self) -> int:
+        """Delete expired jobs (and abandoned half-spooled ones); returns how many."""
+
+        now = datetime.now(timezone.utc)
+        removed = 0
+        for path in self._job_dirs():
+            try:
+                metadata = json.loads((path / "job.json").read_text())
+                expired = datetime.fromisoformat(metadata["expires_at"]) <= now
+            except FileNotFoundError:
+                # Still being spooled, unless it has been sitting there for a whole retention.
+                expired = path.stat().st_mtime < time.time() - self.retention.total_seconds()
+            except ValueError:
+                expired = True
+            if expired:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _job_dirs(self) -> Iterator[Path]:
+        if not self.root.exists():
+            return iter(())
+        return (path for path in self.root.iterdir() if JOB_ID.match(path.name))
+
+    def _pending_jobs(self) -> List[Job]:
+        jobs = []
+        now = time.time()
+        for path in self._job_dirs():
+            if (path / "done").exists() or (path / "failed").exists():
+                continue
+            try:
+                job = self.get(path.name)
+            except JobNotFound:
+                continue
+            if self._attempts(job).get("retry_at", 0) <= now:
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def _try_lock(self, job: Job) -> bool:
+        lock = job.path / "worker.lock"
+        if lock.exists():
+            if self._lock_is_fresh(job):
+                return False
+            # The previous owner stopped heartbeating (crash, restart); take over.
+            lock.unlink(missing_ok=True)
+        try:
+            handle = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        token = f"{os.getpid()}:{uuid4().hex}"
+        with os.fdopen(handle, "w") as stream:
+            stream.write(token)
+        self._tokens[job.id] = token
+        return True
+
+    def _owns(self, job: Job) -> bool:
+        token = self._tokens.get(job.id)
+        try:
+            return token is not None and (job.path / "worker.lock").read_text() == token
+        except FileNotFoundError:
+            return False
+
+    def _check_owner(self, job: Job) -> None:
+        if not self._owns(job):
+            raise LockLost(f"Job {job.id} was taken over by another worker")
+
+    def _lock_is_fresh(self, job: Job) -> bool:
+        try:
+            heartbeat = (job.path / "worker.lock").stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return time.time() - heartbeat < self.stale_lock_seconds
+
+    def _attempts(self, job: Job) -> dict:
+        try:
+            return json.loads((job.path / "attempts.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _errors(self, job: Job) -> dict[int, str]:
+        try:
+            lines = (job.path / "errors.jsonl").read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return {}
+        return {entry["index"]: entry["error"] for entry in map(json.loads, lines)}
+
+
+class BulkJobWorker:
+    """Background loop that works through queued jobs behind interactive traffic."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        admission: AdmissionController,
+        embed: Embedder,
+        search: Searcher,
+        *,
+        batch_size: int,
+        poll_interval_seconds: float = 1.0,
+        sweep_interval_seconds: float = 300.0,
+    ) -> None:
+        self._logger = get_logger(__name__)
+        self.store = store
+        self.admission = admission
+        self._embed = embed
+        self._search = search
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> bool:
+        """Process one queued job to completion; False when there was none."""
+
+        job = await asyncio.to_thread(self.store.claim_next)
+        if job is None:
+            return False
+        self._logger.info("bulk job started", job_id=job.id, total=job.total)
+        try:
+            await self._process(job)
+        except LockLost:
+            # Our heartbeat went stale and another worker resumed the job; leave it to them.
+            self._logger.warning("bulk job claim lost", job_id=job.id)
+            await asyncio.to_thread(self.store.release, job)
+            return True
+        except Exception as exc:
+            # Resume from the last record after a backoff, unless the job keeps failing.
+            attempts = await asyncio.to_thread(self.store.record_failure, job, exc)
+            self._logger.warning(
+                "bulk job attempt failed",
+                job_id=job.id,
+                attempts=attempts,
+                gave_up=attempts >= self.store.max_attempts,
+                exc_info=exc,
+            )
+            return True
+        except BaseException:
+            # Cancelled: let another worker (or this one, later) resume from the last record.
+            self.store.release(job)
+            raise
+        await asyncio.to_thread(self.store.finish, job)
+        self._logger.info("bulk job finished", job_id=job.id, total=job.total)
+        return True
+
+    async def _process(self, job: Job) -> None:
+        start = self.store.processed(job)
+        while start < job.total:
+            await self._wait_for_idle_inference(job)
+            stop = min(start + self.batch_size, job.total)
+            payloads = await asyncio.to_thread(self.store.read_inputs, job, start, stop)
+            embeddings = await self._embed(payloads)
+            valid = [e for e in embeddings if not isinstance(e, Exception)]
+            found = iter(await self._search(valid, job.top_n) if valid else [])
+            outcomes = [e if isinstance(e, Exception) else next(found) for e in embeddings]
+            await asyncio.to_thread(self.store.append_results, job, outcomes)
+            failed = sum(isinstance(outcome, Exception) for outcome in outcomes)
+            BULK_IMAGES.labels(outcome="ok").inc(len(outcomes) - failed)
+            BULK_IMAGES.labels(outcome="failed").inc(failed)
+            start = stop
+
+    async def _wait_for_idle_inference(self, job: Job) -> None:
+        # Interactive traffic can keep us waiting for longer than a lock stays fresh.
+        heartbeat_interval = self.store.stale_lock_seconds / 4
+        next_heartbeat = time.monotonic() + heartbeat_interval
+        while self.admission.active or self.admission.queue_depth:
+            if time.monotonic() >= next_heartbeat:
+                await asyncio.to_thread(self.store.heartbeat, job)
+                next_heartbeat = time.monotonic() + heartbeat_interval
+            await asyncio.sleep(0.05)
+
+    async def _loop(self) -> None:
+        next_sweep = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_sweep:
+                    removed = await asyncio.to_thread(self.store.sweep_expired)
+                    if removed:
+                        self._logger.info("expired bulk jobs removed", count=removed)
+                    next_sweep = time.monotonic() + self.sweep_interval_seconds
+                if await self.run_once():
+                    continue
+            except Exception as exc:  # noqa: BLE001 - keep the worker alive
+                self._logger.warning("bulk job worker error", exc_info=exc)
+            await asyncio.sleep(self.poll_interval_seconds)
+
+
+def _input_name(index: int) -> str:
+    return f"{index:06d}"
+
+
+def _job_metadata(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "top_n": job.top_n,
+        "names": job.names,
+        "created_at": job.created_at.isoformat(),
+        "expires_at": job.expires_at.isoformat(),
+    }
@@ -0,0 +1,100 @@
+"""Process-wide catalog holder with background invalidation."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from structlog import get_logger
+
+from app.services.catalog_snapshot import SharedCatalog
+
+
+VersionProbe = Callable[[], Awaitable[Optional[str]]]
+CatalogLoader = Callable[[bool], Awaitable[Optional[SharedCatalog]]]
+
+
+class CatalogManager:
+    """Hold the current catalog and swap in new versions without blocking requests.
+
+    ``probe`` returns the cheap-to-compute catalog version from the source of truth;
+    ``load(overwrite)`` rebuilds the full catalog. Requests only ever read ``current``,
+    which is replaced by a single reference assignment once a rebuild has finished.
+    """
+
+    def __init__(self, probe: VersionProbe, load: CatalogLoader) -> None:
+        self._logger = get_logger(__name__)
+        self._probe = probe
+        self._load = load
+        self._current: SharedCatalog | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def current(self) -> SharedCatalog | None:
+        return self._current
+
+    @property
+    def catalog_version(self) -> str | None:
+        return self._current.catalog_version if self._current is not None else None
+
+    def install(self, catalog: SharedCatalog) -> None:
+        """Adopt a catalog a request already loaded, so later requests skip the DB."""
+
+        if self._current is None:
+            self._current = catalog
+
+    async def refresh(self, *, force: bool = False) -> bool:
+        """Rebuild when the source version moved (or always, with ``force``).
+
+        Returns True when a new catalog was swapped in.
+        """
+
+        async with self._refresh_lock:
+            if not force:
+                version = await self._probe()
+                if version is None or version == self.catalog_version:
+                    return False
+            catalog = await self._load(force)
+            if catalog is None:
+                return False
+            previous = self.catalog_version
+            self._current = catalog
+        self._logger.info(
+            "catalog refreshed",
+            previous_version=previous,
+            catalog_version=catalog.catalog_version,
+            pokemon_count=len(catalog.by_id),
+            forced=force,
+        )
+        return True
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._poll(interval_seconds))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _poll(self, interval_seconds: float) -> None:
+        failing = False
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:  # noqa: BLE001 - keep polling through outages
+                if not failing:
+                    self._logger.warning("catalog version check failed", exc_info=exc)
+                failing = True
+            else:
+                if failing:
+                    self._logger.info("catalog version check recovered")
+                failing = False
+            await asyncio.sleep(interval_seconds)
@@ -0,0 +1,167 @@
+"""Attribute search over the in-memory catalog.
+
+``CatalogSearchIndex`` is built once per catalog version (see ``SharedCatalog``):
+
+* type, ability and generation -> boolean row bitmaps, combined with ``&`` / ``|``
+* every stat (plus the base-stat total, height and weight) -> values sorted once,
+  with the matching row order, so a range is two ``searchsorted`` calls
+* a precomputed row order per sort key, so sorting a result is a single gather
+
+Rows are positions in the catalog list the index was built from; ``search`` returns
+Pokémon ids so callers can resolve them against their own (possibly newer) entries.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models import Pokemon
+
+STAT_FIELDS = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+RANGE_FIELDS = STAT_FIELDS + ("total", "height", "weight")
+SORT_FIELDS = ("id", "name") + RANGE_FIELDS
+
+
+@dataclass(frozen=True, slots=True)
+class StatRange:
+    """Inclusive bounds on one of ``RANGE_FIELDS``; ``None`` leaves a side open."""
+
+    field: str
+    low: float | None = None
+    high: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SearchQuery:
+    """Filters are ANDed together.
+
+    A Pokémon must have every listed type, and at least one of the listed abilities
+    and generations.
+    """
+
+    types: Tuple[str, ...] = ()
+    abilities: Tuple[str, ...] = ()
+    generations: Tuple[int, ...] = ()
+    ranges: Tuple[StatRange, ...] = ()
+    sort: str = "id"
+    descending: bool = False
+    offset: int = 0
+    limit: int = 50
+
+
+@dataclass(frozen=True, slots=True)
+class SearchPage:
+    total: int
+    ids: List[int]
+
+
+class CatalogSearchIndex:
+    def __init__(self, pokedex: Sequence[Pokemon]) -> None:
+        self._size = len(pokedex)
+        self._ids = np.fromiter((pokemon.id for pokemon in pokedex), dtype=np.int64)
+        self._types = self._bitmaps((pokemon.types for pokemon in pokedex))
+        self._abilities = self._bitmaps((pokemon.abilities for pokemon in pokedex))
+        self._generations = self._bitmaps(((pokemon.generation,) for pokemon in pokedex))
+
+        self._sorted_values: Dict[str, np.ndarray] = {}
+        self._sorted_rows: Dict[str, np.ndarray] = {}
+        # Ascending and descending row orders; ties always break by ascending id.
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        for name in RANGE_FIELDS:
+            values = np.fromiter(
+                (_field_value(pokemon, name) for pokemon in pokedex),
+                dtype=np.float64,
+                count=self._size,
+            )
+            rows = np.lexsort((self._ids, values))
+            self._sorted_rows[name] = rows
+            self._sorted_values[name] = values[rows]
+            self._orders[name, False] = rows
+            self._orders[name, True] = np.lexsort((self._ids, -values))
+        by_id = np.argsort(self._ids, kind="stable")
+        self._orders["id", False] = by_id
+        self._orders["id", True] = by_id[::-1]
+        names = [pokemon.name.casefold() for pokemon in pokedex]
+        by_name = np.array(sorted(range(self._size), key=lambda row: (names[row], self._ids[row])))
+        self._orders["name", False] = by_name.astype(np.int64)
+        self._orders["name", True] = by_name[::-1].astype(np.int64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def search(self, query: SearchQuery) -> SearchPage:
+        if query.sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field {query.sort!r}")
+        mask = self._filter(query)
+        order = self._orders[query.sort, query.descending]
+        if mask is not None:
+            order = order[mask[order]]
+        page = order[query.offset : query.offset + query.limit]
+        return SearchPage(total=int(order.size), ids=self._ids[page].tolist())
+
+    def _filter(self, query: SearchQuery) -> np.ndarray | None:
+        mask: np.ndarray | None = None
+        for value in query.types:
+            mask = _intersect(mask, self._types.get(_key(value), self._empty()))
+        if query.abilities:
+            mask = _intersect(mask, self._union(self._abilities, query.abilities))
+        if query.generations:
+            mask = _intersect(mask, self._union(self._generations, query.generations))
+        for bounds in query.ranges:
+            mask = _intersect(mask, self._range(bounds))
+        return mask
+
+    def _range(self, bounds: StatRange) -> np.ndarray:
+        if bounds.field not in RANGE_FIELDS:
+            raise ValueError(f"Unknown range field {bounds.field!r}")
+        values = self._sorted_values[bounds.field]
+        start = 0 if bounds.low is None else np.searchsorted(values, bounds.low, side="left")
+        stop = (
+            values.size
+            if bounds.high is None
+            else np.searchsorted(values, bounds.high, side="right")
+        )
+        mask = self._empty()
+        mask[self._sorted_rows[bounds.field][start:stop]] = True
+        return mask
+
+    def _union(self, bitmaps: Dict[object, np.ndarray], values: Iterable[object]) -> np.ndarray:
+        mask = self._empty()
+        for value in values:
+            bitmap = bitmaps.get(_key(value))
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def _bitmaps(self, values_per_row: Iterable[Iterable[object]]) -> Dict[object, np.ndarray]:
+        bitmaps: Dict[object, np.ndarray] = {}
+        for row, values in enumerate(values_per_row):
+            for value in values:
+                bitmap = bitmaps.get(_key(value))
+                if bitmap is None:
+                    bitmap = bitmaps[_key(value)] = self._empty()
+                bitmap[row] = True
+        return bitmaps
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(self._size, dtype=bool)
+
+
+def _intersect(mask: np.ndarray | None, other: np.ndarray) -> np.ndarray:
+    return other if mask is None else mask & other
+
+
+def _key(value: object) -> object:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _field_value(pokemon: Pokemon, name: str) -> float:
+    stats = pokemon.stats
+    if name == "total":
+        return sum(getattr(stats, stat) for stat in STAT_FIELDS)
+    if name in STAT_FIELDS:
+        return getattr(stats, name)
+    return getattr(pokemon, name) or 0.0
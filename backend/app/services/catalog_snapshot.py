@@ -0,0 +1,477 @@
+"""Versioned binary snapshot of the Pokédex catalog.
+
+A snapshot is a single file laid out as::
+
+    header  | magic, format version, dtype, count, dim, metadata length, matrix offset
+    meta    | compact JSON: catalog/model versions plus one row per Pokémon
+    padding | zero bytes up to a 64-byte boundary
+    matrix  | ``count x dim`` embeddings (float32, float16 or int8), row order == meta rows
+    scales  | int8 only: 64-byte aligned ``count`` float32 per-row scales
+
+The metadata is small and parsed eagerly into a columnar ``CatalogStore`` (no
+per-entry objects); the embedding block is memory-mapped so loading a catalog costs
+a header read and a JSON parse regardless of its size.
+
+Mappings are read-only and file-backed, so every worker process on a node that maps
+the same file shares one copy of the embedding pages through the OS page cache.
+
+Large catalogs also get an IVF index sidecar (``<snapshot>.ivf``, see
+``app.services.ann_index``) that is mapped the same way and used for matching.
+A precomputed "similar Pokémon" graph (``<snapshot>.knn``, see
+``app.services.similarity_graph``) is mapped alongside when one was written.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.models import Pokemon
+from app.services.ann_index import IvfIndex, ann_index_path
+from app.services.catalog_search import CatalogSearchIndex
+from app.services.catalog_store import ROW_FIELDS, CatalogStore
+from app.services.embedding_precision import precision_dtype, precision_of, quantize
+from app.services.name_suggest import NameSuggestIndex
+from app.services.pokemon_matcher import PokemonMatcher
+from app.services.similarity_graph import SimilarityGraph, similarity_graph_path
+
+
+SNAPSHOT_MAGIC = b"PKDXSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".pkdx"
+DEFAULT_SNAPSHOT_PATH = (
+    Path(__file__).resolve().parent.parent / "data" / f"catalog{SNAPSHOT_SUFFIX}"
+)
+
+_DTYPE_CODES = {"float32": 1, "float16": 2, "int8": 3}
+_HEADER = struct.Struct("<8sHHIIQQ")
+_MATRIX_ALIGNMENT = 64
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a file is not a readable catalog snapshot."""
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """A loaded snapshot: Pokémon metadata plus the (usually mapped) embedding matrix."""
+
+    pokemon: CatalogStore
+    embeddings: np.ndarray
+    catalog_version: str
+    model_version: Optional[str]
+    created_at: str
+    path: Optional[Path] = None
+    scales: Optional[np.ndarray] = None
+
+    @property
+    def dimension(self) -> int:
+        return int(self.embeddings.shape[1])
+
+    @property
+    def precision(self) -> str:
+        return precision_of(self.embeddings)
+
+
+@dataclass(frozen=True, slots=True)
+class SharedCatalog:
+    """A process-wide mapped snapshot with its lookup table, matcher and search indexes."""
+
+    snapshot: CatalogSnapshot
+    by_id: Mapping[int, Pokemon] = field(repr=False)
+    matcher: PokemonMatcher = field(repr=False)
+    search_index: CatalogSearchIndex = field(repr=False)
+    suggest_index: NameSuggestIndex = field(repr=False)
+    similarity_graph: Optional[SimilarityGraph] = field(default=None, repr=False)
+    # Pre-rendered response JSON per Pokémon id, filled lazily by analysis_rendering.
+    fragments: Dict[int, bytes] = field(default_factory=dict, repr=False)
+
+    @property
+    def catalog_version(self) -> str:
+        return self.snapshot.catalog_version
+
+
+_shared_lock = threading.Lock()
+_shared_catalogs: Dict[
+    Path, Tuple[Tuple[int, int, Optional[int], Optional[int]], SharedCatalog]
+] = {}
+
+
+def write_snapshot(
+    path: Path,
+    pokemon: Sequence[Pokemon],
+    *,
+    catalog_version: str,
+    model_version: str | None = None,
+    dimension: int = 512,
+    precision: str = "float32",
+) -> Path:
+    """Serialize ``pokemon`` to ``path`` atomically and return the final path."""
+
+    matrix, mask = embedding_matrix(pokemon, dimension)
+    values, scales = quantize(matrix, precision)
+    rows = [_pokemon_to_row(entry, bool(has)) for entry, has in zip(pokemon, mask)]
+
+    meta = json.dumps(
+        {
+            "fields": ROW_FIELDS,
+            "catalog_version": catalog_version,
+            "model_version": model_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "rows": rows,
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+    matrix_offset = _align(_HEADER.size + len(meta))
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        _DTYPE_CODES[precision],
+        len(pokemon),
+        dimension,
+        len(meta),
+        matrix_offset,
+    )
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header)
+        handle.write(meta)
+        handle.write(b"\0" * (matrix_offset - _HEADER.size - len(meta)))
+        handle.write(values.tobytes(order="C"))
+        if scales is not None:
+            matrix_end = matrix_offset + values.nbytes
+            handle.write(b"\0" * (_align(matrix_end) - matrix_end))
+            handle.write(scales.tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    # Readers that already mapped the previous file keep their pages; new readers see
+    # the complete new file, never a partially written one.
+    os.replace(tmp_path, path)
+    return path
+
+
+def embedding_matrix(
+    pokemon: Sequence[Pokemon], dimension: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack embeddings into a ``count x dim`` matrix plus a has-embedding mask."""
+
+    matrix = np.zeros((len(pokemon), dimension), dtype="<f4")
+    mask = np.zeros(len(pokemon), dtype=bool)
+    for index, entry in enumerate(pokemon):
+        if entry.embedding is None or not len(entry.embedding):
+            continue
+        vector = np.asarray(entry.embedding, dtype="<f4")
+        if vector.shape != (dimension,):
+            raise ValueError(
+                f"Pokémon {entry.id} embedding has {vector.size} dims, expected {dimension}"
+            )
+        matrix[index] = vector
+        mask[index] = True
+    return matrix, mask
+
+
+def write_ann_index(
+    snapshot_path: Path,
+    embeddings: np.ndarray,
+    mask: np.ndarray,
+    *,
+    catalog_version: str,
+    nlist: int | None = None,
+    precision: str = "float32",
+) -> Path | None:
+    """Build the IVF sidecar for a snapshot; returns None when nothing has an embedding.
+
+    ``precision`` should match the snapshot's, so the index is no larger than it.
+
+    Write the sidecar before the snapshot it belongs to, so any reader that can see
+    the new snapshot can also see its index.
+    """
+
+    if not mask.any():
+        return None
+    index = IvfIndex.build(
+        embeddings,
+        mask=mask,
+        nlist=nlist or get_settings().ann_nlist,
+        catalog_version=catalog_version,
+        precision=precision,
+    )
+    return index.save(ann_index_path(snapshot_path))
+
+
+def load_ann_index(snapshot: CatalogSnapshot) -> IvfIndex | None:
+    """Map the snapshot's IVF sidecar, ignoring it when missing, unreadable or stale."""
+
+    if snapshot.path is None:
+        return None
+    path = ann_index_path(snapshot.path)
+    try:
+        index = IvfIndex.load(path, nprobe=get_settings().ann_nprobe)
+    except (OSError, ValueError):
+        return None
+    if index.catalog_version != snapshot.catalog_version:
+        return None
+    if index.dimension != snapshot.dimension:
+        return None
+    return index
+
+
+def load_similarity_graph(snapshot: CatalogSnapshot) -> SimilarityGraph | None:
+    """Map the snapshot's kNN sidecar, ignoring it when missing, unreadable or stale."""
+
+    if snapshot.path is None:
+        return None
+    try:
+        graph = SimilarityGraph.load(similarity_graph_path(snapshot.path))
+    except (OSError, ValueError):
+        return None
+    if graph.catalog_version != snapshot.catalog_version:
+        return None
+    return graph
+
+
+def load_snapshot(path: Path, *, mmap: bool = True) -> CatalogSnapshot:
+    """Load a snapshot, memory-mapping its embedding block unless ``mmap`` is False."""
+
+    path = Path(path)
+    with path.open("rb") as handle:
+        header_bytes = handle.read(_HEADER.size)
+        if len(header_bytes) < _HEADER.size:
+            raise SnapshotFormatError(f"{path} is too small to be a catalog snapshot")
+        magic, version, dtype_code, count, dimension, meta_length, matrix_offset = (
+            _HEADER.unpack(header_bytes)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotFormatError(f"{path} is not a catalog snapshot")
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotFormatError(f"Unsupported snapshot format version {version}")
+        precision = next(
+            (name for name, code in _DTYPE_CODES.items() if code == dtype_code), None
+        )
+        if precision is None:
+            raise SnapshotFormatError(f"Unsupported snapshot dtype code {dtype_code}")
+        meta = json.loads(handle.read(meta_length))
+
+    dtype = precision_dtype(precision)
+    matrix_end = matrix_offset + count * dimension * dtype.itemsize
+    scales_offset = _align(matrix_end) if precision == "int8" else None
+    expected_size = matrix_end if scales_offset is None else scales_offset + count * 4
+    if path.stat().st_size < expected_size:
+        raise SnapshotFormatError(f"{path} is truncated")
+
+    embeddings = _read_block(path, dtype, matrix_offset, (count, dimension), mmap=mmap)
+    scales = None
+    if scales_offset is not None:
+        scales = _read_block(path, np.dtype("<f4"), scales_offset, (count,), mmap=mmap)
+
+    pokemon = CatalogStore.from_rows(
+        meta.get("fields", ROW_FIELDS), meta["rows"], embeddings, scales
+    )
+    return CatalogSnapshot(
+        pokemon=pokemon,
+        embeddings=embeddings,
+        catalog_version=meta.get("catalog_version", ""),
+        model_version=meta.get("model_version"),
+        created_at=meta.get("created_at", ""),
+        path=path,
+        scales=scales,
+    )
+
+
+def open_shared_snapshot(path: Path) -> SharedCatalog:
+    """Map ``path`` once per process and reuse the mapping until the file is replaced."""
+
+    path = Path(path).resolve()
+    stat = path.stat()
+    # write_snapshot replaces files atomically, so a new inode means new content. The
+    # sidecars are part of the key so ones written after the snapshot are picked up.
+    key = (
+        stat.st_ino,
+        stat.st_mtime_ns,
+        _mtime(ann_index_path(path)),
+        _mtime(similarity_graph_path(path)),
+    )
+    with _shared_lock:
+        cached = _shared_catalogs.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        snapshot = load_snapshot(path)
+        # Materialized once for the index builds, then dropped again.
+        entries = list(snapshot.pokemon)
+        shared = SharedCatalog(
+            snapshot=snapshot,
+            by_id=snapshot.pokemon.by_id,
+            matcher=PokemonMatcher(
+                snapshot.pokemon, snapshot.embeddings, load_ann_index(snapshot)
+            ),
+            search_index=CatalogSearchIndex(entries),
+            suggest_index=NameSuggestIndex(entries),
+            similarity_graph=load_similarity_graph(snapshot),
+        )
+        del entries
+        _shared_catalogs[path] = (key, shared)
+        return shared
+
+
+def shared_catalog_dir() -> Path:
+    """Node-local directory where workers publish and map catalog files."""
+
+    configured = get_settings().catalog_shared_dir
+    if configured is not None:
+        return configured
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return base / "pokedex-catalog"
+
+
+def publish_shared_snapshot(
+    catalog_version: str,
+    build: Callable[[], Sequence[Pokemon]],
+    *,
+    model_version: str | None = None,
+    directory: Path | None = None,
+    overwrite: bool = False,
+    precision: str | None = None,
+    similarity_graph: Callable[[], SimilarityGraph | None] | None = None,
+) -> SharedCatalog:
+    """Map the node-local file for ``catalog_version``, writing it first if no worker has.
+
+    ``build`` is only called when the file is missing (or ``overwrite`` is set), so
+    workers that find a published version never materialize per-entry embeddings.
+    Catalogs of at least ``ann_min_catalog_size`` entries get an IVF index as well, and
+    the graph returned by ``similarity_graph`` (if any, built for ``catalog_version``)
+    is written next to the file.
+    """
+
+    directory = directory or shared_catalog_dir()
+    precision = precision or get_settings().embedding_precision
+    digest = hashlib.sha256(f"{catalog_version}|{precision}".encode("utf-8")).hexdigest()[:16]
+    path = directory / f"catalog-{digest}{SNAPSHOT_SUFFIX}"
+    if overwrite or not path.exists():
+        _write_shared(path, catalog_version, build, model_version, precision, similarity_graph)
+    try:
+        return open_shared_snapshot(path)
+    except FileNotFoundError:
+        # Removed between the check and the mapping by a worker that published a newer
+        # file just before this one; write it again rather than fail the refresh.
+        _write_shared(path, catalog_version, build, model_version, precision, similarity_graph)
+        return open_shared_snapshot(path)
+
+
+def _write_shared(
+    path: Path,
+    catalog_version: str,
+    build: Callable[[], Sequence[Pokemon]],
+    model_version: str | None,
+    precision: str,
+    similarity_graph: Callable[[], SimilarityGraph | None] | None,
+) -> None:
+    pokemon = build()
+    dimension = next(
+        (len(entry.embedding) for entry in pokemon if entry.embedding is not None),
+        512,
+    )
+    if len(pokemon) >= get_settings().ann_min_catalog_size:
+        matrix, mask = embedding_matrix(pokemon, dimension)
+        write_ann_index(path, matrix, mask, catalog_version=catalog_version, precision=precision)
+    else:
+        ann_index_path(path).unlink(missing_ok=True)
+    graph = similarity_graph() if similarity_graph is not None else None
+    if graph is not None:
+        graph.save(similarity_graph_path(path))
+    else:
+        similarity_graph_path(path).unlink(missing_ok=True)
+    write_snapshot(
+        path,
+        pokemon,
+        catalog_version=catalog_version,
+        model_version=model_version,
+        dimension=dimension,
+        precision=precision,
+    )
+    _remove_older_snapshots(path)
+
+
+def _remove_older_snapshots(published: Path) -> None:
+    # Processes that still map an older version keep its pages. Files at least as new as
+    # ``published`` may be another worker's just-published version (or one whose
+    # sidecars are written but whose snapshot is not yet), so they stay.
+    published_mtime = _mtime(published)
+    if published_mtime is None:
+        return
+    for snapshot in published.parent.glob(f"catalog-*{SNAPSHOT_SUFFIX}"):
+        mtime = _mtime(snapshot)
+        if snapshot == published or mtime is None or mtime >= published_mtime:
+            continue
+        for stale in (snapshot, ann_index_path(snapshot), similarity_graph_path(snapshot)):
+            stale.unlink(missing_ok=True)
+
+
+def catalog_version_for(latest_update: datetime, count: int) -> str:
+    """Version string for a database catalog; changes on any update, insert or delete."""
+
+    return f"{latest_update.isoformat()}/{count}"
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _align(offset: int) -> int:
+    return (offset + _MATRIX_ALIGNMENT - 1) // _MATRIX_ALIGNMENT * _MATRIX_ALIGNMENT
+
+
+def _read_block(
+    path: Path, dtype: np.dtype, offset: int, shape: Tuple[int, ...], *, mmap: bool
+) -> np.ndarray:
+    if not shape[0]:
+        return np.zeros(shape, dtype=dtype)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    return np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(
+        shape
+    )
+
+
+def _pokemon_to_row(pokemon: Pokemon, has_embedding: bool) -> list:
+    stats = pokemon.stats
+    return [
+        pokemon.id,
+        pokemon.name,
+        list(pokemon.types),
+        pokemon.description,
+        pokemon.image_url,
+        pokemon.genus,
+        pokemon.generation,
+        pokemon.height,
+        pokemon.weight,
+        list(pokemon.abilities),
+        [
+            stats.hp,
+            stats.attack,
+            stats.defense,
+            stats.special_attack,
+            stats.special_defense,
+            stats.speed,
+        ],
+        1 if has_embedding else 0,
+    ]
+
@@ -0,0 +1,394 @@
+"""Columnar, read-only storage for a loaded catalog.
+
+Materialized as one ``Pokemon`` per entry, a catalog costs a few dozen small Python
+objects per Pokémon (lists, strings, a ``PokemonStats``, an embedding row view) that
+every worker keeps alive and the garbage collector keeps walking. ``CatalogStore``
+holds the same data in a handful of arrays instead:
+
+* ids, generations, heights and weights -> one numpy array each
+* the six base stats -> one ``count x 6`` int32 array
+* types and abilities -> interned vocabularies plus per-row codes (CSR layout)
+* names, descriptions, image URLs and genera -> one pooled UTF-8 buffer in which
+  each distinct string is stored once
+* embeddings -> the snapshot's (usually memory-mapped) matrix, untouched
+
+``Pokemon`` objects are built on demand as views for the API layer. The most recently
+used ones are kept (``view_cache_size``), so a popular entry resolves to the same
+object across requests, which the response fragment cache relies on.
+"""
+
+from __future__ import annotations
+
+import threading
+from operator import itemgetter
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    overload,
+)
+
+import numpy as np
+
+from app.models import Pokemon, PokemonStats
+from app.services.embedding_precision import DequantizedRow
+
+# Snapshot row layout, also the argument order of ``_Columns.add``.
+ROW_FIELDS = (
+    "id",
+    "name",
+    "types",
+    "description",
+    "image_url",
+    "genus",
+    "generation",
+    "height",
+    "weight",
+    "abilities",
+    "stats",
+    "has_embedding",
+)
+TEXT_FIELDS = ("name", "description", "image_url", "genus")
+DEFAULT_VIEW_CACHE_SIZE = 1024
+
+
+class CatalogStore(Sequence[Pokemon]):
+    """The catalog as columns; indexing by row returns a ``Pokemon`` view."""
+
+    def __init__(
+        self,
+        columns: "_Columns",
+        embeddings: np.ndarray,
+        scales: np.ndarray | None = None,
+        *,
+        view_cache_size: int = DEFAULT_VIEW_CACHE_SIZE,
+    ) -> None:
+        if embeddings.shape[0] != len(columns.ids):
+            raise ValueError("Embedding matrix rows must match the catalog size")
+        self._ids = np.array(columns.ids, dtype=np.int64)
+        self._generations = np.array(columns.generations, dtype=np.int16)
+        self._heights = np.array(columns.heights, dtype=np.float64)
+        self._weights = np.array(columns.weights, dtype=np.float64)
+        self._stats = np.array(columns.stats, dtype=np.int32).reshape(-1, 6)
+        self._text_refs = np.array(columns.text_refs, dtype=np.int32).reshape(-1, len(TEXT_FIELDS))
+        self._text = b"".join(columns.texts)
+        self._text_offsets = np.zeros(len(columns.texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in columns.texts], out=self._text_offsets[1:])
+        self._types = _Codes(columns.type_names, columns.type_offsets, columns.type_codes)
+        self._abilities = _Codes(
+            columns.ability_names, columns.ability_offsets, columns.ability_codes
+        )
+        self._has_embedding = np.array(columns.has_embedding, dtype=bool)
+        self._embeddings = embeddings
+        self._scales = scales
+
+        order = np.argsort(self._ids, kind="stable")
+        self._sorted_ids = self._ids[order]
+        # Snapshots are written in id order, so the permutation is usually not needed.
+        self._id_order = None if np.array_equal(order, np.arange(order.size)) else order
+
+        self._view_cache_size = view_cache_size
+        self._views: Dict[int, Pokemon] = {}
+        self._views_lock = threading.Lock()
+
+    @classmethod
+    def from_rows(
+        cls,
+        fields: Sequence[str],
+        rows: Iterable[Sequence],
+        embeddings: np.ndarray,
+        scales: np.ndarray | None = None,
+        **kwargs,
+    ) -> "CatalogStore":
+        """Build from snapshot metadata rows (one list per Pokémon, in ``fields`` order)."""
+
+        pick = itemgetter(*(list(fields).index(name) for name in ROW_FIELDS))
+        columns = _Columns()
+        for values in map(pick, rows):
+            columns.add(*values)
+        return cls(columns, embeddings, scales, **kwargs)
+
+    @classmethod
+    def from_pokemon(
+        cls,
+        pokedex: Sequence[Pokemon],
+        embeddings: np.ndarray | None = None,
+        scales: np.ndarray | None = None,
+        **kwargs,
+    ) -> "CatalogStore":
+        """Build from ``Pokemon`` objects, stacking their embeddings unless given."""
+
+        columns = _Columns()
+        for pokemon in pokedex:
+            stats = pokemon.stats
+            columns.add(
+                pokemon.id,
+                pokemon.name,
+                pokemon.types,
+                pokemon.description,
+                pokemon.image_url,
+                pokemon.genus,
+                pokemon.generation,
+                pokemon.height,
+                pokemon.weight,
+                pokemon.abilities,
+                (
+                    stats.hp,
+                    stats.attack,
+                    stats.defense,
+                    stats.special_attack,
+                    stats.special_defense,
+                    stats.speed,
+                ),
+                pokemon.embedding is not None and len(pokemon.embedding) > 0,
+            )
+        if embeddings is None:
+            embeddings = _stack(pokedex)
+        return cls(columns, embeddings, scales, **kwargs)
+
+    def __len__(self) -> int:
+        return int(self._ids.size)
+
+    @overload
+    def __getitem__(self, row: int) -> Pokemon:
+        ...
+
+    @overload
+    def __getitem__(self, row: slice) -> List[Pokemon]:
+        ...
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        row = int(row)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("catalog row out of range")
+        view = self._views.get(row)
+        if view is None:
+            view = self._view(row)
+            with self._views_lock:
+                if self._views and len(self._views) >= self._view_cache_size:
+                    # Dicts keep insertion order: drop the oldest view.
+                    self._views.pop(next(iter(self._views)))
+                self._views[row] = view
+        return view
+
+    def __iter__(self) -> Iterator[Pokemon]:
+        # Full scans (index builds, listings) must not flush the views hot entries use.
+        for row in range(len(self)):
+            yield self._views.get(row) or self._view(row)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+    @property
+    def has_embedding(self) -> np.ndarray:
+        return self._has_embedding
+
+    @property
+    def by_id(self) -> "PokemonById":
+        return PokemonById(self)
+
+    def row_of(self, pokemon_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self._sorted_ids, pokemon_id))
+        if position == self._sorted_ids.size or self._sorted_ids[position] != pokemon_id:
+            return None
+        return position if self._id_order is None else int(self._id_order[position])
+
+    def get(self, pokemon_id: int) -> Optional[Pokemon]:
+        row = self.row_of(pokemon_id)
+        return None if row is None else self[row]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the metadata columns (the embedding matrix not included)."""
+
+        arrays = (
+            self._ids,
+            self._generations,
+            self._heights,
+            self._weights,
+            self._stats,
+            self._text_refs,
+            self._text_offsets,
+            self._has_embedding,
+            self._sorted_ids,
+        )
+        return (
+            sum(array.nbytes for array in arrays)
+            + len(self._text)
+            + self._types.nbytes
+            + self._abilities.nbytes
+        )
+
+    def _view(self, row: int) -> Pokemon:
+        name, description, image_url, genus = (
+            self._text_at(ref) for ref in self._text_refs[row].tolist()
+        )
+        hp, attack, defense, special_attack, special_defense, speed = self._stats[row].tolist()
+        return Pokemon(
+            id=int(self._ids[row]),
+            name=name,
+            types=self._types.row(row),
+            description=description,
+            image_url=image_url,
+            genus=genus,
+            generation=int(self._generations[row]),
+            height=float(self._heights[row]),
+            weight=float(self._weights[row]),
+            abilities=self._abilities.row(row),
+            stats=PokemonStats(
+                hp=hp,
+                attack=attack,
+                defense=defense,
+                special_attack=special_attack,
+                special_defense=special_defense,
+                speed=speed,
+            ),
+            embedding=self._embedding(row) if self._has_embedding[row] else None,
+        )
+
+    def _text_at(self, ref: int) -> str:
+        start, end = self._text_offsets[ref : ref + 2].tolist()
+        return self._text[start:end].decode("utf-8")
+
+    def _embedding(self, row: int):
+        # A row view into the (mapped) block; nothing is copied.
+        if self._scales is None:
+            return self._embeddings[row]
+        return DequantizedRow(self._embeddings[row], self._scales[row])
+
+
+class PokemonById(Mapping[int, Pokemon]):
+    """Read-only ``id -> Pokemon`` view of a store, in catalog order."""
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store: CatalogStore) -> None:
+        self._store = store
+
+    def __getitem__(self, pokemon_id: int) -> Pokemon:
+        pokemon = self._store.get(pokemon_id)
+        if pokemon is None:
+            raise KeyError(pokemon_id)
+        return pokemon
+
+    def __contains__(self, pokemon_id: object) -> bool:
+        return (
+            isinstance(pokemon_id, (int, np.integer)) and self._store.row_of(pokemon_id) is not None
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._store.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class _Codes:
+    """Per-row lists of interned strings: a vocabulary plus CSR offsets and codes."""
+
+    __slots__ = ("names", "offsets", "codes")
+
+    def __init__(self, names: List[str], offsets: List[int], codes: List[int]) -> None:
+        self.names = tuple(names)
+        self.offsets = np.array(offsets, dtype=np.int32)
+        self.codes = np.array(codes, dtype=np.uint16 if len(names) <= 1 << 16 else np.int32)
+
+    def row(self, row: int) -> List[str]:
+        start, end = self.offsets[row : row + 2].tolist()
+        names = self.names
+        return [names[code] for code in self.codes[start:end].tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.codes.nbytes
+
+
+class _Columns:
+    """Accumulates rows as flat Python lists before they are packed into arrays."""
+
+    def __init__(self) -> None:
+        self.ids: List[int] = []
+        self.generations: List[int] = []
+        self.heights: List[float] = []
+        self.weights: List[float] = []
+        self.stats: List[int] = []
+        self.text_refs: List[int] = []
+        self.texts: List[bytes] = []
+        self.has_embedding: List[bool] = []
+        self.type_names: List[str] = []
+        self.type_offsets: List[int] = [0]
+        self.type_codes: List[int] = []
+        self.ability_names: List[str] = []
+        self.ability_offsets: List[int] = [0]
+        self.ability_codes: List[int] = []
+        self._text_ids: Dict[str, int] = {}
+        self._type_ids: Dict[str, int] = {}
+        self._ability_ids: Dict[str, int] = {}
+
+    def add(
+        self,
+        pokemon_id: int,
+        name: str,
+        types: Sequence[str],
+        description: str,
+        image_url: str,
+        genus: str,
+        generation: int,
+        height: float,
+        weight: float,
+        abilities: Sequence[str],
+        stats: Sequence[int],
+        has_embedding: bool,
+    ) -> None:
+        """One entry, fields in ``ROW_FIELDS`` order."""
+
+        self.ids.append(pokemon_id)
+        self.generations.append(generation or 0)
+        self.heights.append(height or 0.0)
+        self.weights.append(weight or 0.0)
+        self.stats.extend(stats)
+        for text in (name, description, image_url, genus):
+            self.text_refs.append(self._text_ref(text or ""))
+        self.has_embedding.append(bool(has_embedding))
+        _append_codes(types, self._type_ids, self.type_names, self.type_codes)
+        self.type_offsets.append(len(self.type_codes))
+        _append_codes(abilities, self._ability_ids, self.ability_names, self.ability_codes)
+        self.ability_offsets.append(len(self.ability_codes))
+
+    def _text_ref(self, text: str) -> int:
+        ref = self._text_ids.get(text)
+        if ref is None:
+            ref = self._text_ids[text] = len(self.texts)
+            self.texts.append(text.encode("utf-8"))
+        return ref
+
+
+def _append_codes(
+    values: Sequence[str], ids: Dict[str, int], names: List[str], codes: List[int]
+) -> None:
+    for value in values or ():
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(names)
+            names.append(value)
+        codes.append(code)
+
+
+def _stack(pokedex: Sequence[Pokemon]) -> np.ndarray:
+    dimension = next(
+        (len(pokemon.embedding) for pokemon in pokedex if pokemon.embedding is not None), 0
+    )
+    matrix = np.zeros((len(pokedex), dimension), dtype=np.float32)
+    for row, pokemon in enumerate(pokedex):
+        if pokemon.embedding is not None and len(pokemon.embedding):
+            matrix[row] = pokemon.embedding
+    return matrix
@@ -0,0 +1,113 @@
+"""Reduced-precision embedding matrices.
+
+``float16`` halves and ``int8`` quarters the bytes per embedding. Int8 uses symmetric
+per-row scale quantization (``value ~= int8 * scale``). Cosine similarity is scale
+invariant, so scoring works on the int8 values directly and only needs the scales
+to hand back float embeddings.
+
+NumPy has no BLAS kernels for these dtypes, so scans convert bounded row blocks to
+float32 instead of materializing a full-precision copy of the matrix.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Literal, Tuple, get_args
+
+import numpy as np
+
+EmbeddingPrecision = Literal["float32", "float16", "int8"]
+PRECISIONS: Tuple[str, ...] = get_args(EmbeddingPrecision)
+
+_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+_BLOCK_ROWS = 1024
+
+
+def precision_dtype(precision: str) -> np.dtype:
+    try:
+        return _DTYPES[precision]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding precision {precision!r}; expected one of {PRECISIONS}"
+        ) from None
+
+
+def precision_of(matrix: np.ndarray) -> str:
+    for name, dtype in _DTYPES.items():
+        if matrix.dtype == dtype:
+            return name
+    raise ValueError(f"Unsupported embedding dtype {matrix.dtype}")
+
+
+def quantize(matrix: np.ndarray, precision: str) -> Tuple[np.ndarray, np.ndarray | None]:
+    """Convert a float matrix; returns ``(values, per-row scales or None)``."""
+
+    dtype = precision_dtype(precision)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if precision != "int8":
+        return matrix.astype(dtype, copy=False), None
+    absmax = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(matrix.shape[0])
+    scales = np.where(absmax > 0, absmax / 127.0, 1.0).astype("<f4")
+    values = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(dtype)
+    return values, scales
+
+
+def dequantize(values: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    matrix = np.asarray(values, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * scales[:, None]
+    return matrix
+
+
+def matvec(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """``matrix @ vector`` in float32, converting compact matrices block by block."""
+
+    if matrix.dtype == np.float32:
+        return matrix @ vector
+    out = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+        block = matrix[start : start + _BLOCK_ROWS].astype(np.float32)
+        np.matmul(block, vector, out=out[start : start + _BLOCK_ROWS])
+    return out
+
+
+def row_norms(matrix: np.ndarray) -> np.ndarray:
+    if matrix.dtype == np.float32:
+        return np.linalg.norm(matrix, axis=1)
+    out = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+        block = matrix[start : start + _BLOCK_ROWS].astype(np.float32)
+        out[start : start + _BLOCK_ROWS] = np.linalg.norm(block, axis=1)
+    return out
+
+
+class DequantizedRow(Sequence):
+    """Read-only float view of one int8 row, scaled on access.
+
+    Stands in for ``Pokemon.embedding`` so int8 catalogs never hold per-entry float
+    copies; ``numpy.asarray`` and iteration both yield the dequantized values.
+    """
+
+    __slots__ = ("_values", "_scale")
+
+    def __init__(self, values: np.ndarray, scale: float) -> None:
+        self._values = values
+        self._scale = float(scale)
+
+    def __len__(self) -> int:
+        return int(self._values.shape[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return (self._values[index].astype(np.float32) * self._scale).tolist()
+        return float(self._values[index]) * self._scale
+
+    def __iter__(self):
+        return iter(self.__array__().tolist())
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self._values.astype(np.float32) * np.float32(self._scale)
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"DequantizedRow(len={len(self)}, scale={self._scale:.6g})"
@@ -2,14 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import io
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 import torch
 from PIL import Image, UnidentifiedImageError
 from transformers import CLIPModel, CLIPProcessor
 
 from app.config import get_settings
+from app.services.inference_pool import InferencePool
+from app.utils.timing import StageTimer
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+
+def sniff_image_type(image_data: bytes) -> str | None:
+    """Detect the image MIME type from magic bytes, ignoring what the client claimed."""
+
+    for signature, mime_type in _SIGNATURES:
+        if image_data.startswith(signature):
+            return mime_type
+    if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
 
 
 class ImageProcessor:
@@ -18,44 +37,188 @@ class ImageProcessor:
     _clip_model: Optional[CLIPModel] = None
     _clip_processor: Optional[CLIPProcessor] = None
 
-    def __init__(self, target_size: int = 224) -> None:
+    def __init__(self, target_size: int = 224, load_model: bool | None = None) -> None:
         self.settings = get_settings()
         self.target_size = target_size
-        self._ensure_model_loaded()
+        if load_model is None:
+            # With an inference pool the weights live in the pool's processes only.
+            load_model = self.settings.inference_workers == 0
+        self._ensure_model_loaded(load_model)
+
+    def validate_image(self, image_data: bytes, mime_type: str | None) -> str:
+        """Check the upload and return its sniffed MIME type."""
 
-    def validate_image(self, image_data: bytes, mime_type: str | None) -> None:
         if not image_data:
             raise ValueError("Uploaded image is empty")
         if mime_type is None or mime_type.lower() not in self.settings.allowed_mime_types:
             raise ValueError("Invalid image format. Supported: JPEG, PNG, WebP")
         if len(image_data) > self.settings.max_upload_bytes:
             raise ValueError("Image exceeds the 10MB upload limit")
+        sniffed = sniff_image_type(image_data)
+        if sniffed is None or sniffed not in self.settings.allowed_mime_types:
+            raise ValueError("Invalid image format. Supported: JPEG, PNG, WebP")
+        return sniffed
+
+    def decode_image(self, image_data: bytes, target_size: int | None = None) -> Image.Image:
+        """Decode to RGB after checking the header's dimensions against the limits.
+
+        With ``target_size``, JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale
+        (never below ``target_size``), so a camera photo headed for 224px is never
+        decompressed at full resolution.
+        """
 
-    def resize_image(self, image_data: bytes) -> bytes:
         try:
-            image = Image.open(io.BytesIO(image_data)).convert("RGB")
-        except UnidentifiedImageError as exc:  # pragma: no cover - Pillow raises this internally
+            image = Image.open(io.BytesIO(image_data))
+            self._check_dimensions(*image.size)
+            if target_size is not None and image.format == "JPEG":
+                image.draft("RGB", (target_size, target_size))
+            return image.convert("RGB")
+        except Image.DecompressionBombError as exc:
+            raise ValueError("Image dimensions exceed the allowed limits") from exc
+        except (UnidentifiedImageError, OSError) as exc:
             raise ValueError("Uploaded file is not a valid image") from exc
 
-        image = image.resize((self.target_size, self.target_size))
+    def resize_image(self, image_data: bytes) -> bytes:
+        image = self._resize(self.decode_image(image_data, self.target_size))
         buffer = io.BytesIO()
         image.save(buffer, format="PNG")
         return buffer.getvalue()
 
     def extract_embedding(self, image_data: bytes) -> List[float]:
         image = Image.open(io.BytesIO(image_data)).convert("RGB")
-        inputs = self._clip_processor(images=image, return_tensors="pt")
+        return self._infer(self._preprocess(image))
+
+    def process(
+        self,
+        image_data: bytes,
+        mime_type: str | None,
+        timer: StageTimer | None = None,
+    ) -> List[float]:
+        timer = timer or StageTimer()
+        inputs = self._decode_and_preprocess(image_data, mime_type, timer)
+        with timer.stage("inference"):
+            return self._infer(inputs)
+
+    async def process_async(
+        self,
+        image_data: bytes,
+        mime_type: str | None,
+        timer: StageTimer | None = None,
+        pool: InferencePool | None = None,
+    ) -> List[float]:
+        """``process`` off the event loop; the forward pass goes to ``pool`` when one is given."""
+
+        if pool is None:
+            return await asyncio.to_thread(self.process, image_data, mime_type, timer)
+        timer = timer or StageTimer()
+        inputs = await asyncio.to_thread(self._decode_and_preprocess, image_data, mime_type, timer)
+        with timer.stage("inference"):
+            return await pool.embed(inputs["pixel_values"])
+
+    def extract_embeddings(self, images: Sequence[bytes]) -> List[List[float] | ValueError]:
+        """Embed ``images`` with one batched forward pass; invalid ones come back as errors."""
+
+        outcomes: List[List[float] | ValueError | None] = []
+        pixels = []
+        for image_data in images:
+            try:
+                pixels.append(self._prepare(image_data))
+            except ValueError as exc:
+                outcomes.append(exc)
+            else:
+                outcomes.append(None)
+        if pixels:
+            with torch.no_grad():
+                features = self._clip_model.get_image_features(pixel_values=torch.cat(pixels))
+            rows = iter(torch.nn.functional.normalize(features, p=2, dim=-1).tolist())
+            outcomes = [next(rows) if outcome is None else outcome for outcome in outcomes]
+        return outcomes
+
+    async def extract_embeddings_async(
+        self,
+        images: Sequence[bytes],
+        pool: InferencePool | None = None,
+    ) -> List[List[float] | ValueError]:
+        """``extract_embeddings`` off the event loop, or one pool call per image."""
+
+        if pool is None:
+            return await asyncio.to_thread(self.extract_embeddings, images)
+        outcomes: List[List[float] | ValueError] = []
+        for image_data in images:
+            try:
+                pixels = await asyncio.to_thread(self._prepare, image_data)
+            except ValueError as exc:
+                outcomes.append(exc)
+                continue
+            outcomes.append(await pool.embed(pixels))
+        return outcomes
+
+    async def warm_up(
+        self, passes: int, pool: InferencePool | None = None, batch_size: int = 0
+    ) -> None:
+        """Push ``passes`` blank images through the serving path (decode to embedding).
+
+        With ``batch_size`` above one, one batch of that many images follows, so the
+        bulk job worker's first batch does not pay for the new input shape either.
+        """
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (self.target_size, self.target_size), "white").save(buffer, "JPEG")
+        payload = buffer.getvalue()
+        for _ in range(passes):
+            if pool is None:
+                # Off the event loop: the first pass also loads the model.
+                await asyncio.to_thread(self.process, payload, "image/jpeg")
+            else:
+                # Each pool process has its own model, so keep every one of them busy.
+                await asyncio.gather(
+                    *(
+                        self.process_async(payload, "image/jpeg", pool=pool)
+                        for _ in range(pool.processes)
+                    )
+                )
+        if batch_size > 1:
+            await self.extract_embeddings_async([payload] * batch_size, pool=pool)
+
+    def _check_dimensions(self, width: int, height: int) -> None:
+        limit = self.settings.max_image_dimension
+        if width > limit or height > limit:
+            raise ValueError(f"Image is {width}x{height}; the maximum side is {limit}px")
+        if width * height > self.settings.max_image_pixels:
+            raise ValueError(
+                f"Image is {width}x{height}; the maximum is {self.settings.max_image_pixels} pixels"
+            )
+
+    def _decode_and_preprocess(
+        self, image_data: bytes, mime_type: str | None, timer: StageTimer
+    ) -> dict:
+        with timer.stage("decode"):
+            self.validate_image(image_data, mime_type)
+            image = self.decode_image(image_data, self.target_size)
+        # The resized image goes straight to CLIP; the PNG round trip in resize_image
+        # is lossless, so skipping it yields the same pixels.
+        with timer.stage("preprocess"):
+            return self._preprocess(self._resize(image))
+
+    def _prepare(self, image_data: bytes) -> torch.Tensor:
+        self.validate_image(image_data, sniff_image_type(image_data))
+        image = self.decode_image(image_data, self.target_size)
+        return self._preprocess(self._resize(image))["pixel_values"]
+
+    def _resize(self, image: Image.Image) -> Image.Image:
+        return image.resize((self.target_size, self.target_size))
+
+    def _preprocess(self, image: Image.Image) -> dict:
+        return self._clip_processor(images=image, return_tensors="pt")
+
+    def _infer(self, inputs: dict) -> List[float]:
         with torch.no_grad():
             embeddings = self._clip_model.get_image_features(**inputs)
         normalized = torch.nn.functional.normalize(embeddings, p=2, dim=-1)
         return normalized.squeeze(0).tolist()
 
-    def process(self, image_data: bytes, mime_type: str | None) -> List[float]:
-        self.validate_image(image_data, mime_type)
-        resized = self.resize_image(image_data)
-        return self.extract_embedding(resized)
-
-    def _ensure_model_loaded(self) -> None:
-        if ImageProcessor._clip_model is None or ImageProcessor._clip_processor is None:
+    def _ensure_model_loaded(self, include_model: bool = True) -> None:
+        if ImageProcessor._clip_processor is None:
             ImageProcessor._clip_processor = CLIPProcessor.from_pretrained(self.settings.clip_model_name)
+        if include_model and ImageProcessor._clip_model is None:
             ImageProcessor._clip_model = CLIPModel.from_pretrained(self.settings.clip_model_name)
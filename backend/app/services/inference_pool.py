@@ -0,0 +1,165 @@
+"""Out-of-process CLIP inference.
+
+A fixed set of worker processes each load the model once and run with their own
+torch thread count, so CPU scaling is configured independently of the HTTP workers.
+API processes keep decoding and preprocessing. They write the ``pixel_values``
+tensor into a preallocated shared-memory slot, and the worker reads it in place and
+writes the normalized embedding back into the same slot. Only the slot name and
+the tensor shape are pickled.
+
+Run one or two uvicorn workers per node with ``INFERENCE_WORKERS`` set to the
+remaining cores. Every API worker starts its own pool, so more uvicorn workers
+means more model copies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+DEFAULT_INPUT_SHAPE = (1, 3, 224, 224)
+MAX_OUTPUT_DIM = 2048
+_FLOAT32 = np.dtype(np.float32)
+
+
+def load_clip_model(model_name: str) -> torch.nn.Module:
+    from transformers import CLIPModel
+
+    return CLIPModel.from_pretrained(model_name).eval()
+
+
+@dataclass(slots=True)
+class _Slot:
+    segment: SharedMemory
+    input_bytes: int
+
+
+class InferencePool:
+    """Process pool for ``get_image_features`` fed through shared memory."""
+
+    def __init__(
+        self,
+        processes: int,
+        torch_threads: int,
+        model_name: str,
+        *,
+        model_loader: Callable[[str], torch.nn.Module] = load_clip_model,
+        input_shape: Tuple[int, ...] = DEFAULT_INPUT_SHAPE,
+    ) -> None:
+        if processes < 1:
+            raise ValueError("An inference pool needs at least one process")
+        self.processes = processes
+        self.torch_threads = torch_threads
+        self.model_name = model_name
+        self._model_loader = model_loader
+        self._input_bytes = math.prod(input_shape) * _FLOAT32.itemsize
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: List[_Slot] = []
+        self._free: Optional[asyncio.Queue[_Slot]] = None
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        # spawn, not fork: forked children inherit torch's thread pools in a broken state.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._model_loader, self.model_name, self.torch_threads),
+        )
+        # Two slots per process: one being computed, one queued behind it.
+        self._free = asyncio.Queue()
+        for _ in range(self.processes * 2):
+            segment = SharedMemory(
+                create=True, size=self._input_bytes + MAX_OUTPUT_DIM * _FLOAT32.itemsize
+            )
+            slot = _Slot(segment, self._input_bytes)
+            self._slots.append(slot)
+            self._free.put_nowait(slot)
+
+    def close(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        for slot in self._slots:
+            slot.segment.close()
+            slot.segment.unlink()
+        self._slots = []
+        self._free = None
+
+    async def embed(self, pixel_values: torch.Tensor) -> List[float]:
+        """Return the L2-normalized image embedding for one preprocessed image."""
+
+        if self._executor is None or self._free is None:
+            raise RuntimeError("Inference pool is not running")
+        pixels = pixel_values.detach().to(torch.float32).contiguous().numpy()
+        if pixels.nbytes > self._input_bytes:
+            raise ValueError(f"Input tensor {tuple(pixels.shape)} does not fit a pool slot")
+
+        slot = await self._free.get()
+        np.ndarray(pixels.shape, dtype=_FLOAT32, buffer=slot.segment.buf)[...] = pixels
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, _embed_in_worker, slot.segment.name, pixels.shape, slot.input_bytes
+        )
+        try:
+            dimension = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker may still be writing into the slot; recycle it once it is done.
+            future.add_done_callback(lambda _: self._release(slot))
+            raise
+        except BaseException:
+            self._release(slot)
+            raise
+        output = np.ndarray(
+            (dimension,), dtype=_FLOAT32, buffer=slot.segment.buf, offset=slot.input_bytes
+        )
+        embedding = output.tolist()
+        del output
+        self._release(slot)
+        return embedding
+
+    def _release(self, slot: _Slot) -> None:
+        if self._free is not None:
+            self._free.put_nowait(slot)
+
+
+_worker_model: Optional[torch.nn.Module] = None
+_worker_segments: Dict[str, SharedMemory] = {}
+
+
+def _init_worker(
+    model_loader: Callable[[str], torch.nn.Module], model_name: str, torch_threads: int
+) -> None:
+    global _worker_model
+    torch.set_num_threads(torch_threads)
+    _worker_model = model_loader(model_name)
+
+
+def _embed_in_worker(segment_name: str, shape: Tuple[int, ...], output_offset: int) -> int:
+    segment = _worker_segments.get(segment_name)
+    if segment is None:
+        segment = _worker_segments[segment_name] = SharedMemory(name=segment_name)
+    pixels = torch.from_numpy(np.ndarray(shape, dtype=_FLOAT32, buffer=segment.buf))
+    with torch.no_grad():
+        features = _worker_model.get_image_features(pixel_values=pixels)
+    embedding = torch.nn.functional.normalize(features, p=2, dim=-1).squeeze(0).numpy()
+    if embedding.size > MAX_OUTPUT_DIM:
+        raise ValueError(f"Embedding dimension {embedding.size} exceeds {MAX_OUTPUT_DIM}")
+    output = np.ndarray(
+        (embedding.size,), dtype=_FLOAT32, buffer=segment.buf, offset=output_offset
+    )
+    output[:] = embedding
+    return int(embedding.size)
@@ -0,0 +1,223 @@
+"""Typo-tolerant name autocomplete over the in-memory catalog.
+
+``NameSuggestIndex`` is built once per catalog version (see ``SharedCatalog``) from
+normalized keys: the full name, each later word of a multi-word name ("Mr. Mime"
+-> "mime") and the genus. Keys are case-, accent- and punctuation-folded and have
+spaces removed, so "mr mime", "MrMime" and "Mr. Mime" are the same key.
+
+* Prefix matches come from a sorted key array: a query is two bisections.
+* Typos go through a trigram index (``pg_trgm``-style padding). Only the
+  ``max_candidates`` keys sharing the most trigrams with the query are checked
+  with a banded edit distance, which bounds the per-query work regardless of catalog size.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models import Pokemon
+
+MAX_QUERY_LENGTH = 64
+
+# Match kinds, in ranking order.
+EXACT, NAME_PREFIX, WORD_PREFIX, GENUS_PREFIX, FUZZY = range(5)
+MATCH_LABELS = ("exact", "prefix", "prefix", "genus", "fuzzy")
+
+_KIND_SHIFT = 56
+_LENGTH_SHIFT = 40
+_ENTRIES_PER_ROW = 4
+_DROPPED = str.maketrans("", "", "'’.:")
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    id: int
+    name: str
+    match: str
+
+
+class NameSuggestIndex:
+    def __init__(self, pokedex: Sequence[Pokemon], *, max_candidates: int = 32) -> None:
+        self.max_candidates = max_candidates
+        self._ids = [pokemon.id for pokemon in pokedex]
+        self._names = [pokemon.name for pokemon in pokedex]
+
+        entries: List[Tuple[str, int, int]] = []
+        for row, pokemon in enumerate(pokedex):
+            words = normalize(pokemon.name).split()
+            if words:
+                entries.append(("".join(words), NAME_PREFIX, row))
+                entries.extend((word, WORD_PREFIX, row) for word in words[1:])
+            genus = "".join(normalize(pokemon.genus).split())
+            if genus:
+                entries.append((genus, GENUS_PREFIX, row))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._rows = np.array([row for _, _, row in entries], dtype=np.int64)
+        self._name_lengths = np.array([len(name) for name in self._names], dtype=np.int64)
+        # Prefix ranking (kind, name length, id) packed into one sortable integer.
+        ids = np.array(self._ids, dtype=np.int64)[self._rows]
+        kinds = np.array([kind for _, kind, _ in entries], dtype=np.int64)
+        self._ranks = (kinds << _KIND_SHIFT) | (self._name_lengths[self._rows] << _LENGTH_SHIFT) | ids
+
+        postings: Dict[str, List[int]] = {}
+        self._trigram_counts = np.zeros(len(entries), dtype=np.int32)
+        for entry, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._trigram_counts[entry] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self._postings = {
+            gram: np.array(entries_with_gram, dtype=np.int32)
+            for gram, entries_with_gram in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        key = "".join(normalize(query[:MAX_QUERY_LENGTH]).split())
+        if not key or limit <= 0:
+            return []
+        ranked = self._prefix_matches(key, limit)
+        if len(ranked) < limit:
+            seen = {row for row, _ in ranked}
+            fuzzy = self._fuzzy_matches(key, limit + len(seen))
+            ranked.extend((row, kind) for row, kind in fuzzy if row not in seen)
+        return [
+            Suggestion(id=self._ids[row], name=self._names[row], match=MATCH_LABELS[kind])
+            for row, kind in ranked[:limit]
+        ]
+
+    def _prefix_matches(self, key: str, limit: int) -> List[Tuple[int, int]]:
+        start = bisect_left(self._keys, key)
+        stop = bisect_left(self._keys, key + "\U0010ffff", lo=start)
+        if start == stop:
+            return []
+        ranks = self._ranks[start:stop].copy()
+        # Keys equal to the query sort first within the prefix range.
+        equal = bisect_right(self._keys, key, lo=start, hi=stop) - start
+        head = ranks[:equal]
+        head[head >> _KIND_SHIFT == NAME_PREFIX] -= 1 << _KIND_SHIFT
+        # A Pokémon has at most a few keys, so the best ``limit`` rows are among the
+        # best few ``limit`` entries: no need to sort a long range in full.
+        keep = _ENTRIES_PER_ROW * limit
+        if ranks.size > keep:
+            top = np.argpartition(ranks, keep - 1)[:keep]
+        else:
+            top = np.arange(ranks.size)
+        top = top[np.argsort(ranks[top])]
+        rows = self._rows[start + top]
+        kinds = ranks[top] >> _KIND_SHIFT
+        return _first_per_row(rows.tolist(), kinds.tolist(), limit)
+
+    def _fuzzy_matches(self, key: str, limit: int) -> List[Tuple[int, int]]:
+        allowed = max_typos(key)
+        grams = trigrams(key)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not allowed or not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._keys))
+        # One edit touches at most four trigrams (an adjacent swap); one more can be lost
+        # to the end padding when the query is a prefix of the key. Anything sharing
+        # fewer cannot be within ``allowed`` edits.
+        candidates = np.flatnonzero(shared >= len(grams) - 4 * allowed - 1)
+        if candidates.size > self.max_candidates:
+            top = np.argpartition(-shared[candidates], self.max_candidates - 1)
+            candidates = candidates[top[: self.max_candidates]]
+        similarity = shared[candidates] / (
+            len(grams) + self._trigram_counts[candidates] - shared[candidates]
+        )
+
+        scored = []
+        for entry, score in zip(candidates.tolist(), similarity.tolist()):
+            # Against any prefix of the key, so a misspelled start of a long name counts.
+            distance = prefix_distance(key, self._keys[entry], allowed)
+            if distance <= allowed:
+                row = int(self._rows[entry])
+                scored.append((distance, -score, self._name_lengths[row], row))
+        scored.sort()
+        return _first_per_row([row for *_, row in scored], [FUZZY] * len(scored), limit)
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and punctuation; separators become single spaces."""
+
+    decomposed = unicodedata.normalize("NFKD", text.casefold().translate(_DROPPED))
+    folded = "".join(
+        char if char.isalnum() else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return " ".join(folded.split())
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def max_typos(key: str) -> int:
+    if len(key) < 4:
+        return 0
+    return 1 if len(key) < 8 else 2
+
+
+def prefix_distance(query: str, key: str, limit: int) -> int:
+    """Fewest edits (insert, delete, substitute, swap adjacent) turning ``query`` into
+    some prefix of ``key``, or ``limit + 1`` when that takes more than ``limit``.
+
+    Only the diagonal band of width ``limit`` is filled, so the cost is
+    ``len(query) * (2 * limit + 1)`` steps however long ``key`` is.
+    """
+
+    over = limit + 1
+    key = key[: len(query) + limit]
+    width = len(key)
+    previous2: List[int] = []
+    previous = list(range(width + 1))
+    for i in range(1, len(query) + 1):
+        char = query[i - 1]
+        current = [i if i <= limit else over] + [over] * width
+        row_best = current[0]
+        for j in range(max(1, i - limit), min(width, i + limit) + 1):
+            other = key[j - 1]
+            value = previous[j - 1] + (char != other)
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (
+                i > 1
+                and j > 1
+                and char == key[j - 2]
+                and query[i - 2] == other
+                and previous2[j - 2] + 1 < value
+            ):
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > limit:
+            return over
+        previous2, previous = previous, current
+    return min(min(previous), over)
+
+
+def _first_per_row(rows: List[int], kinds: List[int], limit: int) -> List[Tuple[int, int]]:
+    """The best-ranked entry for each row (a Pokémon has several keys), up to ``limit``."""
+
+    seen: set[int] = set()
+    ranked = []
+    for row, kind in zip(rows, kinds):
+        if row not in seen:
+            seen.add(row)
+            ranked.append((row, kind))
+            if len(ranked) == limit:
+                break
+    return ranked
@@ -1,39 +1,98 @@
 """Similarity scoring helpers."""
 
-from typing import List
+from typing import List, Sequence
+
+import numpy as np
 
 from app.models import MatchResult, Pokemon
+from app.services.ann_index import IvfIndex
+from app.services.catalog_store import CatalogStore
+from app.services.embedding_precision import matvec, quantize, row_norms
 
 
 class PokemonMatcher:
-    """Find Pokémon best matching a given embedding."""
+    """Find Pokémon best matching a given embedding.
+
+    Scoring runs against a single ``count x dim`` float32 matrix whose rows line up
+    with the catalog order. The matrix may be a read-only memory map shared with
+    other processes; it is only ever read, never copied. It may also be float16 or
+    int8 (see ``app.services.embedding_precision``); ``precision`` picks the dtype when
+    the matcher stacks the catalog's embeddings itself.
+
+    With an ``ann_index`` the matrix is not scanned at all: queries go to the IVF
+    index, which only covers entries that have an embedding.
+    """
 
-    def __init__(self, pokedex: List[Pokemon] | None = None) -> None:
-        self._pokedex = pokedex or []
+    def __init__(
+        self,
+        pokedex: Sequence[Pokemon] | None = None,
+        embeddings: np.ndarray | None = None,
+        ann_index: IvfIndex | None = None,
+        precision: str = "float32",
+    ) -> None:
+        self._precision = precision
+        self.set_catalog(pokedex or [], embeddings, ann_index)
 
-    def set_catalog(self, pokedex: List[Pokemon]) -> None:
+    def set_catalog(
+        self,
+        pokedex: Sequence[Pokemon],
+        embeddings: np.ndarray | None = None,
+        ann_index: IvfIndex | None = None,
+    ) -> None:
         self._pokedex = pokedex
+        self._ann_index = ann_index
+        if embeddings is None:
+            embeddings, _ = quantize(self._stack_embeddings(pokedex), self._precision)
+        if embeddings.shape[0] != len(pokedex):
+            raise ValueError("Embedding matrix rows must match the catalog size")
+        self._embeddings = embeddings
+        if isinstance(pokedex, CatalogStore):
+            # Rows are only materialized for the matches actually returned.
+            self._missing = ~pokedex.has_embedding
+        else:
+            self._missing = np.array(
+                [pokemon.embedding is None for pokemon in pokedex], dtype=bool
+            )
+        self._norms = row_norms(embeddings) if len(pokedex) else np.zeros(0)
+
+    @property
+    def ann_index(self) -> IvfIndex | None:
+        return self._ann_index
 
     def find_best_matches(self, user_embedding: List[float], top_n: int = 5) -> List[MatchResult]:
-        candidates: list[tuple[float, Pokemon]] = []
-        for pokemon in self._pokedex:
-            reference_embedding = pokemon.embedding or user_embedding
-            score = self.calculate_similarity(user_embedding, reference_embedding)
-            candidates.append((score, pokemon))
+        query = np.asarray(user_embedding, dtype=np.float32)
+        if self._ann_index is not None and query.shape == (self._ann_index.dimension,):
+            rows, scores = self._ann_index.search(query, top_n)
+            return [
+                MatchResult(
+                    pokemon=self._pokedex[int(row)],
+                    similarity_score=min(1.0, max(0.0, float(score))),
+                    rank=index,
+                )
+                for index, (row, score) in enumerate(zip(rows, scores), start=1)
+            ]
 
-        sorted_matches = sorted(candidates, key=lambda item: item[0], reverse=True)[:top_n]
+        scores = self._score(query)
+        if not scores.size:
+            return []
+
+        if top_n >= scores.size:
+            order = np.argsort(-scores, kind="stable")
+        else:
+            candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+            order = candidates[np.lexsort((candidates, -scores[candidates]))]
 
         return [
             MatchResult(
-                pokemon=pokemon,
-                similarity_score=max(0.0, score),
+                pokemon=self._pokedex[row],
+                similarity_score=min(1.0, max(0.0, float(scores[row]))),
                 rank=index,
             )
-            for index, (score, pokemon) in enumerate(sorted_matches, start=1)
+            for index, row in enumerate(order[:top_n], start=1)
         ]
 
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
-        if not embedding1 or not embedding2:
+        if embedding1 is None or embedding2 is None or not len(embedding1) or not len(embedding2):
             return 0.0
         length = min(len(embedding1), len(embedding2))
         dot = sum(a * b for a, b in zip(embedding1[:length], embedding2[:length]))
@@ -42,3 +101,39 @@ class PokemonMatcher:
         if not norm_a or not norm_b:
             return 0.0
         return dot / (norm_a * norm_b)
+
+    def _score(self, query: np.ndarray) -> np.ndarray:
+        matrix = self._embeddings
+        if not matrix.shape[0] or not query.size:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+
+        # Mismatched dimensions compare the shared prefix, like calculate_similarity.
+        length = min(matrix.shape[1], query.shape[0])
+        if length == matrix.shape[1]:
+            rows, norms = matrix, self._norms
+        else:
+            rows = matrix[:, :length]
+            norms = row_norms(rows)
+        query = query[:length]
+        query_norm = float(np.linalg.norm(query))
+        if not query_norm:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+
+        dots = matvec(rows, query)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(norms > 0, dots / (norms * query_norm), 0.0)
+        # Entries without a reference embedding are compared against the query itself.
+        scores[self._missing] = 1.0
+        return scores
+
+    @staticmethod
+    def _stack_embeddings(pokedex: List[Pokemon]) -> np.ndarray:
+        dimension = max(
+            (len(pokemon.embedding) for pokemon in pokedex if pokemon.embedding is not None),
+            default=0,
+        )
+        matrix = np.zeros((len(pokedex), dimension), dtype=np.float32)
+        for row, pokemon in enumerate(pokedex):
+            if pokemon.embedding is not None and len(pokemon.embedding):
+                matrix[row, : len(pokemon.embedding)] = pokemon.embedding
+        return matrix
@@ -0,0 +1,209 @@
+"""Shadow evaluation of a candidate embedding model.
+
+A sampled fraction of ``/analyze`` uploads is embedded again by ``SHADOW_MODEL_NAME``
+once the primary result is known, on one background thread and never on the
+response path. The query is searched against the candidate's own catalog
+embeddings (``pokemon_shadow_embeddings``, filled by
+``scripts/precompute_embeddings.py --shadow-model``). Each evaluation records the
+candidate's decode/preprocess/inference latency and whether its top-1 and top-5
+agree with the primary's::
+
+    rate(pokedex_shadow_agreement_total{metric="top5"})
+      / rate(pokedex_shadow_comparisons_total{metric="top5"})
+
+At most ``max_pending`` evaluations are queued or running; further samples are
+skipped (``outcome="busy"``) rather than piling up behind a slow candidate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Awaitable, Callable, List, Sequence, Set, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+from structlog import get_logger
+
+from app.utils.metrics import (
+    SHADOW_AGREEMENT,
+    SHADOW_COMPARISONS,
+    SHADOW_EVALUATIONS,
+    SHADOW_STAGE_SECONDS,
+)
+from app.utils.timing import StageTimer
+
+TOP_K = 5
+DEFAULT_CATALOG_TTL_SECONDS = 300.0
+
+# Pokémon ids and their unit-normalized embeddings under the candidate model.
+ShadowCatalog = Tuple[np.ndarray, np.ndarray]
+
+
+def load_shadow_model(model_name: str) -> Tuple[torch.nn.Module, Callable[..., dict]]:
+    from transformers import CLIPModel, CLIPProcessor
+
+    return CLIPModel.from_pretrained(model_name).eval(), CLIPProcessor.from_pretrained(model_name)
+
+
+class ShadowModel:
+    """A candidate model with its own preprocessing, loaded on first use."""
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        loader: Callable[[str], Tuple[torch.nn.Module, Callable[..., dict]]] = load_shadow_model,
+    ) -> None:
+        self.model_name = model_name
+        self._loader = loader
+        self._model: torch.nn.Module | None = None
+        self._processor: Callable[..., dict] | None = None
+        self._lock = threading.Lock()
+
+    def embed(self, image_data: bytes, timer: StageTimer | None = None) -> np.ndarray:
+        """L2-normalized embedding of one already validated upload."""
+
+        self._ensure_loaded()
+        timer = timer or StageTimer()
+        with timer.stage("decode"):
+            image = Image.open(io.BytesIO(image_data)).convert("RGB")
+        with timer.stage("preprocess"):
+            inputs = self._processor(images=image, return_tensors="pt")
+        with timer.stage("inference"):
+            with torch.no_grad():
+                features = self._model.get_image_features(pixel_values=inputs["pixel_values"])
+        return torch.nn.functional.normalize(features, p=2, dim=-1).squeeze(0).numpy()
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._model is None:
+                self._model, self._processor = self._loader(self.model_name)
+
+
+class ShadowEvaluator:
+    """Samples analyses and compares a candidate model's matches with the primary's."""
+
+    def __init__(
+        self,
+        model: ShadowModel,
+        sample_rate: float,
+        load_catalog: Callable[[], Awaitable[ShadowCatalog]],
+        *,
+        max_pending: int = 2,
+        catalog_ttl_seconds: float = DEFAULT_CATALOG_TTL_SECONDS,
+        sample: Callable[[], float] = random.random,
+    ) -> None:
+        self.model = model
+        self.sample_rate = sample_rate
+        self._load_catalog = load_catalog
+        self._max_pending = max_pending
+        self._catalog_ttl = catalog_ttl_seconds
+        self._sample = sample
+        self._catalog: ShadowCatalog | None = None
+        self._catalog_loaded_at = 0.0
+        self._catalog_lock: asyncio.Lock | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._logger = get_logger(__name__)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def maybe_submit(self, image_data: bytes, primary_ids: Sequence[int]) -> bool:
+        """Schedule an evaluation for a sampled request; returns whether one was scheduled."""
+
+        if not primary_ids or self._sample() >= self.sample_rate:
+            return False
+        if len(self._tasks) >= self._max_pending:
+            SHADOW_EVALUATIONS.labels(outcome="busy").inc()
+            return False
+        task = asyncio.get_running_loop().create_task(self._evaluate(image_data, list(primary_ids)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def drain(self) -> None:
+        """Wait for the evaluations already scheduled."""
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await self.drain()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _evaluate(self, image_data: bytes, primary_ids: List[int]) -> None:
+        outcome = "error"
+        try:
+            catalog = await self._current_catalog()
+            if catalog is None:
+                outcome = "no_catalog"
+                return
+            if self._executor is None:
+                # One thread: the candidate never runs more than one forward pass at a time.
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-eval")
+            timer = StageTimer()
+            shadow_ids = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._rank, image_data, catalog, timer
+            )
+            for stage, duration_ms in timer.stages.items():
+                SHADOW_STAGE_SECONDS.labels(stage=stage).observe(duration_ms / 1000)
+            for metric, agreement in compare_rankings(primary_ids, shadow_ids).items():
+                SHADOW_COMPARISONS.labels(metric=metric).inc()
+                SHADOW_AGREEMENT.labels(metric=metric).inc(agreement)
+            outcome = "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as exc:  # noqa: BLE001 - shadow failures must never reach a request
+            self._logger.warning(
+                "shadow evaluation failed", model=self.model.model_name, exc_info=exc, throttle=True
+            )
+        finally:
+            SHADOW_EVALUATIONS.labels(outcome=outcome).inc()
+
+    def _rank(self, image_data: bytes, catalog: ShadowCatalog, timer: StageTimer) -> List[int]:
+        ids, matrix = catalog
+        query = self.model.embed(image_data, timer)
+        if query.shape[0] != matrix.shape[1]:
+            raise ValueError(
+                f"{self.model.model_name} returns {query.shape[0]}-d embeddings but the "
+                f"stored ones are {matrix.shape[1]}-d"
+            )
+        with timer.stage("search"):
+            scores = matrix @ query
+            k = min(TOP_K, scores.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            return ids[top[np.argsort(-scores[top], kind="stable")]].tolist()
+
+    async def _current_catalog(self) -> ShadowCatalog | None:
+        if self._catalog_lock is None:
+            self._catalog_lock = asyncio.Lock()
+        async with self._catalog_lock:
+            if self._catalog is None or monotonic() - self._catalog_loaded_at > self._catalog_ttl:
+                ids, matrix = await self._load_catalog()
+                # Nothing precomputed yet: try again on the next sample.
+                self._catalog = (ids, matrix) if ids.size else None
+                self._catalog_loaded_at = monotonic()
+            return self._catalog
+
+
+def compare_rankings(primary_ids: Sequence[int], shadow_ids: Sequence[int]) -> dict[str, float]:
+    """Top-1 agreement, plus the top-5 overlap when both rankings have five entries."""
+
+    agreement = {"top1": float(primary_ids[0] == shadow_ids[0])}
+    if len(primary_ids) >= TOP_K and len(shadow_ids) >= TOP_K:
+        overlap = set(primary_ids[:TOP_K]) & set(shadow_ids[:TOP_K])
+        agreement["top5"] = len(overlap) / TOP_K
+    return agreement
@@ -0,0 +1,316 @@
+"""Precomputed "similar Pokémon" graph: the ``k`` nearest catalog neighbours of each entry.
+
+Built offline with batched all-pairs cosine similarity (one matrix product per block
+of rows) and kept up to date incrementally when embeddings change, so serving a
+"looks similar to" panel is an array read instead of a vector search.
+
+Neighbours are stored as Pokémon ids, not catalog rows, so the same graph fits the
+database columns (``pokemon.similar_ids`` / ``similar_scores``) and any snapshot.
+On disk, next to a catalog snapshot, it is one file mapped read-only::
+
+    header     | magic, format version, count, k, catalog version length
+    version    | utf-8 catalog version the graph was built for
+    padding    | zero bytes up to a 64-byte boundary
+    ids        | count int32 Pokémon ids, ascending
+    neighbours | count x k int32 Pokémon ids, most similar first, -1 past the last one
+    scores     | count x k float32 cosine similarities, same layout
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+KNN_MAGIC = b"PKDXKNN1"
+KNN_FORMAT_VERSION = 1
+KNN_SUFFIX = ".knn"
+
+_HEADER = struct.Struct("<8sHIIQ")
+_ALIGNMENT = 64
+# Upper bound on the similarity block computed at once (rows x catalog), in elements.
+_BLOCK_ELEMENTS = 1 << 24
+
+
+class SimilarityGraph:
+    """Read-only kNN graph; arrays may be memory maps."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        neighbours: np.ndarray,
+        scores: np.ndarray,
+        *,
+        catalog_version: str = "",
+    ) -> None:
+        self.ids = ids
+        self.neighbours = neighbours
+        self.scores = scores
+        self.catalog_version = catalog_version
+        self._rows: Dict[int, int] = {
+            pokemon_id: row for row, pokemon_id in enumerate(ids.tolist())
+        }
+
+    @property
+    def k(self) -> int:
+        return int(self.neighbours.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def __contains__(self, pokemon_id: int) -> bool:
+        return pokemon_id in self._rows
+
+    def neighbours_of(
+        self, pokemon_id: int, limit: int | None = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(neighbour ids, scores), best first; empty for unknown ids or missing embeddings."""
+
+        row = self._rows.get(pokemon_id)
+        if row is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        neighbours = self.neighbours[row, :limit]
+        present = neighbours >= 0
+        return neighbours[present], self.scores[row, :limit][present]
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[int] | np.ndarray,
+        embeddings: np.ndarray,
+        *,
+        mask: np.ndarray | None = None,
+        k: int = 12,
+        catalog_version: str = "",
+    ) -> "SimilarityGraph":
+        """Exact top-``k`` neighbours of every row. Rows where ``mask`` is False (no
+        embedding) get no neighbours and are nobody's neighbour."""
+
+        ids, vectors, valid = _prepare(ids, embeddings, mask)
+        rows, scores = _top_k(vectors, valid, np.arange(ids.size), k)
+        return cls(ids, _to_ids(ids, rows), scores, catalog_version=catalog_version)
+
+    @classmethod
+    def from_lists(
+        cls,
+        entries: Iterable[Tuple[int, Optional[Sequence[int]], Optional[Sequence[float]]]],
+        *,
+        k: int,
+        catalog_version: str = "",
+    ) -> "SimilarityGraph":
+        """Assemble a graph from per-Pokémon ``(id, neighbour ids, scores)`` lists."""
+
+        entries = sorted(entries, key=lambda entry: entry[0])
+        ids = np.array([entry[0] for entry in entries], dtype=np.int32)
+        neighbours = np.full((ids.size, k), -1, dtype=np.int32)
+        scores = np.zeros((ids.size, k), dtype=np.float32)
+        for row, (_, similar_ids, similar_scores) in enumerate(entries):
+            count = min(k, len(similar_ids or ()))
+            if count:
+                neighbours[row, :count] = similar_ids[:count]
+                scores[row, :count] = similar_scores[:count]
+        return cls(ids, neighbours, scores, catalog_version=catalog_version)
+
+    def update(
+        self,
+        ids: Sequence[int] | np.ndarray,
+        embeddings: np.ndarray,
+        changed_ids: Iterable[int],
+        *,
+        mask: np.ndarray | None = None,
+        catalog_version: str = "",
+    ) -> Tuple["SimilarityGraph", np.ndarray]:
+        """The graph for the new ``embeddings`` where only ``changed_ids`` moved.
+
+        Returns the new graph and the ids whose neighbour lists differ from this one.
+        Ids absent from this graph count as changed, ids absent from ``ids`` as removed.
+
+        A row whose old list contains no changed or removed id can only gain changed
+        entries, so it is merged with its similarities to the changed rows. Every other
+        row (changed rows included) is recomputed in full.
+        """
+
+        ids, vectors, valid = _prepare(ids, embeddings, mask)
+        k = self.k
+        old_rows = np.array([self._rows.get(pokemon_id, -1) for pokemon_id in ids.tolist()])
+        known = old_rows >= 0
+        changed = ~known | np.isin(ids, np.fromiter(changed_ids, dtype=np.int64))
+        moved = np.union1d(ids[changed], np.setdiff1d(self.ids, ids))
+
+        previous = np.full((ids.size, k), -1, dtype=np.int32)
+        previous_scores = np.zeros((ids.size, k), dtype=np.float32)
+        previous[known] = self.neighbours[old_rows[known]]
+        previous_scores[known] = self.scores[old_rows[known]]
+
+        stale = changed | np.isin(previous, moved).any(axis=1)
+        neighbours = previous.copy()
+        scores = previous_scores.copy()
+
+        stale_rows = np.flatnonzero(stale)
+        if stale_rows.size:
+            rows, stale_scores = _top_k(vectors, valid, stale_rows, k)
+            neighbours[stale_rows] = _to_ids(ids, rows)
+            scores[stale_rows] = stale_scores
+
+        candidates = np.flatnonzero(changed & valid)
+        kept = np.flatnonzero(~stale & valid)
+        if candidates.size and kept.size:
+            step = max(1, _BLOCK_ELEMENTS // candidates.size)
+            for start in range(0, kept.size, step):
+                block = kept[start : start + step]
+                merged_ids = np.concatenate(
+                    [
+                        previous[block],
+                        np.broadcast_to(ids[candidates], (block.size, candidates.size)),
+                    ],
+                    axis=1,
+                )
+                merged_scores = np.concatenate(
+                    [
+                        np.where(previous[block] >= 0, previous_scores[block], -np.inf),
+                        vectors[block] @ vectors[candidates].T,
+                    ],
+                    axis=1,
+                )
+                best, best_scores = _select(merged_scores, k)
+                picked = np.take_along_axis(merged_ids, best, axis=1)
+                neighbours[block] = np.where(np.isfinite(best_scores), picked, -1)
+                scores[block] = np.where(np.isfinite(best_scores), best_scores, 0.0)
+
+        differs = (
+            ~known
+            | (neighbours != previous).any(axis=1)
+            | (np.abs(scores - previous_scores) > 1e-6).any(axis=1)
+        )
+        graph = SimilarityGraph(ids, neighbours, scores, catalog_version=catalog_version)
+        return graph, ids[differs]
+
+    def save(self, path: Path) -> Path:
+        version = self.catalog_version.encode("utf-8")
+        header = _HEADER.pack(KNN_MAGIC, KNN_FORMAT_VERSION, len(self), self.k, len(version))
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(header)
+            handle.write(version)
+            handle.write(b"\0" * (_align(len(header) + len(version)) - len(header) - len(version)))
+            for array, dtype in (
+                (self.ids, "<i4"),
+                (self.neighbours, "<i4"),
+                (self.scores, "<f4"),
+            ):
+                handle.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, *, mmap: bool = True) -> "SimilarityGraph":
+        path = Path(path)
+        with path.open("rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} is too small to be a similarity graph")
+            magic, version, count, k, version_length = _HEADER.unpack(header)
+            if magic != KNN_MAGIC or version != KNN_FORMAT_VERSION:
+                raise ValueError(f"{path} is not a supported similarity graph")
+            catalog_version = handle.read(version_length).decode("utf-8")
+
+        offset = _align(_HEADER.size + version_length)
+        arrays = []
+        for dtype, shape in (("<i4", (count,)), ("<i4", (count, k)), ("<f4", (count, k))):
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if offset + size > path.stat().st_size:
+                raise ValueError(f"{path} is truncated")
+            if mmap and size:
+                arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+            else:
+                arrays.append(
+                    np.fromfile(
+                        path, dtype=dtype, count=int(np.prod(shape)), offset=offset
+                    ).reshape(shape)
+                )
+            offset += size
+        ids, neighbours, scores = arrays
+        return cls(ids, neighbours, scores, catalog_version=catalog_version)
+
+
+def similarity_graph_path(snapshot_path: Path) -> Path:
+    """The graph sidecar lives next to the catalog snapshot it was built for."""
+
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(snapshot_path.name + KNN_SUFFIX)
+
+
+def _prepare(
+    ids: Sequence[int] | np.ndarray, embeddings: np.ndarray, mask: np.ndarray | None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sort by id and L2-normalize; returns (ids, vectors, has-embedding mask)."""
+
+    ids = np.asarray(ids, dtype=np.int32)
+    order = np.argsort(ids, kind="stable")
+    vectors = np.asarray(embeddings, dtype=np.float32)[order]
+    norms = np.linalg.norm(vectors, axis=1)
+    valid = norms > 0
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)[order]
+    norms[~valid] = 1.0
+    return ids[order], vectors / norms[:, None], valid
+
+
+def _top_k(
+    vectors: np.ndarray, valid: np.ndarray, rows: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best ``k`` other valid rows for each of ``rows``: (row numbers or -1, scores)."""
+
+    count = vectors.shape[0]
+    neighbours = np.full((rows.size, k), -1, dtype=np.int64)
+    scores = np.zeros((rows.size, k), dtype=np.float32)
+    step = max(1, _BLOCK_ELEMENTS // max(count, 1))
+    for start in range(0, rows.size, step):
+        block = rows[start : start + step]
+        similarities = vectors[block] @ vectors.T
+        similarities[:, ~valid] = -np.inf
+        similarities[~valid[block]] = -np.inf
+        similarities[np.arange(block.size), block] = -np.inf
+        best, best_scores = _select(similarities, k)
+        found = np.isfinite(best_scores)
+        neighbours[start : start + block.size] = np.where(found, best, -1)
+        scores[start : start + block.size] = np.where(found, best_scores, 0.0)
+    return neighbours, scores
+
+
+def _select(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of each row's ``k`` highest scores, best first.
+
+    Rows with fewer than ``k`` columns are padded with index 0 and ``-inf``.
+    """
+
+    columns = scores.shape[1]
+    if columns > k:
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        best = np.broadcast_to(np.arange(columns), (scores.shape[0], columns))
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    if columns < k:
+        padding = k - columns
+        best = np.pad(best, ((0, 0), (0, padding)))
+        best_scores = np.pad(best_scores, ((0, 0), (0, padding)), constant_values=-np.inf)
+    return best, best_scores
+
+
+def _to_ids(ids: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    return np.where(rows >= 0, ids[np.maximum(rows, 0)], -1).astype(np.int32)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -0,0 +1,66 @@
+"""Per-worker startup warmup.
+
+A fresh worker pays for torch kernel selection, the first catalog load and new
+database connections on its first requests. ``Warmup.run`` does that work in the
+background right after startup, one named phase at a time, and logs how long each
+phase took. ``/health/ready`` reports the worker as not ready until it is done.
+
+A failing phase is logged and recorded but does not keep the worker out of
+rotation: it can still serve (e.g. from the snapshot when Postgres is down), just
+not warm.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, Sequence, Tuple
+
+from structlog import get_logger
+
+WarmupPhase = Tuple[str, Callable[[], Awaitable[object]]]
+
+
+class Warmup:
+    def __init__(self) -> None:
+        self._logger = get_logger(__name__)
+        self.done = False
+        self.phase_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def status(self) -> dict:
+        return {
+            "done": self.done,
+            "phases_ms": dict(self.phase_ms),
+            "failed": sorted(self.errors),
+        }
+
+    def skip(self) -> None:
+        self.done = True
+        self._logger.info("warmup skipped")
+
+    async def run(self, phases: Sequence[WarmupPhase]) -> None:
+        started = perf_counter()
+        try:
+            for name, phase in phases:
+                phase_started = perf_counter()
+                try:
+                    await phase()
+                except Exception as exc:  # noqa: BLE001 - a cold phase must not block serving
+                    self.errors[name] = repr(exc)
+                    self._logger.warning("warmup phase failed", phase=name, exc_info=exc)
+                duration_ms = round((perf_counter() - phase_started) * 1000, 1)
+                self.phase_ms[name] = duration_ms
+                self._logger.info(
+                    "warmup phase finished",
+                    phase=name,
+                    duration_ms=duration_ms,
+                    ok=name not in self.errors,
+                )
+        finally:
+            self.done = True
+        self._logger.info(
+            "warmup complete",
+            duration_ms=round((perf_counter() - started) * 1000, 1),
+            phases_ms=self.phase_ms,
+            failed=sorted(self.errors),
+        )
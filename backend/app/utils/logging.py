@@ -1,17 +1,201 @@
-"""Structured logging setup."""
+"""Structured logging setup.
 
+Log calls only build the event and put it on a bounded queue; a background thread
+renders it to JSON and writes it, so a slow stderr never blocks the event
+loop. When the queue is full records are dropped (and counted) instead of waiting.
+
+Hot-path events opt into throttling with a ``throttle`` key::
+
+    logger.warning("pgvector fallback", reason="no_db_session", throttle=True)
+
+At most one such event per level, message and ``throttle`` value is written every
+``throttle_seconds``; the next one written carries ``suppressed=<count>``.
+"""
+
+from __future__ import annotations
+
+import atexit
 import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Hashable, TextIO, Tuple
 
+import orjson
 import structlog
 
+from app.utils.metrics import LOG_RECORDS_DROPPED
+
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_THROTTLE_SECONDS = 10.0
+# Loggers uvicorn configures with their own synchronous handlers.
+_ROUTED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: _Listener | None = None
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    *,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    throttle_seconds: float = DEFAULT_THROTTLE_SECONDS,
+    stream: TextIO | None = None,
+) -> None:
+    """Route structlog and stdlib logging through a queue to a writer thread."""
+
+    global _listener
+    stop_logging()
 
-def configure_logging(level: int = logging.INFO) -> None:
-    logging.basicConfig(level=level)
+    records: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=[
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.add_logger_name,
+                structlog.processors.TimeStamper(fmt="iso"),
+            ],
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.format_exc_info,
+                structlog.processors.JSONRenderer(serializer=_dumps),
+            ],
+        )
+    )
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_NonBlockingQueueHandler(records))
+    root.setLevel(level)
+    for name in _ROUTED_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = True
+
+    # structlog events skip stdlib logging (LogRecord creation, caller lookup) and go
+    # onto the queue as plain event dicts.
+    queue_logger = _QueueLogger(records)
     structlog.configure(
         processors=[
             structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.JSONRenderer(),
+            EventThrottle(throttle_seconds),
+            _capture_exc_info,
         ],
+        logger_factory=lambda *_: queue_logger,
         wrapper_class=structlog.make_filtering_bound_logger(level),
     )
+
+    _listener = _Listener(records, writer)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the writer thread."""
+
+    global _listener
+    if _listener is not None:
+        # StreamHandler flushes after every record, so the stream may already be closed here.
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class EventThrottle:
+    """structlog processor that drops repeats of events logged with ``throttle``."""
+
+    def __init__(
+        self,
+        interval_seconds: float = DEFAULT_THROTTLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._interval = interval_seconds
+        self._clock = clock
+        # key -> (time the last one was written, repeats dropped since)
+        self._state: Dict[Tuple[Hashable, ...], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict) -> dict:
+        throttle = event_dict.pop("throttle", None)
+        if not throttle or self._interval <= 0:
+            return event_dict
+        key = (method_name, event_dict.get("event"), throttle)
+        now = self._clock()
+        with self._lock:
+            written_at, suppressed = self._state.get(key, (None, 0))
+            if written_at is not None and now - written_at < self._interval:
+                self._state[key] = (written_at, suppressed + 1)
+                LOG_RECORDS_DROPPED.labels(reason="throttled").inc()
+                raise structlog.DropEvent
+            self._state[key] = (now, 0)
+        if suppressed:
+            event_dict["suppressed"] = suppressed
+        return event_dict
+
+
+class _QueueLogger:
+    """structlog logger that hands the unrendered event dict to the writer thread."""
+
+    __slots__ = ("_queue",)
+
+    def __init__(self, records: queue.Queue) -> None:
+        self._queue = records
+
+    def msg(self, **event_dict: Any) -> None:
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+    debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+class _Listener(QueueListener):
+    def handle(self, record: logging.LogRecord | dict) -> None:
+        if isinstance(record, dict):
+            # The attributes ProcessorFormatter expects on records from structlog.
+            record = logging.makeLogRecord(
+                {"msg": record, "_logger": None, "_name": record.get("level", "info")}
+            )
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when stopping with a full queue.
+        self.queue.put(self._sentinel)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the writer thread; only bind the message arguments
+        # here so later mutation of them can't change the line.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+def _capture_exc_info(logger: Any, method_name: str, event_dict: dict) -> dict:
+    # exc_info=True means "the exception being handled", which only the caller knows.
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _dumps(event_dict: dict, default: Callable[[Any], Any] | None = None, **_: Any) -> str:
+    return orjson.dumps(
+        event_dict,
+        default=default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    ).decode("utf-8")
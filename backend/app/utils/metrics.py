@@ -0,0 +1,132 @@
+"""Prometheus metrics shared across the app.
+
+With several uvicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory
+before start-up so every worker's samples are aggregated on each scrape.
+"""
+
+from __future__ import annotations
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+ANALYZE_STAGE_SECONDS = Histogram(
+    "pokedex_analyze_stage_seconds",
+    "Time spent in each /analyze stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+ANALYZE_REQUESTS = Counter(
+    "pokedex_analyze_requests_total",
+    "Completed /analyze requests by outcome",
+    ["outcome"],
+)
+ANALYZE_IN_FLIGHT = Gauge(
+    "pokedex_analyze_in_flight",
+    "/analyze requests currently being processed",
+    multiprocess_mode="livesum",
+)
+ANALYZE_COALESCED = Counter(
+    "pokedex_analyze_coalesced_total",
+    "/analyze requests answered by joining an identical in-flight analysis",
+)
+INFERENCE_ACTIVE = Gauge(
+    "pokedex_inference_active",
+    "Analyses currently holding an inference slot",
+    multiprocess_mode="livesum",
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "pokedex_inference_queue_depth",
+    "Analyses waiting for an inference slot",
+    multiprocess_mode="livesum",
+)
+INFERENCE_SHED = Counter(
+    "pokedex_inference_shed_total",
+    "Analyses rejected with 503 by admission control",
+    ["reason"],
+)
+BULK_IMAGES = Counter(
+    "pokedex_bulk_images_total",
+    "Images processed by bulk analysis jobs by outcome",
+    ["outcome"],
+)
+CATALOG_CACHE = Counter(
+    "pokedex_catalog_cache_total",
+    "Repository catalog loads served from the process catalog (hit) or a source (miss)",
+    ["result"],
+)
+SEARCH_FALLBACKS = Counter(
+    "pokedex_search_fallback_total",
+    "Similarity searches answered by the in-memory matcher instead of pgvector",
+    ["reason"],
+)
+SIMILAR_FALLBACKS = Counter(
+    "pokedex_similar_fallback_total",
+    "Similar-Pokémon lookups answered by a vector search instead of the precomputed graph",
+)
+SHADOW_EVALUATIONS = Counter(
+    "pokedex_shadow_evaluations_total",
+    "Sampled analyses run through the candidate (shadow) model, by outcome",
+    ["outcome"],
+)
+SHADOW_STAGE_SECONDS = Histogram(
+    "pokedex_shadow_stage_seconds",
+    "Time the candidate (shadow) model spends in each stage of an evaluation",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+SHADOW_COMPARISONS = Counter(
+    "pokedex_shadow_comparisons_total",
+    "Shadow evaluations compared with the primary model's matches, by metric",
+    ["metric"],
+)
+SHADOW_AGREEMENT = Counter(
+    "pokedex_shadow_agreement_total",
+    "Summed agreement with the primary's matches (top1: same best match, top5: overlap / 5)",
+    ["metric"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "pokedex_log_records_dropped_total",
+    "Log records not written: repeats of throttled events, or a full log queue",
+    ["reason"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "pokedex_db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=POOL_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "pokedex_db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after pool_timeout",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "pokedex_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+
+
+def observe_stages(stages: dict[str, float]) -> None:
+    """Record a request's ``StageTimer.stages`` (milliseconds) in the stage histogram."""
+
+    for stage, duration_ms in stages.items():
+        ANALYZE_STAGE_SECONDS.labels(stage=stage).observe(duration_ms / 1000)
+
+
+def render_latest() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
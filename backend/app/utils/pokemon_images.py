@@ -2,11 +2,31 @@
 
 from __future__ import annotations
 
+import hashlib
+import re
+from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
+
+from PIL import Image, features
+
+from app.utils.files import write_atomic
 
 
 DEFAULT_IMAGE_DIR = Path(__file__).resolve().parent.parent / "data" / "pokemon_images"
+STATIC_IMAGE_PATH = "/static/pokemon"
+# Result cards render artwork at ~128 CSS px; 256 covers 2x displays.
+ARTWORK_VARIANT_WIDTH = 256
+# Formats this Pillow build cannot encode (AVIF needs Pillow 11.3+ built with libavif)
+# are skipped.
+ARTWORK_VARIANT_FORMATS = ("webp", "avif")
+_ENCODER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "webp": {"quality": 80, "method": 6},
+    "avif": {"quality": 60, "speed": 6},
+}
+# Bump when encoder options change so regenerated files get new names.
+_VARIANT_REVISION = "1"
+_VARIANT_NAME = re.compile(r"^\d+-\d+w\.[0-9a-f]{16}\.(?:webp|avif)$")
 
 
 def image_store_dir(root: Path | None = None) -> Path:
@@ -18,7 +38,17 @@ def local_image_path(pokemon_id: int, *, root: Path | None = None) -> Path:
 
 
 def local_image_url(pokemon_id: int) -> str:
-    return f"/static/pokemon/{pokemon_id}.png"
+    return f"{STATIC_IMAGE_PATH}/{pokemon_id}.png"
+
+
+def artwork_url(filename: str, *, base_url: str = STATIC_IMAGE_PATH) -> str:
+    return f"{base_url.rstrip('/')}/{filename}"
+
+
+def is_artwork_variant(filename: str) -> bool:
+    """True for content-hashed variant names, which never change once written."""
+
+    return _VARIANT_NAME.match(filename) is not None
 
 
 def persist_image_bytes(
@@ -33,6 +63,49 @@ def persist_image_bytes(
     return target
 
 
+def write_artwork_variants(
+    image_data: bytes,
+    pokemon_id: int,
+    *,
+    root: Path | None = None,
+    width: int = ARTWORK_VARIANT_WIDTH,
+    formats: Sequence[str] = ARTWORK_VARIANT_FORMATS,
+) -> Dict[str, Path]:
+    """Write resized copies of ``image_data`` named after a hash of the source.
+
+    Every format shares one name stem (``25-256w.<hash>``), so the static mount can
+    swap ``.webp`` for ``.avif`` when the client accepts it. Existing files are kept:
+    the same name always means the same bytes. Formats the installed Pillow cannot
+    encode are left out of the result.
+    """
+
+    digest = hashlib.blake2b(
+        image_data, digest_size=8, person=f"w{width}r{_VARIANT_REVISION}".encode()
+    ).hexdigest()
+    directory = image_store_dir(root)
+    directory.mkdir(parents=True, exist_ok=True)
+    targets = {
+        fmt: directory / f"{pokemon_id}-{width}w.{digest}.{fmt}"
+        for fmt in formats
+        if features.check(fmt)
+    }
+    if all(target.exists() for target in targets.values()):
+        return targets
+
+    with Image.open(BytesIO(image_data)) as source:
+        source.load()
+        has_alpha = source.mode in ("RGBA", "LA", "PA") or "transparency" in source.info
+        image = source.convert("RGBA" if has_alpha else "RGB")
+    image.thumbnail((width, width), Image.Resampling.LANCZOS)
+    for fmt, target in targets.items():
+        if target.exists():
+            continue
+        buffer = BytesIO()
+        image.save(buffer, format=fmt.upper(), **_ENCODER_OPTIONS.get(fmt, {}))
+        write_atomic(target, buffer.getvalue())
+    return targets
+
+
 def sprite_fallback_url(pokemon_id: int) -> str:
     """Return a reliable sprite URL for the given Pokémon id."""
     return (
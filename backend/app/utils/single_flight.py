@@ -0,0 +1,62 @@
+"""Deduplicate concurrent calls that would compute the same result."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _Call(Generic[T]):
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one ``work`` per key at a time; concurrent callers share its result.
+
+    The work runs in its own task, so a caller that is cancelled only stops waiting.
+    The work itself is cancelled once nobody is waiting for it any more. Results and
+    exceptions are shared by every caller that joined while the work was in flight;
+    nothing is cached after it finishes.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for callers that joined a leader."""
+
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _Call(asyncio.ensure_future(work()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if call.task.done() or call.task.cancelled():
+                raise
+            if not call.waiters:
+                call.task.cancel()
+            elif not shared:
+                # The leader's work may use resources scoped to the leader's request (its
+                # DB session, for one), so keep them alive until the others are served.
+                await asyncio.wait({call.task})
+            raise
+        call.waiters -= 1
+        return result, shared
+
+    def _forget(self, key: Hashable, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
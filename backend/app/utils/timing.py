@@ -0,0 +1,38 @@
+"""Per-request stage timing."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """Accumulate wall-clock durations (milliseconds) for named request stages."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (perf_counter() - start) * 1000)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.stages.values())
+
+    def server_timing(self) -> str:
+        """Render the stages as a ``Server-Timing`` header value."""
+
+        entries = [f"{name};dur={duration:.2f}" for name, duration in self.stages.items()]
+        entries.append(f"total;dur={self.total_ms:.2f}")
+        return ", ".join(entries)
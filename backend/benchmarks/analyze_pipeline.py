@@ -0,0 +1,382 @@
+"""Per-stage microbenchmarks for the /analyze pipeline.
+
+Runs fully offline. Example::
+
+    poetry run python -m benchmarks.analyze_pipeline --save benchmarks/baseline.json
+    poetry run python -m benchmarks.analyze_pipeline --baseline benchmarks/baseline.json
+
+The second form exits non-zero when any stage regresses by more than
+``--max-regression`` (relative, on ``--metric``) against the saved baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from app.models import AnalysisResult, MatchResult
+from app.services.analysis_rendering import render_analysis
+from app.services.ann_index import IvfIndex
+from app.services.image_processor import ImageProcessor
+from app.services.pokemon_matcher import PokemonMatcher
+from benchmarks.fixtures import (
+    IMAGE_FORMATS,
+    clustered_embeddings,
+    install_tiny_model,
+    make_image,
+    synthetic_catalog,
+    synthetic_embeddings,
+)
+
+RESULT_SCHEMA_VERSION = 1
+DEFAULT_CATALOG_SIZES = (151, 1_000, 10_000, 100_000)
+DEFAULT_IMAGE_SIZES = (256, 1024, 4032)
+DEFAULT_ANN_CATALOG_SIZES = (10_000, 100_000)
+DEFAULT_NPROBES = (4, 8, 32)
+
+
+def measure(
+    func: Callable[[], object],
+    *,
+    iterations: int,
+    warmup: int,
+    track_allocations: bool = True,
+) -> Dict[str, float]:
+    """Time ``func`` and summarize the latency distribution in milliseconds.
+
+    Allocation figures come from one extra traced call, so tracing never skews timings.
+    They cover Python-level allocations only (torch and numpy buffers from C are not seen).
+    """
+
+    for _ in range(warmup):
+        func()
+
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = perf_counter()
+            func()
+            samples.append((perf_counter() - start) * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    summary = summarize(samples)
+    if track_allocations:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        summary["alloc_peak_kib"] = round(peak / 1024, 1)
+    return summary
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+
+    return {
+        "samples": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "min_ms": round(ordered[0], 4),
+        "p50_ms": round(percentile(0.50), 4),
+        "p95_ms": round(percentile(0.95), 4),
+        "p99_ms": round(percentile(0.99), 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def run_image_stages(
+    processor: ImageProcessor,
+    *,
+    image_sizes: List[int],
+    formats: List[str],
+    iterations: int,
+    warmup: int,
+) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for size in image_sizes:
+        for fmt in formats:
+            payload, mime_type = make_image(size, fmt)
+            label = f"{fmt}-{size}"
+            results[f"validate_image[{label}]"] = measure(
+                lambda: processor.validate_image(payload, mime_type),
+                iterations=iterations,
+                warmup=warmup,
+            )
+            results[f"resize_image[{label}]"] = measure(
+                lambda: processor.resize_image(payload), iterations=iterations, warmup=warmup
+            )
+
+    resized = processor.resize_image(make_image(image_sizes[0], formats[0])[0])
+    results["extract_embedding"] = measure(
+        lambda: processor.extract_embedding(resized), iterations=iterations, warmup=warmup
+    )
+    return results
+
+
+def run_catalog_stages(
+    *,
+    catalog_sizes: List[int],
+    iterations: int,
+    warmup: int,
+    top_n: int = 5,
+) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    query = synthetic_embeddings(1, seed=1)[0].tolist()
+    for size in catalog_sizes:
+        embeddings = synthetic_embeddings(size)
+        matcher = PokemonMatcher(synthetic_catalog(embeddings), embeddings)
+        results[f"find_best_matches[{size}]"] = measure(
+            lambda: matcher.find_best_matches(query, top_n=top_n),
+            iterations=iterations,
+            warmup=warmup,
+        )
+        if size == catalog_sizes[0]:
+            matches = matcher.find_best_matches(query, top_n=top_n)
+            for label, include_embeddings in (("", False), ("[embeddings]", True)):
+                stats = measure(
+                    lambda: _serialize(matches, include_embeddings),
+                    iterations=iterations,
+                    warmup=warmup,
+                )
+                stats["bytes"] = len(_serialize(matches, include_embeddings))
+                results[f"serialize_analysis_result{label}"] = stats
+    return results
+
+
+def run_ann_stages(
+    *,
+    catalog_sizes: List[int],
+    nprobes: List[int],
+    iterations: int,
+    warmup: int,
+    top_n: int = 5,
+    recall_queries: int = 100,
+) -> Dict[str, Dict[str, float]]:
+    """Exact scan vs IVF search on clustered data, with recall@top_n per ``nprobe``."""
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in catalog_sizes:
+        embeddings = clustered_embeddings(size)
+        catalog = synthetic_catalog(embeddings)
+        exact = PokemonMatcher(catalog, embeddings)
+        index = IvfIndex.build(embeddings)
+        rng = np.random.default_rng(2)
+        queries = embeddings[rng.choice(size, size=recall_queries, replace=False)]
+        queries = queries + 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+        truth = [
+            {match.pokemon.id for match in exact.find_best_matches(query, top_n)}
+            for query in queries
+        ]
+        results[f"exact_scan[{size}]"] = measure(
+            lambda: exact.find_best_matches(queries[0], top_n),
+            iterations=iterations,
+            warmup=warmup,
+        )
+        for nprobe in nprobes:
+            index.nprobe = nprobe
+            approximate = PokemonMatcher(catalog, embeddings, index)
+            found = [
+                {match.pokemon.id for match in approximate.find_best_matches(query, top_n)}
+                for query in queries
+            ]
+            stats = measure(
+                lambda: approximate.find_best_matches(queries[0], top_n),
+                iterations=iterations,
+                warmup=warmup,
+            )
+            hits = sum(len(expected & got) for expected, got in zip(truth, found))
+            stats[f"recall_at_{top_n}"] = round(hits / (top_n * len(queries)), 4)
+            results[f"ivf_search[{size},nprobe={nprobe}]"] = stats
+    return results
+
+
+def _serialize(matches: List[MatchResult], include_embeddings: bool) -> bytes:
+    result = AnalysisResult(processing_time_ms=1)
+    return render_analysis(
+        result,
+        [(match.pokemon, match.similarity_score) for match in matches],
+        include_embeddings=include_embeddings,
+    )
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "torch_threads": str(torch.get_num_threads()),
+    }
+
+
+def compare_to_baseline(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    *,
+    metric: str,
+    max_regression: float,
+    higher_is_better: bool = False,
+) -> List[str]:
+    """Return human-readable regressions of ``metric`` beyond ``max_regression``.
+
+    Metrics are latencies by default; pass ``higher_is_better`` for throughputs.
+    """
+
+    regressions = []
+    for name, stats in sorted(current.items()):
+        reference = baseline.get(name, {}).get(metric)
+        value = stats.get(metric)
+        if not reference or value is None:
+            continue
+        change = (value - reference) / reference
+        if (-change if higher_is_better else change) > max_regression:
+            regressions.append(
+                f"{name}: {metric} {reference:.4f} -> {value:.4f} ({change:+.1%})"
+            )
+    return regressions
+
+
+def _csv(value: str, cast: Callable[[str], object] = str) -> List:
+    return [cast(part.strip()) for part in value.split(",") if part.strip()]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analyze pipeline stage by stage")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--model", choices=("tiny", "clip"), default="tiny")
+    parser.add_argument(
+        "--image-sizes",
+        type=lambda value: _csv(value, int),
+        default=list(DEFAULT_IMAGE_SIZES),
+        help="Comma-separated square image edge lengths in pixels",
+    )
+    parser.add_argument(
+        "--formats",
+        type=_csv,
+        default=list(IMAGE_FORMATS),
+        help=f"Comma-separated subset of {', '.join(IMAGE_FORMATS)}",
+    )
+    parser.add_argument(
+        "--catalog-sizes",
+        type=lambda value: _csv(value, int),
+        default=list(DEFAULT_CATALOG_SIZES),
+    )
+    parser.add_argument(
+        "--ann-catalog-sizes",
+        type=lambda value: _csv(value, int),
+        default=list(DEFAULT_ANN_CATALOG_SIZES),
+        help="Catalog sizes for the IVF index comparison (empty string skips it)",
+    )
+    parser.add_argument(
+        "--nprobes",
+        type=lambda value: _csv(value, int),
+        default=list(DEFAULT_NPROBES),
+        help="Comma-separated IVF lists-per-query settings to compare",
+    )
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare against this saved JSON file")
+    parser.add_argument("--metric", default="p50_ms", help="Statistic compared to the baseline")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.20,
+        help="Allowed relative slowdown before failing (0.20 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.model == "tiny":
+        install_tiny_model()
+    processor = ImageProcessor()
+
+    results: Dict[str, Dict[str, float]] = {}
+    results.update(
+        run_image_stages(
+            processor,
+            image_sizes=args.image_sizes,
+            formats=args.formats,
+            iterations=args.iterations,
+            warmup=args.warmup,
+        )
+    )
+    results.update(
+        run_catalog_stages(
+            catalog_sizes=args.catalog_sizes,
+            iterations=args.iterations,
+            warmup=args.warmup,
+        )
+    )
+    if args.ann_catalog_sizes:
+        results.update(
+            run_ann_stages(
+                catalog_sizes=args.ann_catalog_sizes,
+                nprobes=args.nprobes,
+                iterations=args.iterations,
+                warmup=args.warmup,
+            )
+        )
+
+    report = {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "model": args.model,
+        "environment": environment(),
+        "results": results,
+    }
+    for name, stats in results.items():
+        recall = "".join(
+            f"  {key} {value:.3f}" for key, value in stats.items() if key.startswith("recall")
+        )
+        if "bytes" in stats:
+            recall += f"  {stats['bytes']} bytes"
+        print(
+            f"{name:<40} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  "
+            f"p99 {stats['p99_ms']:>10.3f} ms  peak {stats.get('alloc_peak_kib', 0):>10.1f} KiB"
+            f"{recall}"
+        )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(
+            results,
+            baseline.get("results", {}),
+            metric=args.metric,
+            max_regression=args.max_regression,
+        )
+        if regressions:
+            print("Regressions beyond threshold:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No {args.metric} regressions beyond {args.max_regression:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Memory held by a loaded catalog: per-entry ``Pokemon`` objects vs ``CatalogStore``.
+
+Each variant parses the same snapshot metadata JSON and builds its representation
+over the same float32 embedding matrix::
+
+    poetry run python -m benchmarks.catalog_memory
+    poetry run python -m benchmarks.catalog_memory --sizes 10000,100000 --save memory.json
+
+Variants:
+
+* ``pokemon_lists``: ``Pokemon`` objects with list-of-float embeddings, what a
+  repository holds when it cannot map a shared snapshot
+* ``pokemon_row_views``: ``Pokemon`` objects whose embeddings are row views into one
+  matrix, what snapshots loaded into before the columnar store
+* ``columnar``: ``CatalogStore``
+
+Rows report retained bytes (tracemalloc, so numpy buffers are included), bytes per
+entry with and without the float32 embeddings, GC-tracked objects added, how much longer a full ``gc.collect()`` takes while
+the catalog is alive, and the cost of resolving a Pokémon by id.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.models import Pokemon, PokemonStats
+from app.services.catalog_store import ROW_FIELDS, CatalogStore
+from benchmarks.fixtures import clustered_embeddings, synthetic_pokedex
+
+DEFAULT_SIZES = (10_000,)
+DESCRIPTION = (
+    "It is said to roam the tall grass near {name}'s home range, and trainers who meet "
+    "it at dusk report that it never flees."
+)
+
+
+def snapshot_metadata(size: int) -> bytes:
+    """Snapshot-style metadata rows for a synthetic catalog of ``size`` entries."""
+
+    rows = []
+    for pokemon in synthetic_pokedex(size):
+        stats = pokemon.stats
+        rows.append(
+            [
+                pokemon.id,
+                pokemon.name,
+                pokemon.types,
+                DESCRIPTION.format(name=pokemon.name),
+                f"/static/pokemon/{pokemon.id}-256w.0123456789abcdef.webp",
+                pokemon.genus,
+                pokemon.generation,
+                pokemon.height,
+                pokemon.weight,
+                pokemon.abilities,
+                [
+                    stats.hp,
+                    stats.attack,
+                    stats.defense,
+                    stats.special_attack,
+                    stats.special_defense,
+                    stats.speed,
+                ],
+                1,
+            ]
+        )
+    return json.dumps({"fields": ROW_FIELDS, "rows": rows}).encode("utf-8")
+
+
+def _objects(meta: bytes, matrix: np.ndarray, *, row_views: bool) -> Dict[int, Pokemon]:
+    parsed = json.loads(meta)
+    fields = parsed["fields"]
+    by_id = {}
+    for index, values in enumerate(parsed["rows"]):
+        row = dict(zip(fields, values))
+        by_id[row["id"]] = Pokemon(
+            id=row["id"],
+            name=row["name"],
+            types=row["types"],
+            description=row["description"],
+            image_url=row["image_url"],
+            genus=row["genus"],
+            generation=row["generation"],
+            height=row["height"],
+            weight=row["weight"],
+            abilities=row["abilities"],
+            stats=PokemonStats(*row["stats"]),
+            embedding=matrix[index] if row_views else matrix[index].tolist(),
+        )
+    return by_id
+
+
+def _columnar(meta: bytes, matrix: np.ndarray) -> CatalogStore:
+    parsed = json.loads(meta)
+    return CatalogStore.from_rows(parsed["fields"], parsed["rows"], matrix)
+
+
+def _collect_ms() -> float:
+    timings = []
+    for _ in range(7):
+        started = perf_counter()
+        gc.collect()
+        timings.append((perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def measure_variant(
+    build: Callable[[], object],
+    lookup: Callable[[object, int], object],
+    size: int,
+    embedding_bytes: int,
+) -> Dict[str, float]:
+    baseline_collect_ms = _collect_ms()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    try:
+        started = perf_counter()
+        catalog = build()
+        build_ms = (perf_counter() - started) * 1000
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    objects = len(gc.get_objects()) - objects_before
+
+    gc_added_ms = _collect_ms() - baseline_collect_ms
+
+    ids = np.random.default_rng(0).integers(1, size + 1, size=2_000).tolist()
+    started = perf_counter()
+    for pokemon_id in ids:
+        lookup(catalog, pokemon_id)
+    lookup_us = (perf_counter() - started) / len(ids) * 1e6
+    del catalog
+    return {
+        "entries": size,
+        "retained_mib": round(retained / 2**20, 2),
+        "peak_mib": round(peak / 2**20, 2),
+        "bytes_per_entry": round(retained / size),
+        "metadata_bytes_per_entry": round((retained - embedding_bytes) / size),
+        "gc_tracked_objects": objects,
+        "gc_collect_added_ms": round(gc_added_ms, 3),
+        "build_ms": round(build_ms, 1),
+        "lookup_us": round(lookup_us, 2),
+    }
+
+
+def run_memory_stages(size: int) -> Dict[str, Dict[str, float]]:
+    meta = snapshot_metadata(size)
+    template = clustered_embeddings(size)
+    results = {}
+    for name, build, lookup in (
+        (
+            "pokemon_lists",
+            lambda: _objects(meta, template.copy(), row_views=False),
+            lambda catalog, pokemon_id: catalog.get(pokemon_id),
+        ),
+        (
+            "pokemon_row_views",
+            lambda: _objects(meta, template.copy(), row_views=True),
+            lambda catalog, pokemon_id: catalog.get(pokemon_id),
+        ),
+        (
+            "columnar",
+            lambda: _columnar(meta, template.copy()),
+            lambda catalog, pokemon_id: catalog.get(pokemon_id),
+        ),
+    ):
+        results[f"{name}[{size}]"] = measure_variant(build, lookup, size, template.nbytes)
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Memory held by a loaded catalog")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated catalog sizes",
+    )
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in (int(value) for value in args.sizes.split(",") if value):
+        results.update(run_memory_stages(size))
+    for name, stats in results.items():
+        print(
+            f"{name:<28} {stats['retained_mib']:>9.2f} MiB  {stats['bytes_per_entry']:>7} B/entry "
+            f"({stats['metadata_bytes_per_entry']:>6} metadata)  "
+            f"{stats['gc_tracked_objects']:>8} objects  gc +{stats['gc_collect_added_ms']:>6.2f} ms  "
+            f"lookup {stats['lookup_us']:>6.2f} us"
+        )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({"results": results}, indent=2))
+        print(f"Saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
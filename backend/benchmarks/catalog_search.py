@@ -0,0 +1,142 @@
+"""Latency of ``/pokemon/search`` and ``/pokemon/suggest`` against the in-memory indexes.
+
+Times building each index and a fixed mix of queries for each catalog size::
+
+    poetry run python -m benchmarks.catalog_search
+    poetry run python -m benchmarks.catalog_search --sizes 1000,100000 --save search.json
+    poetry run python -m benchmarks.catalog_search --max-suggest-p99-us 500
+
+With ``--max-suggest-p99-us`` the command exits with status 1 when any suggest query's
+p99 exceeds that budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from app.models import Pokemon
+from app.services.catalog_search import CatalogSearchIndex, SearchQuery, StatRange
+from app.services.name_suggest import NameSuggestIndex
+from benchmarks.analyze_pipeline import measure
+from benchmarks.fixtures import synthetic_pokedex
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+QUERIES = {
+    "type": SearchQuery(types=("fire",)),
+    "type_pair": SearchQuery(types=("fire", "flying")),
+    "ability_any": SearchQuery(abilities=("Ability 1", "Ability 2", "Ability 3")),
+    "stat_range": SearchQuery(ranges=(StatRange("attack", 100, 150),)),
+    "combined_sorted": SearchQuery(
+        types=("water",),
+        generations=(1, 2, 3),
+        ranges=(StatRange("speed", low=80), StatRange("total", 400, 700)),
+        sort="attack",
+        descending=True,
+    ),
+    "sort_only_deep_page": SearchQuery(sort="name", offset=500, limit=50),
+}
+
+
+def suggest_queries(pokedex: List[Pokemon]) -> Dict[str, str]:
+    """Realistic autocomplete inputs drawn from the catalog itself."""
+
+    name = pokedex[len(pokedex) // 2].name.casefold()
+    middle = len(name) // 2
+    return {
+        "one_char": name[:1],
+        "short_prefix": name[:2],
+        "long_prefix": name[:6],
+        "exact": name,
+        "typo_swap": name[: middle - 1] + name[middle] + name[middle - 1] + name[middle + 1 :],
+        "typo_missing": name[:middle] + name[middle + 1 :],
+        "genus": pokedex[0].genus.split()[0].casefold(),
+        "no_match": "qxzvqxzv",
+    }
+
+
+def run_search_stages(size: int, *, iterations: int, warmup: int) -> Dict[str, Dict[str, float]]:
+    pokedex = synthetic_pokedex(size)
+    started = perf_counter()
+    index = CatalogSearchIndex(pokedex)
+    results: Dict[str, Dict[str, float]] = {
+        f"build_search[{size}]": {"build_ms": round((perf_counter() - started) * 1000, 3)}
+    }
+    for name, query in QUERIES.items():
+        stats = measure(
+            lambda query=query: index.search(query),
+            iterations=iterations,
+            warmup=warmup,
+            track_allocations=False,
+        )
+        stats["matches"] = index.search(query).total
+        results[f"search_{name}[{size}]"] = stats
+
+    started = perf_counter()
+    suggest_index = NameSuggestIndex(pokedex)
+    results[f"build_suggest[{size}]"] = {"build_ms": round((perf_counter() - started) * 1000, 3)}
+    for name, text in suggest_queries(pokedex).items():
+        stats = measure(
+            lambda text=text: suggest_index.suggest(text),
+            iterations=iterations,
+            warmup=warmup,
+            track_allocations=False,
+        )
+        stats["matches"] = len(suggest_index.suggest(text))
+        results[f"suggest_{name}[{size}]"] = stats
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="In-memory catalog search and suggest latency")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated catalog sizes",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--max-suggest-p99-us",
+        type=float,
+        help="Fail when any suggest query's p99 exceeds this many microseconds",
+    )
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in (int(value) for value in args.sizes.split(",") if value):
+        results.update(run_search_stages(size, iterations=args.iterations, warmup=args.warmup))
+    for name, stats in results.items():
+        if "build_ms" in stats:
+            print(f"{name:<36} build {stats['build_ms']:>10.1f} ms")
+        else:
+            print(
+                f"{name:<36} p50 {stats['p50_ms'] * 1000:>9.1f} us  "
+                f"p99 {stats['p99_ms'] * 1000:>9.1f} us  matches {stats['matches']}"
+            )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({"results": results}, indent=2))
+        print(f"Saved results to {args.save}")
+
+    if args.max_suggest_p99_us is not None:
+        over = [
+            f"{name}: p99 {stats['p99_ms'] * 1000:.1f} us"
+            for name, stats in results.items()
+            if name.startswith("suggest_") and stats["p99_ms"] * 1000 > args.max_suggest_p99_us
+        ]
+        if over:
+            print(f"Over the {args.max_suggest_p99_us:.0f} us suggest budget:")
+            for line in over:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
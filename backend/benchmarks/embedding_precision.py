@@ -0,0 +1,128 @@
+"""Compare reduced-precision embedding matrices against float32.
+
+Reports, per precision, how often the top match and the top-k set agree with the
+float32 results, how far similarity scores drift, matrix size and scan latency::
+
+    poetry run python -m benchmarks.embedding_precision --snapshot app/data/catalog.pkdx
+    poetry run python -m benchmarks.embedding_precision --size 100000 --save precision.json
+
+Queries are catalog embeddings plus Gaussian noise, which stands in for a photo of a
+known Pokémon.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.catalog_snapshot import load_snapshot
+from app.services.embedding_precision import PRECISIONS, dequantize, quantize
+from app.services.pokemon_matcher import PokemonMatcher
+from benchmarks.analyze_pipeline import measure
+from benchmarks.fixtures import clustered_embeddings, synthetic_catalog
+
+
+def compare_precisions(
+    embeddings: np.ndarray,
+    *,
+    precisions: List[str],
+    queries: int = 200,
+    noise: float = 0.1,
+    top_n: int = 5,
+    iterations: int = 20,
+    seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    catalog = synthetic_catalog(embeddings)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(embeddings.shape[0], size=min(queries, embeddings.shape[0]), replace=False)
+    query_matrix = embeddings[picks] + noise * rng.standard_normal(
+        (picks.size, embeddings.shape[1]), dtype=np.float32
+    )
+
+    reference = PokemonMatcher(catalog, embeddings)
+    expected = [reference.find_best_matches(query, top_n) for query in query_matrix]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for precision in precisions:
+        values, scales = quantize(embeddings, precision)
+        matcher = PokemonMatcher(catalog, values)
+        top1 = hits = 0
+        score_errors: List[float] = []
+        for query, truth in zip(query_matrix, expected):
+            found = matcher.find_best_matches(query, top_n)
+            top1 += found[0].pokemon.id == truth[0].pokemon.id
+            hits += len({m.pokemon.id for m in truth} & {m.pokemon.id for m in found})
+            score_errors.extend(
+                abs(a.similarity_score - b.similarity_score) for a, b in zip(truth, found)
+            )
+        stats = measure(
+            lambda: matcher.find_best_matches(query_matrix[0], top_n),
+            iterations=iterations,
+            warmup=2,
+            track_allocations=False,
+        )
+        reconstruction = np.abs(dequantize(values, scales) - embeddings)
+        stats.update(
+            {
+                "matrix_bytes": int(values.nbytes + (scales.nbytes if scales is not None else 0)),
+                "top1_agreement": round(top1 / len(expected), 4),
+                f"recall_at_{top_n}": round(hits / (top_n * len(expected)), 4),
+                "mean_score_error": round(float(np.mean(score_errors)), 6),
+                "max_score_error": round(float(np.max(score_errors)), 6),
+                "max_value_error": round(float(reconstruction.max()), 6),
+            }
+        )
+        results[precision] = stats
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Recall of float16/int8 embeddings vs float32")
+    parser.add_argument("--snapshot", type=Path, help="Use this catalog snapshot's embeddings")
+    parser.add_argument("--size", type=int, default=10_000, help="Synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        snapshot = load_snapshot(args.snapshot)
+        embeddings = dequantize(snapshot.embeddings, snapshot.scales)
+        source = str(args.snapshot)
+    else:
+        embeddings = clustered_embeddings(args.size)
+        source = f"synthetic-{args.size}"
+
+    results = compare_precisions(
+        embeddings,
+        precisions=list(PRECISIONS),
+        queries=args.queries,
+        noise=args.noise,
+        top_n=args.top_n,
+        iterations=args.iterations,
+    )
+    recall_key = f"recall_at_{args.top_n}"
+    for precision, stats in results.items():
+        print(
+            f"{precision:<8} {stats['matrix_bytes'] / 2**20:>9.2f} MiB  "
+            f"p50 {stats['p50_ms']:>8.3f} ms  top1 {stats['top1_agreement']:.4f}  "
+            f"{recall_key} {stats[recall_key]:.4f}  "
+            f"score err mean {stats['mean_score_error']:.5f} max {stats['max_score_error']:.5f}"
+        )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({"source": source, "results": results}, indent=2))
+        print(f"Saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
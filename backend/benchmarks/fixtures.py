@@ -0,0 +1,184 @@
+"""Deterministic inputs for benchmarks: images, synthetic catalogs and a tiny model."""
+
+from __future__ import annotations
+
+import io
+from typing import List
+
+import numpy as np
+import torch
+from PIL import Image
+
+from app.models import Pokemon, PokemonStats
+from app.services.image_processor import ImageProcessor
+
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+def make_image(size: int, fmt: str, *, seed: int = 0) -> tuple[bytes, str]:
+    """Return encoded image bytes and MIME type for a ``size`` x ``size`` photo-like image.
+
+    Smooth gradients plus noise keep the codecs honest: flat images compress to almost
+    nothing and decode unrealistically fast.
+    """
+
+    pil_format, mime_type = IMAGE_FORMATS[fmt]
+    rng = np.random.default_rng(seed)
+    axis = np.linspace(0, 255, size, dtype=np.float32)
+    base = np.stack(
+        [
+            axis[None, :].repeat(size, 0),
+            axis[:, None].repeat(size, 1),
+            np.full((size, size), 128.0, dtype=np.float32),
+        ],
+        axis=-1,
+    )
+    noisy = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(noisy, "RGB").save(buffer, format=pil_format, quality=90)
+    return buffer.getvalue(), mime_type
+
+
+def synthetic_embeddings(count: int, dimension: int = 512, *, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((count, dimension), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def clustered_embeddings(
+    count: int,
+    dimension: int = 512,
+    *,
+    clusters: int = 256,
+    spread: float = 0.35,
+    seed: int = 0,
+) -> np.ndarray:
+    """Unit vectors scattered around random centres, closer to real CLIP geometry.
+
+    Uniform random vectors are all nearly orthogonal, which makes every ANN index look
+    bad; artwork of the same species clusters instead.
+    """
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    noise = rng.standard_normal((count, dimension), dtype=np.float32)
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    matrix = centres[rng.integers(0, clusters, size=count)] + spread * noise
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def synthetic_catalog(embeddings: np.ndarray) -> List[Pokemon]:
+    types = ["normal", "fire", "water", "grass", "electric", "psychic", "ghost", "dragon"]
+    return [
+        Pokemon(
+            id=index + 1,
+            name=f"Synthetic-{index + 1}",
+            types=[types[index % len(types)]],
+            description="Synthetic benchmark entry.",
+            image_url=f"https://example.invalid/{index + 1}.png",
+            genus="Benchmark Pokémon",
+            generation=index % 9 + 1,
+            height=1.0,
+            weight=10.0,
+            abilities=["Overgrow"],
+            stats=PokemonStats(hp=45, attack=49, defense=49, special_attack=65, speed=45),
+            embedding=row,
+        )
+        for index, row in enumerate(embeddings)
+    ]
+
+
+_TYPES = (
+    "normal", "fire", "water", "grass", "electric", "ice", "fighting", "poison", "ground",
+    "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy",
+)
+_SYLLABLES = (
+    "pi", "ka", "chu", "char", "man", "der", "bul", "ba", "saur", "squir", "tle", "gy",
+    "ra", "dos", "la", "pras", "mew", "two", "zap", "mol", "tres", "eev", "ee", "jol",
+    "teon", "sny", "lax", "dra", "go", "nite", "lu", "gia", "ho", "oh", "cel", "bi",
+)
+
+
+def synthetic_pokedex(count: int, *, seed: int = 0) -> List[Pokemon]:
+    """Embedding-free entries with varied names, genera, types, abilities and stats.
+
+    Names are two to four random syllables with a numeric suffix on collisions, which
+    gives realistic prefix and trigram overlap at any catalog size.
+    """
+
+    rng = np.random.default_rng(seed)
+    abilities = [f"Ability {index}" for index in range(300)]
+    seen: set[str] = set()
+    pokedex = []
+    for index in range(count):
+        parts = rng.choice(len(_SYLLABLES), size=int(rng.integers(2, 5)))
+        name = "".join(_SYLLABLES[part] for part in parts).capitalize()
+        if name in seen:
+            name = f"{name}-{index + 1}"
+        seen.add(name)
+        stats = rng.integers(5, 255, size=6)
+        pokedex.append(
+            Pokemon(
+                id=index + 1,
+                name=name,
+                types=[
+                    _TYPES[t] for t in rng.choice(len(_TYPES), size=int(rng.integers(1, 3)), replace=False)
+                ],
+                genus=f"{_SYLLABLES[int(rng.integers(len(_SYLLABLES)))].capitalize()} Pokémon",
+                generation=int(rng.integers(1, 10)),
+                height=round(float(rng.uniform(0.1, 20)), 1),
+                weight=round(float(rng.uniform(0.1, 999)), 1),
+                abilities=[abilities[a] for a in rng.choice(300, size=2, replace=False)],
+                stats=PokemonStats(*(int(value) for value in stats)),
+            )
+        )
+    return pokedex
+
+
+class TinyClipModel(torch.nn.Module):
+    """Cheap stand-in exposing CLIP's ``get_image_features`` interface."""
+
+    def __init__(self, dimension: int = 512) -> None:
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = torch.nn.Conv2d(3, 32, kernel_size=8, stride=8)
+        self.proj = torch.nn.Linear(32, dimension)
+
+    def get_image_features(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        features = torch.relu(self.conv(pixel_values)).mean(dim=(2, 3))
+        return self.proj(features)
+
+
+def load_tiny_model(_model_name: str) -> TinyClipModel:
+    """``InferencePool`` model loader for the tiny model (ignores the model name)."""
+
+    return TinyClipModel().eval()
+
+
+class TinyClipProcessor:
+    """Minimal ``CLIPProcessor`` replacement: resize, scale and normalize to a tensor."""
+
+    _mean = np.array([0.4815, 0.4578, 0.4082], dtype=np.float32)
+    _std = np.array([0.2686, 0.2613, 0.2758], dtype=np.float32)
+
+    def __init__(self, size: int = 224) -> None:
+        self.size = size
+
+    def __call__(self, images: Image.Image, return_tensors: str = "pt") -> dict:
+        resized = images.convert("RGB").resize((self.size, self.size))
+        array = (np.asarray(resized, dtype=np.float32) / 255 - self._mean) / self._std
+        return {"pixel_values": torch.from_numpy(array.transpose(2, 0, 1)).unsqueeze(0)}
+
+
+def install_tiny_model() -> None:
+    """Make ``ImageProcessor`` use the tiny model instead of downloading CLIP weights."""
+
+    ImageProcessor._clip_model = TinyClipModel().eval()
+    ImageProcessor._clip_processor = TinyClipProcessor()
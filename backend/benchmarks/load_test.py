@@ -0,0 +1,556 @@
+"""End-to-end load test: many concurrent clients against the whole API.
+
+Drives ``create_app()`` in-process through httpx's ASGI transport (the default), or a
+running server over HTTP with ``--url``::
+
+    poetry run python -m benchmarks.load_test --concurrency 1,8,32 --duration 20
+    poetry run python -m benchmarks.load_test --url http://localhost:8000 --mix analyze=1
+    poetry run python -m benchmarks.load_test --save benchmarks/results/load.json \\
+        --baseline benchmarks/results/load-baseline.json
+
+In-process runs serve a synthetic catalog (``--catalog-size``) or an exported snapshot
+(``--snapshot``) from the in-memory repository, so no database is needed; the rate
+limiter is bypassed and ``--model tiny`` stands in for CLIP. Admission limits come from
+the usual ``INFERENCE_*`` settings. The load generator shares the process (and the GIL)
+with the app there, so absolute numbers are pessimistic: size nodes with ``--url``
+against a real deployment and use in-process runs to compare commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+import httpx
+
+from app.config import get_settings
+from benchmarks.analyze_pipeline import compare_to_baseline, environment, summarize
+from benchmarks.fixtures import IMAGE_FORMATS, make_image
+
+RESULT_SCHEMA_VERSION = 1
+REQUEST_KINDS = ("analyze", "get", "search", "suggest", "similar")
+DEFAULT_MIX = "analyze=6,get=1,search=1,suggest=2,similar=1"
+DEFAULT_CONCURRENCY = (1, 8, 32)
+DEFAULT_IMAGE_SIZES = (512, 1024)
+IMAGE_SUFFIXES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+SEARCH_PARAMS = (
+    {"type": "fire"},
+    {"type": ["water", "flying"]},
+    {"stat": "attack:100..", "sort": "-attack"},
+    {"generation": [1, 2], "sort": "name", "limit": 20},
+    {"stat": ["speed:80..", "total:400..600"], "sort": "-speed"},
+)
+
+
+@dataclass(slots=True)
+class Sample:
+    kind: str
+    status: int
+    latency_ms: float
+    shed: bool = False
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+@dataclass(slots=True)
+class Workload:
+    """What the simulated clients send: an image corpus plus ids and names to look up."""
+
+    images: List[Tuple[str, bytes, str]]
+    ids: List[int]
+    names: List[str]
+    prefix: str = "/api/v1"
+    top_n: int = 5
+
+    def request(self, kind: str, rng: random.Random) -> Tuple[str, str, dict]:
+        """``(method, path, httpx keyword arguments)`` for one request of ``kind``."""
+
+        if kind == "analyze":
+            return (
+                "POST",
+                f"{self.prefix}/analyze/",
+                {"params": {"top_n": self.top_n}, "files": {"image": rng.choice(self.images)}},
+            )
+        if kind == "get":
+            return "GET", f"{self.prefix}/pokemon/{rng.choice(self.ids)}", {}
+        if kind == "search":
+            return "GET", f"{self.prefix}/pokemon/search", {"params": rng.choice(SEARCH_PARAMS)}
+        if kind == "suggest":
+            return (
+                "GET",
+                f"{self.prefix}/pokemon/suggest",
+                {"params": {"q": _typed(rng, self.names)}},
+            )
+        if kind == "similar":
+            return "GET", f"{self.prefix}/pokemon/{rng.choice(self.ids)}/similar", {}
+        raise ValueError(f"Unknown request kind {kind!r}")
+
+
+def _typed(rng: random.Random, names: List[str]) -> str:
+    """What someone has typed so far: a prefix of a name, sometimes with a swapped pair."""
+
+    name = rng.choice(names).casefold()
+    typed = name[: rng.randint(1, max(1, min(len(name), 8)))]
+    if len(typed) >= 5 and rng.random() < 0.25:
+        index = rng.randrange(1, len(typed) - 1)
+        typed = typed[:index] + typed[index + 1] + typed[index] + typed[index + 2 :]
+    return typed
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """``"analyze=6,suggest=2"`` -> request kind weights."""
+
+    mix: Dict[str, float] = {}
+    for part in (part.strip() for part in value.split(",")):
+        if not part:
+            continue
+        kind, _, weight = part.partition("=")
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}; expected one of {REQUEST_KINDS}")
+        mix[kind] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The request mix needs at least one positive weight")
+    return mix
+
+
+def parse_server_timing(header: str | None) -> Dict[str, float]:
+    """Stage durations from a ``Server-Timing`` header, without the ``total`` entry."""
+
+    stages: Dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if not name or name == "total":
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                stages[name] = float(value)
+    return stages
+
+
+def load_images(directory: Path) -> List[Tuple[str, bytes, str]]:
+    images = [
+        (path.name, path.read_bytes(), IMAGE_SUFFIXES[path.suffix.lower()])
+        for path in sorted(directory.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+    if not images:
+        raise ValueError(f"No {'/'.join(IMAGE_SUFFIXES)} images in {directory}")
+    return images
+
+
+def generated_images(sizes: List[int], per_format: int) -> List[Tuple[str, bytes, str]]:
+    """Distinct photo-like uploads; distinct bytes keep single-flight from merging them."""
+
+    images = []
+    for size in sizes:
+        for fmt in IMAGE_FORMATS:
+            for seed in range(per_format):
+                payload, mime_type = make_image(size, fmt, seed=seed)
+                images.append((f"{size}-{seed}.{fmt}", payload, mime_type))
+    return images
+
+
+async def discover(
+    client: httpx.AsyncClient, prefix: str, limit: int = 500
+) -> Tuple[List[int], List[str]]:
+    """Ids and names to request, read through the API itself so any target works."""
+
+    response = await client.get(f"{prefix}/pokemon/search", params={"limit": limit})
+    response.raise_for_status()
+    results = response.json()["results"]
+    if not results:
+        raise RuntimeError("The target catalog is empty")
+    return [entry["id"] for entry in results], [entry["name"] for entry in results]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    mix: Dict[str, float],
+    *,
+    concurrency: int,
+    duration: float,
+    requests: int | None = None,
+    seed: int = 0,
+) -> Tuple[List[Sample], float]:
+    """``concurrency`` closed-loop clients for ``duration`` seconds (or ``requests`` in total).
+
+    Each client sends its next request as soon as the previous one completes, so the
+    offered load adapts to the server: overload shows up as latency and shedding.
+    """
+
+    kinds, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    budget = [requests]
+    deadline = perf_counter() + duration
+
+    async def client_loop(rng: random.Random) -> None:
+        while perf_counter() < deadline:
+            if budget[0] is not None:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+            kind = rng.choices(kinds, weights)[0]
+            samples.append(await send(client, kind, *workload.request(kind, rng)))
+
+    started = perf_counter()
+    await asyncio.gather(
+        *(client_loop(random.Random(seed * 10_007 + n)) for n in range(concurrency))
+    )
+    return samples, perf_counter() - started
+
+
+async def send(
+    client: httpx.AsyncClient, kind: str, method: str, path: str, kwargs: dict
+) -> Sample:
+    started = perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        return Sample(kind, 0, (perf_counter() - started) * 1000)
+    latency_ms = (perf_counter() - started) * 1000
+    # Admission control answers 503 with Retry-After; the rate limiter answers 429.
+    shed = response.status_code == 429 or (
+        response.status_code == 503 and "retry-after" in response.headers
+    )
+    stages = (
+        parse_server_timing(response.headers.get("server-timing")) if response.is_success else {}
+    )
+    return Sample(kind, response.status_code, latency_ms, shed, stages)
+
+
+def summarize_level(samples: List[Sample], elapsed: float, concurrency: int) -> Dict[str, dict]:
+    """Per request kind (and ``all``): throughput, latency, error and shed rates, stages.
+
+    Latency percentiles cover successful requests only; a fast 503 is not a fast answer.
+    """
+
+    groups: Dict[str, List[Sample]] = {"all": samples}
+    for sample in samples:
+        groups.setdefault(sample.kind, []).append(sample)
+    results: Dict[str, dict] = {}
+    for kind, group in groups.items():
+        succeeded = [sample for sample in group if sample.ok]
+        shed = sum(sample.shed for sample in group)
+        stats = summarize([sample.latency_ms for sample in succeeded or group])
+        stats.update(
+            requests=len(group),
+            throughput_rps=round(len(succeeded) / elapsed, 2) if elapsed else 0.0,
+            error_rate=round((len(group) - len(succeeded) - shed) / len(group), 4),
+            shed_rate=round(shed / len(group), 4),
+            status_codes={
+                str(code): count for code, count in sorted(Counter(s.status for s in group).items())
+            },
+        )
+        stages = _stage_summary(succeeded) if kind != "all" else {}
+        if stages:
+            stats["stages"] = stages
+        results[f"{kind}[c={concurrency}]"] = stats
+    return results
+
+
+def _stage_summary(samples: List[Sample]) -> Dict[str, Dict[str, float]]:
+    durations: Dict[str, List[float]] = {}
+    for sample in samples:
+        for stage, duration in sample.stages.items():
+            durations.setdefault(stage, []).append(duration)
+    summary = {}
+    for stage, values in durations.items():
+        stats = summarize(values)
+        summary[stage] = {key: stats[key] for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")}
+    return summary
+
+
+def synthetic_snapshot(directory: Path, size: int) -> Path:
+    """A snapshot (plus graph and, when large enough, ANN sidecars) of ``size`` entries."""
+
+    from app.services.catalog_snapshot import embedding_matrix, write_ann_index, write_snapshot
+    from app.services.similarity_graph import SimilarityGraph, similarity_graph_path
+    from benchmarks.fixtures import clustered_embeddings, synthetic_pokedex
+
+    settings = get_settings()
+    version = f"loadtest-{size}"
+    embeddings = clustered_embeddings(size)
+    pokedex = [
+        replace(entry, embedding=vector)
+        for entry, vector in zip(synthetic_pokedex(size), embeddings)
+    ]
+    path = directory / "catalog.pkdx"
+    matrix, mask = embedding_matrix(pokedex)
+    SimilarityGraph.build(
+        [entry.id for entry in pokedex],
+        matrix,
+        mask=mask,
+        k=settings.similar_pokemon_k,
+        catalog_version=version,
+    ).save(similarity_graph_path(path))
+    if size >= settings.ann_min_catalog_size:
+        write_ann_index(path, matrix, mask, catalog_version=version)
+    return write_snapshot(path, pokedex, catalog_version=version)
+
+
+async def in_process_client(
+    stack: AsyncExitStack, snapshot: Path, *, model: str, inference_workers: int
+) -> httpx.AsyncClient:
+    """``create_app()`` backed by the in-memory repository, behind an ASGI transport.
+
+    The lifespan is not run (it would reach for Postgres); the inference pool it would
+    start is started here instead when ``inference_workers`` is set.
+    """
+
+    from app.api.middleware.rate_limiter import enforce_rate_limit
+    from app.dependencies import get_inference_pool, get_pokedex_repository
+    from app.repositories.pokedex_repository import PokedexRepository
+    from app.services.inference_pool import InferencePool
+    from benchmarks.fixtures import install_tiny_model, load_tiny_model
+
+    settings = get_settings()
+    if model == "tiny":
+        install_tiny_model()
+    # Imported late: the analyze routes load the model at import time.
+    from app.main import create_app
+
+    pool = None
+    if inference_workers > 0:
+        loader = {"model_loader": load_tiny_model} if model == "tiny" else {}
+        pool = InferencePool(
+            inference_workers, settings.inference_torch_threads, settings.clip_model_name, **loader
+        )
+        pool.start()
+        stack.callback(pool.close)
+
+    async def repository() -> PokedexRepository:
+        # One per request, as in production; they all share the process-wide mapping.
+        return PokedexRepository(snapshot_path=snapshot)
+
+    async def no_rate_limit() -> None:
+        return None
+
+    app = create_app()
+    # create_app configures INFO logging, under which httpx logs every request we send.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[get_pokedex_repository] = repository
+    app.dependency_overrides[enforce_rate_limit] = no_rate_limit
+    app.dependency_overrides[get_inference_pool] = lambda: pool
+    # Unhandled exceptions become 500s, as a server would send, instead of aborting the run.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return await stack.enter_async_context(
+        httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+    )
+
+
+def git_revision() -> str | None:
+    """``HEAD``'s short hash, suffixed ``-dirty`` with uncommitted changes."""
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+async def run(args: argparse.Namespace) -> Dict[str, dict]:
+    mix = parse_mix(args.mix)
+    settings = get_settings()
+    images = (
+        load_images(args.images)
+        if args.images
+        else generated_images(args.image_sizes, args.images_per_format)
+    )
+    results: Dict[str, dict] = {}
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(
+                    base_url=args.url,
+                    timeout=args.timeout,
+                    limits=httpx.Limits(max_connections=max(args.concurrency)),
+                )
+            )
+        else:
+            snapshot = args.snapshot
+            if snapshot is None:
+                directory = Path(
+                    stack.enter_context(tempfile.TemporaryDirectory(prefix="pokedex-load-"))
+                )
+                snapshot = synthetic_snapshot(directory, args.catalog_size)
+            client = await in_process_client(
+                stack, snapshot, model=args.model, inference_workers=args.inference_workers
+            )
+        ids, names = await discover(client, settings.api_prefix)
+        workload = Workload(images, ids, names, prefix=settings.api_prefix, top_n=args.top_n)
+        if args.warmup:
+            await run_level(
+                client, workload, mix, concurrency=1, duration=args.warmup, seed=args.seed
+            )
+        for concurrency in args.concurrency:
+            samples, elapsed = await run_level(
+                client,
+                workload,
+                mix,
+                concurrency=concurrency,
+                duration=args.duration,
+                requests=args.requests,
+                seed=args.seed,
+            )
+            results.update(summarize_level(samples, elapsed, concurrency))
+    return results
+
+
+def _csv_ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test of the API")
+    target = parser.add_argument_group("target")
+    target.add_argument("--url", help="Load a running server instead of an in-process app")
+    target.add_argument(
+        "--timeout", type=float, default=30.0, help="Per-request timeout with --url"
+    )
+    target.add_argument("--snapshot", type=Path, help="In-process: serve this catalog snapshot")
+    target.add_argument(
+        "--catalog-size",
+        type=int,
+        default=1_000,
+        help="In-process: synthetic catalog size without --snapshot",
+    )
+    target.add_argument(
+        "--model", choices=("tiny", "clip"), default="tiny", help="In-process embedding model"
+    )
+    target.add_argument(
+        "--inference-workers",
+        type=int,
+        default=get_settings().inference_workers,
+        help="In-process: inference pool processes (0 runs inference in the event loop's threads)",
+    )
+    load = parser.add_argument_group("load")
+    load.add_argument(
+        "--concurrency",
+        type=_csv_ints,
+        default=list(DEFAULT_CONCURRENCY),
+        help="Comma-separated client counts",
+    )
+    load.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    load.add_argument("--requests", type=int, help="Stop each level after this many requests")
+    load.add_argument(
+        "--warmup", type=float, default=2.0, help="Seconds of single-client warmup (0 skips)"
+    )
+    load.add_argument(
+        "--mix", default=DEFAULT_MIX, help=f"Request kind weights, from {', '.join(REQUEST_KINDS)}"
+    )
+    load.add_argument("--top-n", type=int, default=5)
+    load.add_argument("--seed", type=int, default=0)
+    corpus = parser.add_argument_group("image corpus")
+    corpus.add_argument(
+        "--images", type=Path, help="Directory of JPEG/PNG/WebP uploads to cycle through"
+    )
+    corpus.add_argument(
+        "--image-sizes",
+        type=_csv_ints,
+        default=list(DEFAULT_IMAGE_SIZES),
+        help="Edge lengths of generated uploads without --images",
+    )
+    corpus.add_argument(
+        "--images-per-format", type=int, default=8, help="Generated uploads per size and format"
+    )
+    output = parser.add_argument_group("output")
+    output.add_argument("--save", type=Path, help="Write results to this JSON file")
+    output.add_argument("--baseline", type=Path, help="Compare against this saved JSON file")
+    output.add_argument(
+        "--metric", default="p95_ms", help="Latency statistic compared to the baseline"
+    )
+    output.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.20,
+        help="Allowed relative slowdown or throughput drop before failing (0.20 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    report = {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "target": args.url or "in-process",
+        "config": {
+            "mix": parse_mix(args.mix),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "model": None if args.url else args.model,
+            "catalog": None if args.url else str(args.snapshot or f"synthetic-{args.catalog_size}"),
+            "inference_workers": None if args.url else args.inference_workers,
+            "images": str(args.images) if args.images else f"generated {args.image_sizes}",
+        },
+        "environment": environment(),
+        "results": results,
+    }
+    for name, stats in results.items():
+        print(
+            f"{name:<20} {stats['throughput_rps']:>8.1f} req/s  p50 {stats['p50_ms']:>9.2f} ms  "
+            f"p95 {stats['p95_ms']:>9.2f} ms  p99 {stats['p99_ms']:>9.2f} ms  "
+            f"errors {stats['error_rate']:>6.1%}  shed {stats['shed_rate']:>6.1%}"
+        )
+        for stage, stage_stats in stats.get("stages", {}).items():
+            print(
+                f"    {stage:<16} mean {stage_stats['mean_ms']:>9.2f} ms  p95 {stage_stats['p95_ms']:>9.2f} ms"
+            )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text()).get("results", {})
+        regressions = compare_to_baseline(
+            results, baseline, metric=args.metric, max_regression=args.max_regression
+        ) + compare_to_baseline(
+            results,
+            baseline,
+            metric="throughput_rps",
+            max_regression=args.max_regression,
+            higher_is_better=True,
+        )
+        if regressions:
+            print("Regressions beyond threshold:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No {args.metric} or throughput regressions beyond {args.max_regression:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
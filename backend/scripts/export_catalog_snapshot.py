@@ -0,0 +1,194 @@
+"""Dump the Pokédex catalog to a binary snapshot for DB-less workers."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import sys
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from app.config import get_settings
+from app.database import SessionMaker
+from app.models.db import PokemonRecord
+from app.repositories.pokedex_repository import PokedexRepository
+from app.models import Pokemon
+from app.services.ann_index import ann_index_path
+from app.services.embedding_precision import PRECISIONS
+from app.services.similarity_graph import SimilarityGraph, similarity_graph_path
+from app.services.catalog_snapshot import (
+    DEFAULT_SNAPSHOT_PATH,
+    catalog_version_for,
+    embedding_matrix,
+    write_ann_index,
+    write_snapshot,
+)
+
+settings = get_settings()
+DEFAULT_SEED_PATH = ROOT / "app" / "data" / "pokemon_seed.json"
+
+
+def write_catalog(
+    output: Path,
+    pokemon: list[Pokemon],
+    *,
+    catalog_version: str,
+    model_version: str | None,
+    ann: bool | None,
+    precision: str,
+    similar: bool = True,
+) -> Path:
+    """Write the ANN and similar-Pokémon sidecars (when wanted) and then the snapshot
+    they belong to."""
+
+    if ann is None:
+        ann = len(pokemon) >= settings.ann_min_catalog_size
+    matrix, mask = embedding_matrix(pokemon) if ann or similar else (None, None)
+    if similar:
+        graph = SimilarityGraph.build(
+            [entry.id for entry in pokemon],
+            matrix,
+            mask=mask,
+            k=settings.similar_pokemon_k,
+            catalog_version=catalog_version,
+        )
+        graph_path = graph.save(similarity_graph_path(output))
+        print(f"Wrote similar-Pokémon graph to {graph_path} ({graph_path.stat().st_size} bytes)")
+    else:
+        similarity_graph_path(output).unlink(missing_ok=True)
+    if ann:
+        index_path = write_ann_index(
+            output, matrix, mask, catalog_version=catalog_version, precision=precision
+        )
+        if index_path is not None:
+            print(f"Wrote ANN index to {index_path} ({index_path.stat().st_size} bytes)")
+    else:
+        ann_index_path(output).unlink(missing_ok=True)
+    return write_snapshot(
+        output,
+        pokemon,
+        catalog_version=catalog_version,
+        model_version=model_version,
+        precision=precision,
+    )
+
+
+async def export_from_database(
+    output: Path, ann: bool | None, precision: str, similar: bool
+) -> Path:
+    async with SessionMaker() as session:
+        # Query the version first so an unreachable DB fails loudly instead of
+        # silently exporting the seed fallback.
+        version_row = (
+            await session.execute(
+                select(
+                    func.max(PokemonRecord.updated_at),
+                    func.count(PokemonRecord.id),
+                    func.max(PokemonRecord.model_version),
+                )
+            )
+        ).one()
+        updated_at, count, model_version = version_row
+        if not count:
+            raise RuntimeError("No Pokémon records available. Run seed_pokemon_data.py first.")
+        # Straight from the table: going through the repository cache would publish (and
+        # prune) this node's shared catalogs as a side effect of an offline export.
+        records = (
+            (await session.execute(select(PokemonRecord).order_by(PokemonRecord.id)))
+            .scalars()
+            .all()
+        )
+        pokemon = PokedexRepository().records_to_domain(records)
+
+    # The same version string the API derives, so workers recognise the snapshot.
+    catalog_version = catalog_version_for(updated_at, count)
+    return write_catalog(
+        output,
+        pokemon,
+        catalog_version=catalog_version,
+        model_version=model_version or settings.clip_model_name,
+        ann=ann,
+        precision=precision,
+        similar=similar,
+    )
+
+
+async def export_from_seed(
+    output: Path, seed_path: Path, ann: bool | None, precision: str, similar: bool
+) -> Path:
+    repo = PokedexRepository(data_path=seed_path)
+    pokemon = sorted(await repo.get_all_pokemon(), key=lambda entry: entry.id)
+    if not pokemon:
+        raise RuntimeError(f"Seed file {seed_path} is missing or empty")
+    catalog_version = "seed-" + hashlib.sha256(seed_path.read_bytes()).hexdigest()[:16]
+    return write_catalog(
+        output,
+        pokemon,
+        catalog_version=catalog_version,
+        model_version=None,
+        ann=ann,
+        precision=precision,
+        similar=similar,
+    )
+
+
+async def export(
+    output: Path, from_seed: Path | None, ann: bool | None, precision: str, similar: bool
+) -> None:
+    if from_seed is not None:
+        path = await export_from_seed(output, from_seed, ann, precision, similar)
+    else:
+        path = await export_from_database(output, ann, precision, similar)
+    print(f"Wrote catalog snapshot to {path} ({path.stat().st_size} bytes)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the Pokédex to a binary snapshot")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=settings.catalog_snapshot_path or DEFAULT_SNAPSHOT_PATH,
+        help="Snapshot file to write (replaced atomically)",
+    )
+    parser.add_argument(
+        "--from-seed",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_SEED_PATH,
+        default=None,
+        help="Build from the JSON seed instead of Postgres (no DB required)",
+    )
+    parser.add_argument(
+        "--ann",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Build (or skip) the IVF index sidecar; by default it is built for catalogs "
+            f"of at least {settings.ann_min_catalog_size} entries"
+        ),
+    )
+    parser.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default=settings.embedding_precision,
+        help="Embedding storage precision (float16 halves the matrix, int8 quarters it)",
+    )
+    parser.add_argument(
+        "--similar",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Write the precomputed similar-Pokémon graph sidecar (default: on)",
+    )
+    args = parser.parse_args()
+    asyncio.run(export(args.output, args.from_seed, args.ann, args.precision, args.similar))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,14 @@ from app.config import get_settings
 from app.database import SessionMaker
 from app.repositories.pokedex_repository import PokedexRepository
 from app.services.image_processor import ImageProcessor
+from app.services.shadow_evaluation import ShadowModel
 from app.utils.pokemon_images import (
+    artwork_url,
     image_store_dir,
     local_image_path,
     persist_image_bytes,
     sprite_fallback_url,
+    write_artwork_variants,
 )
 
 settings = get_settings()
@@ -46,8 +49,17 @@ async def download_image(client: httpx.AsyncClient, url: str) -> bytes:
     return response.content
 
 
-async def precompute(limit: int | None = None) -> None:
+async def refresh_graph(changed: list[int]) -> None:
+    async with SessionMaker() as session:
+        repo = PokedexRepository(session=session)
+        updated = await repo.refresh_similarity_graph(changed)
+        await session.commit()
+    print(f"Updated similar-Pokémon lists for {updated} Pokémon")
+
+
+async def precompute(limit: int | None = None, variants: bool = True) -> None:
     processor = ImageProcessor()
+    changed: list[int] = []
     async with SessionMaker() as session:
         repo = PokedexRepository(session=session)
         pokemon = await repo.get_all_pokemon()
@@ -57,6 +69,10 @@ async def precompute(limit: int | None = None) -> None:
             raise RuntimeError("No Pokémon records available. Run seed_pokemon_data.py first.")
 
         store_dir = image_store_dir()
+        base_url = settings.artwork_base_url
+        if variants and base_url is None:
+            # A relative URL would resolve against the frontend's origin, not the API's.
+            print("ARTWORK_BASE_URL is not set: writing thumbnails but leaving image_url as is")
         async with httpx.AsyncClient(timeout=60) as client:
             for group in tqdm(chunk(pokemon, 10), desc="Embedding Pokémon"):
                 images: list[bytes | Exception] = []
@@ -75,15 +91,86 @@ async def precompute(limit: int | None = None) -> None:
                     persist_image_bytes(image_data, entry.id, root=store_dir)
                     embedding = processor.extract_embedding(image_data)
                     await repo.save_embedding(entry.id, embedding, settings.clip_model_name)
+                    changed.append(entry.id)
+                    if variants:
+                        # The full-size original stays at <id>.png; clients get the thumbnail.
+                        paths = write_artwork_variants(image_data, entry.id, root=store_dir)
+                        if base_url is not None and "webp" in paths:
+                            await repo.save_image_url(
+                                entry.id, artwork_url(paths["webp"].name, base_url=str(base_url))
+                            )
+        # Same transaction, so the neighbour lists never describe other embeddings.
+        updated = await repo.refresh_similarity_graph(changed)
+        await session.commit()
+    print(f"Computed embeddings for {len(changed)} Pokémon")
+    print(f"Updated similar-Pokémon lists for {updated} Pokémon")
+
+
+async def precompute_shadow(model_name: str, limit: int | None = None) -> None:
+    """Embed the artwork with a candidate model into its own table for shadow evaluation."""
+
+    model = ShadowModel(model_name)
+    saved = 0
+    async with SessionMaker() as session:
+        repo = PokedexRepository(session=session)
+        pokemon = await repo.get_all_pokemon()
+        if limit:
+            pokemon = pokemon[:limit]
+        if not pokemon:
+            raise RuntimeError("No Pokémon records available. Run seed_pokemon_data.py first.")
+
+        store_dir = image_store_dir()
+        async with httpx.AsyncClient(timeout=60) as client:
+            for entry in tqdm(pokemon, desc=f"Embedding Pokémon with {model_name}"):
+                local_path = local_image_path(entry.id, root=store_dir)
+                if local_path.exists():
+                    image_data = local_path.read_bytes()
+                else:
+                    try:
+                        image_data = await download_image(
+                            client, ensure_image_url(entry.image_url, entry.id)
+                        )
+                    except httpx.HTTPError as exc:
+                        print(f"Skipping {entry.name} - {exc}")
+                        continue
+                embedding = model.embed(image_data)
+                await repo.save_shadow_embedding(entry.id, embedding.tolist(), model_name)
+                saved += 1
         await session.commit()
-    print(f"Computed embeddings for {len(pokemon)} Pokémon")
+    print(f"Computed {model_name} shadow embeddings for {saved} Pokémon")
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Pre-compute Pokémon embeddings")
     parser.add_argument("--limit", type=int, default=None, help="Limit Pokémon count for testing")
+    parser.add_argument(
+        "--variants",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Write WebP/AVIF thumbnails and, with ARTWORK_BASE_URL set, point image_url at "
+            "them (default: on)"
+        ),
+    )
+    parser.add_argument(
+        "--graph-only",
+        action="store_true",
+        help="Skip embedding and only recompute missing or outdated similar-Pokémon lists",
+    )
+    parser.add_argument(
+        "--shadow-model",
+        metavar="NAME",
+        help="Embed with this candidate model into the shadow table instead; "
+        "serving embeddings, artwork and similar-Pokémon lists are left alone",
+    )
     args = parser.parse_args()
-    asyncio.run(precompute(args.limit))
+    if args.shadow_model:
+        asyncio.run(precompute_shadow(args.shadow_model, args.limit))
+        return
+    if args.graph_only:
+        asyncio.run(refresh_graph([]))
+        return
+    asyncio.run(precompute(args.limit, args.variants))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,293 @@
+"""Export the ``pokemon`` table (with embeddings) to a file and load it back with COPY.
+
+Staging and DR environments can be filled in seconds without PokéAPI or CLIP::
+
+    poetry run python scripts/transfer_embeddings.py export --output pokedex.pkdx
+    poetry run python scripts/transfer_embeddings.py import pokedex.pkdx
+
+The file is a catalog snapshot (see ``app.services.catalog_snapshot``): every column
+of ``pokemon`` as compact JSON plus the raw embedding matrix. ``float16`` (the default)
+is exactly what the ``halfvec`` column stores, so a round trip is lossless.
+
+Import streams rows through ``COPY ... FROM STDIN (FORMAT binary)`` with the ivfflat
+index dropped, then rebuilds the index and runs ``ANALYZE`` in the same transaction.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import asyncpg
+from pgvector import HalfVector
+from pgvector.asyncpg import register_vector
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from app.config import get_settings
+from app.database import SessionMaker
+from app.models.db import PokemonRecord
+from app.models.pokemon import Pokemon, PokemonStats
+from app.services.catalog_snapshot import (
+    CatalogSnapshot,
+    catalog_version_for,
+    load_snapshot,
+    write_snapshot,
+)
+
+settings = get_settings()
+
+COPY_COLUMNS = (
+    "id",
+    "name",
+    "types",
+    "description",
+    "genus",
+    "image_url",
+    "generation",
+    "height",
+    "weight",
+    "abilities",
+    "hp",
+    "attack",
+    "defense",
+    "special_attack",
+    "special_defense",
+    "speed",
+    "embedding",
+    "model_version",
+)
+INDEX_NAME = "ix_pokemon_embedding"
+
+
+async def export_embeddings(output: Path, precision: str) -> Path:
+    pokemon: List[Pokemon] = []
+    model_versions: Counter[str] = Counter()
+    latest = None
+    async with SessionMaker() as session:
+        records = await session.stream_scalars(select(PokemonRecord).order_by(PokemonRecord.id))
+        async for record in records:
+            pokemon.append(_record_to_pokemon(record))
+            if record.embedding is not None and record.model_version:
+                model_versions[record.model_version] += 1
+            latest = record.updated_at if latest is None else max(latest, record.updated_at)
+    if not pokemon:
+        raise RuntimeError("No Pokémon records available. Run seed_pokemon_data.py first.")
+    if len(model_versions) > 1:
+        print(
+            f"Warning: rows use several model versions {dict(model_versions)}; "
+            "keeping the most common"
+        )
+    model_version = model_versions.most_common(1)[0][0] if model_versions else None
+
+    return write_snapshot(
+        output,
+        pokemon,
+        catalog_version=catalog_version_for(latest, len(pokemon)),
+        model_version=model_version,
+        precision=precision,
+    )
+
+
+async def import_embeddings(
+    source: Path,
+    *,
+    replace: bool,
+    lists: int | None,
+    maintenance_work_mem: str,
+) -> Tuple[int, dict]:
+    snapshot = load_snapshot(source)
+    rows = len(snapshot.pokemon)
+    lists = lists or default_lists(rows)
+    timings: dict = {}
+    connection = await asyncpg.connect(_asyncpg_dsn(settings.database_url))
+    try:
+        await register_vector(connection)
+        async with connection.transaction():
+            started = perf_counter()
+            # Loading into an indexed table updates the ivfflat lists row by row.
+            await connection.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+            if replace:
+                # pokemon_shadow_embeddings references pokemon, so Postgres only truncates
+                # the two together; the candidate's rows are rebuilt by precompute anyway.
+                await connection.execute("TRUNCATE pokemon, pokemon_shadow_embeddings")
+                await connection.copy_records_to_table(
+                    "pokemon", records=copy_records(snapshot), columns=COPY_COLUMNS
+                )
+            else:
+                await connection.execute(
+                    "CREATE TEMP TABLE pokemon_import (LIKE pokemon INCLUDING DEFAULTS) "
+                    "ON COMMIT DROP"
+                )
+                await connection.copy_records_to_table(
+                    "pokemon_import", records=copy_records(snapshot), columns=COPY_COLUMNS
+                )
+                await connection.execute(_upsert_statement())
+            timings["copy_s"] = perf_counter() - started
+
+            started = perf_counter()
+            await connection.execute(f"SET LOCAL maintenance_work_mem = '{maintenance_work_mem}'")
+            await connection.execute(
+                f"CREATE INDEX {INDEX_NAME} ON pokemon "
+                f"USING ivfflat (embedding halfvec_cosine_ops) WITH (lists = {int(lists)})"
+            )
+            timings["index_s"] = perf_counter() - started
+        started = perf_counter()
+        await connection.execute("ANALYZE pokemon")
+        timings["analyze_s"] = perf_counter() - started
+    finally:
+        await connection.close()
+    timings["lists"] = lists
+    return rows, timings
+
+
+def copy_records(snapshot: CatalogSnapshot) -> Iterator[tuple]:
+    """One tuple per row in ``COPY_COLUMNS`` order; embeddings stay numpy rows."""
+
+    for pokemon in snapshot.pokemon:
+        stats = pokemon.stats
+        embedding = pokemon.embedding
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+        yield (
+            pokemon.id,
+            pokemon.name,
+            list(pokemon.types),
+            pokemon.description,
+            pokemon.genus or None,
+            pokemon.image_url,
+            pokemon.generation,
+            pokemon.height,
+            pokemon.weight,
+            list(pokemon.abilities),
+            stats.hp,
+            stats.attack,
+            stats.defense,
+            stats.special_attack,
+            stats.special_defense,
+            stats.speed,
+            embedding,
+            snapshot.model_version if embedding is not None else None,
+        )
+
+
+def default_lists(rows: int) -> int:
+    """pgvector's guidance for ivfflat: about rows / 1000 lists (at least one)."""
+
+    return max(1, rows // 1000)
+
+
+def _record_to_pokemon(record: PokemonRecord) -> Pokemon:
+    return Pokemon(
+        id=record.id,
+        name=record.name,
+        types=record.types or [],
+        description=record.description or "",
+        image_url=record.image_url,
+        genus=record.genus or "",
+        generation=record.generation,
+        height=record.height or 0.0,
+        weight=record.weight or 0.0,
+        abilities=record.abilities or [],
+        stats=PokemonStats(
+            hp=record.hp or 0,
+            attack=record.attack or 0,
+            defense=record.defense or 0,
+            special_attack=record.special_attack or 0,
+            special_defense=record.special_defense or 0,
+            speed=record.speed or 0,
+        ),
+        embedding=_embedding_values(record.embedding),
+    )
+
+
+def _embedding_values(value) -> np.ndarray | None:
+    if value is None:
+        return None
+    # halfvec columns come back as HalfVector, which is not iterable.
+    if isinstance(value, HalfVector):
+        value = value.to_list()
+    return np.asarray(value, dtype=np.float32)
+
+
+def _upsert_statement() -> str:
+    columns = ", ".join(COPY_COLUMNS)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in COPY_COLUMNS[1:])
+    # Clearing the neighbour lists marks the row as changed for the next graph refresh.
+    return (
+        f"INSERT INTO pokemon ({columns}) SELECT {columns} FROM pokemon_import "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}, similar_ids = NULL, "
+        "similar_scores = NULL, updated_at = now()"
+    )
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk export/import of Pokémon embeddings")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write the pokemon table to a file")
+    export_parser.add_argument("--output", type=Path, required=True)
+    export_parser.add_argument(
+        "--precision",
+        choices=("float16", "float32"),
+        default="float16",
+        help="float16 matches the halfvec column exactly (default)",
+    )
+
+    import_parser = commands.add_parser("import", help="Load an export with binary COPY")
+    import_parser.add_argument("source", type=Path)
+    import_parser.add_argument(
+        "--replace",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Truncate pokemon first (default); --no-replace upserts by id instead",
+    )
+    import_parser.add_argument(
+        "--lists", type=int, default=None, help="ivfflat lists (default: rows / 1000)"
+    )
+    import_parser.add_argument(
+        "--maintenance-work-mem",
+        default="512MB",
+        help="maintenance_work_mem for the index build",
+    )
+    args = parser.parse_args()
+
+    started = perf_counter()
+    if args.command == "export":
+        path = asyncio.run(export_embeddings(args.output, args.precision))
+        size = path.stat().st_size
+        print(f"Exported to {path} ({size} bytes) in {perf_counter() - started:.1f}s")
+        return
+    rows, timings = asyncio.run(
+        import_embeddings(
+            args.source,
+            replace=args.replace,
+            lists=args.lists,
+            maintenance_work_mem=args.maintenance_work_mem,
+        )
+    )
+    print(
+        f"Imported {rows} rows in {perf_counter() - started:.1f}s "
+        f"(copy {timings['copy_s']:.1f}s, index {timings['index_s']:.1f}s with "
+        f"{timings['lists']} lists, analyze {timings['analyze_s']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
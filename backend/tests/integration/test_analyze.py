@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from io import BytesIO
 from pathlib import Path
 from typing import Iterator
@@ -10,6 +11,8 @@ from PIL import Image
 import pytest
 
 from app.api.middleware.rate_limiter import reset_rate_limiter
+from app.dependencies import get_admission_controller, get_shadow_evaluator
+from app.services.admission import AdmissionController
 
 FIXTURE_DIR = Path("tests/fixtures/sample_images")
 FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
@@ -66,6 +69,65 @@ def test_analyze_respects_top_n(client: TestClient) -> None:
     assert len(payload["matches"]) == 2
 
 
+def test_analyze_reports_stage_timings(client: TestClient) -> None:
+    reset_rate_limiter()
+    response = client.post(
+        "/api/v1/analyze/",
+        files={"image": ("pikachu.png", _make_image(), "image/png")},
+    )
+    assert response.status_code == 200
+    stages = {
+        entry.split(";")[0].strip() for entry in response.headers["server-timing"].split(",")
+    }
+    assert {"read", "decode", "preprocess", "inference", "search", "serialize"} <= stages
+    assert response.json()["processing_time_ms"] >= 0
+
+
+def test_analyze_hands_matches_to_the_shadow_evaluator(client: TestClient) -> None:
+    reset_rate_limiter()
+    submitted = []
+
+    class RecordingEvaluator:
+        def maybe_submit(self, image_data: bytes, primary_ids: list[int]) -> bool:
+            submitted.append((image_data, primary_ids))
+            return True
+
+    client.app.dependency_overrides[get_shadow_evaluator] = RecordingEvaluator
+    upload = _make_image().getvalue()
+    try:
+        response = client.post(
+            "/api/v1/analyze/?top_n=3",
+            files={"image": ("pikachu.png", upload, "image/png")},
+        )
+    finally:
+        client.app.dependency_overrides.pop(get_shadow_evaluator)
+
+    assert response.status_code == 200
+    [(image_data, primary_ids)] = submitted
+    assert image_data == upload
+    assert primary_ids == [match["pokemon"]["id"] for match in response.json()["matches"]]
+
+
+def test_analyze_leaves_out_embeddings_unless_requested(client: TestClient) -> None:
+    reset_rate_limiter()
+    lean = client.post(
+        "/api/v1/analyze/",
+        files={"image": ("pikachu.png", _make_image(), "image/png")},
+    )
+    full = client.post(
+        "/api/v1/analyze/?include_embeddings=true",
+        files={"image": ("pikachu.png", _make_image(), "image/png")},
+    )
+    assert lean.status_code == full.status_code == 200
+
+    lean_matches = lean.json()["matches"]
+    full_matches = full.json()["matches"]
+    assert all("embedding" not in match["pokemon"] for match in lean_matches)
+    assert all(len(match["pokemon"]["embedding"]) == 512 for match in full_matches)
+    assert [m["pokemon"]["id"] for m in lean_matches] == [m["pokemon"]["id"] for m in full_matches]
+    assert len(lean.content) < len(full.content) / 10
+
+
 def test_analyze_rejects_invalid_format(client: TestClient) -> None:
     reset_rate_limiter()
     response = client.post(
@@ -94,3 +156,21 @@ def test_rate_limit_enforced(client: TestClient) -> None:
         files={"image": ("pikachu.png", buffer, "image/png")},
     )
     assert response.status_code == 429
+
+
+def test_analyze_sheds_load_when_inference_queue_is_full(client: TestClient) -> None:
+    reset_rate_limiter()
+    admission = AdmissionController(max_concurrency=1, max_queue_depth=0, queue_timeout_seconds=2)
+    asyncio.run(admission.acquire())  # one analysis already running, no room to queue
+    client.app.dependency_overrides[get_admission_controller] = lambda: admission
+    try:
+        response = client.post(
+            "/api/v1/analyze/",
+            files={"image": ("pikachu.png", _make_image(), "image/png")},
+        )
+    finally:
+        client.app.dependency_overrides.pop(get_admission_controller)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert response.json()["detail"]["error"] == "overloaded"
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import zipfile
+from datetime import timedelta
+from typing import Iterator, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.middleware.rate_limiter import reset_rate_limiter
+from app.dependencies import get_job_store
+from app.services.admission import AdmissionController
+from app.services.bulk_jobs import BulkJobWorker, JobStore
+
+
+async def _embed(images: List[bytes]) -> List[List[float] | Exception]:
+    return [[1.0] for _ in images]
+
+
+async def _search(embeddings: List[List[float]], top_n: int) -> List[List[Tuple[int, float]]]:
+    return [[(25, 0.87)] for _ in embeddings]
+
+
+@pytest.fixture
+def store(client: TestClient, tmp_path) -> Iterator[JobStore]:
+    job_store = JobStore(
+        tmp_path,
+        retention=timedelta(hours=1),
+        max_images=100,
+        max_image_bytes=1_000,
+        max_total_bytes=10_000,
+    )
+    client.app.dependency_overrides[get_job_store] = lambda: job_store
+    reset_rate_limiter()
+    try:
+        yield job_store
+    finally:
+        client.app.dependency_overrides.pop(get_job_store, None)
+
+
+def _zip(entries: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, data in entries.items():
+            bundle.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_bulk_job_lifecycle(client: TestClient, store: JobStore) -> None:
+    archive = _zip({"shots/a.png": b"a", "shots/b.png": b"b", "__MACOSX/._a.png": b"junk"})
+    response = client.post(
+        "/api/v1/jobs/?top_n=1",
+        files=[
+            ("files", ("loose.png", b"c", "image/png")),
+            ("archive", ("shots.zip", archive, "application/zip")),
+        ],
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], job["total"]) == ("queued", 3)
+    assert job["links"]["stream"].endswith(f"/jobs/{job['id']}/stream")
+
+    worker = BulkJobWorker(store, AdmissionController(1, 1, 1.0), _embed, _search, batch_size=2)
+    assert asyncio.run(worker.run_once()) is True
+
+    status = client.get(f"/api/v1/jobs/{job['id']}").json()
+    assert (status["status"], status["processed"]) == ("completed", 3)
+
+    page = client.get(f"/api/v1/jobs/{job['id']}/results", params={"limit": 2}).json()
+    assert [result["name"] for result in page["results"]] == ["loose.png", "shots/a.png"]
+    assert page["results"][0]["matches"] == [{"pokemon_id": 25, "similarity_score": 0.87}]
+    assert page["next_offset"] == 2
+
+    lines = client.get(f"/api/v1/jobs/{job['id']}/stream").text.splitlines()
+    assert len(lines) == 4
+    assert json.loads(lines[-1])["event"] == "end"
+
+
+def test_bulk_job_rejects_bad_submissions(client: TestClient, store: JobStore) -> None:
+    not_zip = client.post(
+        "/api/v1/jobs/", files={"archive": ("a.zip", b"nope", "application/zip")}
+    )
+    too_big = client.post(
+        "/api/v1/jobs/", files={"archive": ("a.zip", _zip({"a.png": b"x" * 2_000}), "application/zip")}
+    )
+
+    assert not_zip.status_code == 400
+    assert too_big.status_code == 413
+    assert client.get("/api/v1/jobs/" + "0" * 32).status_code == 404
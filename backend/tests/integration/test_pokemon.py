@@ -1,5 +1,12 @@
+import pytest
 from fastapi.testclient import TestClient
 
+from app.dependencies import get_pokedex_repository
+from app.main import create_app
+from app.models import Pokemon
+from app.repositories.pokedex_repository import PokedexRepository
+from app.services.catalog_snapshot import write_snapshot
+
 
 def test_get_pokemon_returns_data(client: TestClient) -> None:
     response = client.get("/api/v1/pokemon/25")
@@ -11,3 +18,63 @@ def test_get_pokemon_returns_data(client: TestClient) -> None:
 def test_get_pokemon_not_found(client: TestClient) -> None:
     response = client.get("/api/v1/pokemon/9999")
     assert response.status_code == 404
+
+
+def test_search_pokemon_filters_and_sorts(client: TestClient) -> None:
+    response = client.get(
+        "/api/v1/pokemon/search",
+        params={"generation": 1, "stat": "speed:60..90", "sort": "-speed"},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["total"] == 2
+    assert [entry["name"] for entry in payload["results"]] == ["Pikachu", "Lapras"]
+    assert "embedding" not in payload["results"][0]
+    assert payload["next_offset"] is None
+
+
+def test_search_pokemon_rejects_malformed_stat_range(client: TestClient) -> None:
+    response = client.get("/api/v1/pokemon/search", params={"stat": "power:1..2"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["error"] == "invalid_stat_range"
+
+
+def test_suggest_pokemon_tolerates_typos(client: TestClient) -> None:
+    response = client.get("/api/v1/pokemon/suggest", params={"q": "pikahcu"})
+    assert response.status_code == 200
+    suggestions = response.json()["suggestions"]
+    assert suggestions[0] == {"id": 25, "name": "Pikachu", "match": "fuzzy"}
+
+
+def test_similar_pokemon_excludes_itself(client: TestClient) -> None:
+    response = client.get("/api/v1/pokemon/25/similar", params={"limit": 2})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["pokemon_id"] == 25
+    assert all(entry["pokemon"]["id"] != 25 for entry in payload["similar"])
+    assert client.get("/api/v1/pokemon/9999/similar").status_code == 404
+
+
+def test_pokemon_routes_serve_snapshot_catalog(tmp_path) -> None:
+    snapshot = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [Pokemon(id=1, name="Bulbasaur", types=["grass"], embedding=[0.6, 0.8])],
+        catalog_version="v1",
+        dimension=2,
+    )
+    app = create_app()
+
+    async def override_repo() -> PokedexRepository:
+        return PokedexRepository(snapshot_path=snapshot)
+
+    app.dependency_overrides[get_pokedex_repository] = override_repo
+    client = TestClient(app)
+    response = client.get("/api/v1/pokemon/1")
+    listing = client.get("/api/v1/pokemon")
+
+    # Snapshot embeddings are memory-mapped rows, which pydantic cannot serialize.
+    assert response.status_code == 200
+    assert response.json()["embedding"] == pytest.approx([0.6, 0.8])
+    assert listing.status_code == 200
+    assert [entry["id"] for entry in listing.json()] == [1]
+    assert listing.json()[0]["embedding"] == pytest.approx([0.6, 0.8])
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_admitted_in_arrival_order():
+    admission = AdmissionController(max_concurrency=1, max_queue_depth=2, queue_timeout_seconds=1)
+    order = []
+    await admission.acquire()
+
+    async def worker(name: str) -> None:
+        async with admission.slot():
+            order.append(name)
+
+    tasks = [asyncio.create_task(worker(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    assert admission.queue_depth == 2
+    assert admission.saturated
+
+    admission.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["first", "second"]
+    assert admission.active == 0
+    assert admission.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_immediately():
+    admission = AdmissionController(max_concurrency=1, max_queue_depth=0, queue_timeout_seconds=5)
+    await admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire()
+    with pytest.raises(AdmissionRejected):
+        admission.check()
+
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after_seconds == 5
+    assert admission.shed_total == 2
+
+
+@pytest.mark.asyncio
+async def test_waiting_past_the_deadline_sheds():
+    admission = AdmissionController(
+        max_concurrency=1, max_queue_depth=4, queue_timeout_seconds=0.01
+    )
+    await admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire()
+
+    assert excinfo.value.reason == "deadline"
+    assert admission.queue_depth == 0
+    admission.release()
+    assert admission.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    admission = AdmissionController(max_concurrency=1, max_queue_depth=4, queue_timeout_seconds=5)
+    await admission.acquire()
+    waiter = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    admission.release()
+
+    assert admission.active == 0
+    assert admission.queue_depth == 0
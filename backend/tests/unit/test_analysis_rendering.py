@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+
+from app.models import AnalysisResult, MatchResult, Pokemon
+from app.models.pokemon import PokemonStats
+from app.services.analysis_rendering import pokemon_fragment, render_analysis
+from app.services.catalog_search import CatalogSearchIndex
+from app.services.catalog_snapshot import CatalogSnapshot, SharedCatalog
+from app.services.name_suggest import NameSuggestIndex
+from app.services.pokemon_matcher import PokemonMatcher
+
+
+def _pokemon(pokemon_id: int) -> Pokemon:
+    return Pokemon(
+        id=pokemon_id,
+        name=f"mon-{pokemon_id}",
+        types=["electric"],
+        abilities=["static"],
+        stats=PokemonStats(hp=35, speed=90),
+        embedding=[0.25] * 4,
+    )
+
+
+def _catalog(pokemon: list[Pokemon]) -> SharedCatalog:
+    embeddings = np.asarray([p.embedding for p in pokemon], dtype=np.float32)
+    snapshot = CatalogSnapshot(
+        pokemon=pokemon,
+        embeddings=embeddings,
+        catalog_version="v1",
+        model_version=None,
+        created_at="2024-01-01T00:00:00+00:00",
+    )
+    return SharedCatalog(
+        snapshot=snapshot,
+        by_id={p.id: p for p in pokemon},
+        matcher=PokemonMatcher(pokemon, embeddings),
+        search_index=CatalogSearchIndex(pokemon),
+        suggest_index=NameSuggestIndex(pokemon),
+    )
+
+
+def test_rendered_response_matches_model_serialization():
+    pokemon = [_pokemon(25), _pokemon(26)]
+    matches = [(pokemon[0], 0.9), (pokemon[1], 0.5)]
+    result = AnalysisResult(id="abc", processing_time_ms=12)
+
+    rendered = json.loads(render_analysis(result, matches, include_embeddings=True))
+    expected = json.loads(
+        AnalysisResult(
+            id="abc",
+            processing_time_ms=12,
+            created_at=result.created_at,
+            matches=[
+                MatchResult(pokemon=p, similarity_score=score, rank=rank)
+                for rank, (p, score) in enumerate(matches, start=1)
+            ],
+        ).model_dump_json()
+    )
+    assert rendered == expected
+
+    lean = json.loads(render_analysis(result, matches))
+    assert "embedding" not in lean["matches"][0]["pokemon"]
+    assert lean["matches"][1]["rank"] == 2
+
+
+def test_fragments_are_cached_only_for_catalog_objects():
+    pokemon = [_pokemon(25)]
+    catalog = _catalog(pokemon)
+
+    first = pokemon_fragment(pokemon[0], catalog)
+    assert catalog.fragments[25] is first
+    assert pokemon_fragment(pokemon[0], catalog) is first
+
+    # An equal Pokémon read elsewhere (e.g. from Postgres) may differ, so it is not cached.
+    copy = _pokemon(25)
+    copy.name = "renamed"
+    assert json.loads(pokemon_fragment(copy, catalog))["name"] == "renamed"
+    assert catalog.fragments[25] is first
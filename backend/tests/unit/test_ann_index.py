@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.models import Pokemon
+from app.services.ann_index import IvfIndex, ann_index_path
+from app.services.catalog_snapshot import (
+    embedding_matrix,
+    load_snapshot,
+    open_shared_snapshot,
+    publish_shared_snapshot,
+    write_ann_index,
+    write_snapshot,
+)
+from app.services.pokemon_matcher import PokemonMatcher
+
+
+def _clustered(count: int, dimension: int = 16, clusters: int = 8, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    matrix = centres[rng.integers(0, clusters, size=count)]
+    matrix = matrix + 0.2 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _catalog(embeddings: np.ndarray) -> list[Pokemon]:
+    return [
+        Pokemon(id=row + 1, name=f"Entry-{row + 1}", types=["normal"], embedding=vector)
+        for row, vector in enumerate(embeddings)
+    ]
+
+
+def test_probing_every_list_matches_exact_search():
+    embeddings = _clustered(500)
+    index = IvfIndex.build(embeddings, nlist=16)
+    query = embeddings[42]
+
+    rows, scores = index.search(query, top_n=5, nprobe=index.nlist)
+
+    exact = np.argsort(-(embeddings @ query), kind="stable")[:5]
+    assert rows.tolist() == exact.tolist()
+    assert abs(float(scores[0]) - 1.0) < 1e-5
+
+
+def test_small_nprobe_keeps_recall_on_clustered_data():
+    embeddings = _clustered(2_000, clusters=32)
+    index = IvfIndex.build(embeddings, nlist=32)
+    queries = embeddings[:50]
+
+    hits = 0
+    for query in queries:
+        rows, _ = index.search(query, top_n=5, nprobe=4)
+        exact = set(np.argsort(-(embeddings @ query))[:5].tolist())
+        hits += len(exact & set(rows.tolist()))
+
+    assert hits / (5 * len(queries)) >= 0.9
+
+
+def test_index_round_trips_through_memory_map(tmp_path):
+    embeddings = _clustered(300)
+    mask = np.ones(300, dtype=bool)
+    mask[::3] = False
+    index = IvfIndex.build(embeddings, mask=mask, nlist=8, catalog_version="v1")
+
+    loaded = IvfIndex.load(index.save(tmp_path / "catalog.pkdx.ivf"), nprobe=8)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.catalog_version == "v1"
+    assert len(loaded) == int(mask.sum())
+    assert not set(loaded.ids.tolist()) & set(np.flatnonzero(~mask).tolist())
+    rows, _ = loaded.search(embeddings[1], top_n=3)
+    assert rows[0] == 1
+
+
+@pytest.mark.parametrize(
+    "precision, dtype", [("float32", np.float32), ("float16", np.float16), ("int8", np.int8)]
+)
+def test_index_vectors_follow_the_embedding_precision(tmp_path, precision, dtype):
+    embeddings = _clustered(300)
+    index = IvfIndex.build(embeddings, nlist=8, precision=precision)
+
+    loaded = IvfIndex.load(index.save(tmp_path / "catalog.pkdx.ivf"))
+
+    assert loaded.vectors.dtype == dtype and loaded.precision == precision
+    assert (loaded.scales is not None) == (precision == "int8")
+    rows, scores = loaded.search(embeddings[11], top_n=3, nprobe=loaded.nlist)
+    # Reduced precision may reorder near-ties, but scores stay close to the exact ones.
+    assert rows[0] == 11
+    assert scores == pytest.approx(embeddings[rows] @ embeddings[11], abs=1e-2)
+
+
+def test_matcher_uses_index_for_matching():
+    embeddings = _clustered(200)
+    matcher = PokemonMatcher(_catalog(embeddings), embeddings, IvfIndex.build(embeddings, nlist=4))
+
+    matches = matcher.find_best_matches(embeddings[7].tolist(), top_n=3)
+
+    assert [match.rank for match in matches] == [1, 2, 3]
+    assert matches[0].pokemon.id == 8
+    assert matches[0].similarity_score > matches[1].similarity_score
+
+
+def test_shared_snapshot_loads_sidecar_and_ignores_stale_ones(tmp_path):
+    embeddings = _clustered(120)
+    pokemon = _catalog(embeddings)
+    path = tmp_path / "catalog.pkdx"
+    matrix, mask = embedding_matrix(pokemon, dimension=16)
+    write_ann_index(path, matrix, mask, catalog_version="v1", nlist=4)
+    write_snapshot(path, pokemon, catalog_version="v1", dimension=16)
+
+    shared = open_shared_snapshot(path)
+
+    assert ann_index_path(path).exists()
+    assert shared.matcher.ann_index is not None
+    assert shared.matcher.find_best_matches(embeddings[3].tolist(), top_n=1)[0].pokemon.id == 4
+
+    write_snapshot(path, pokemon, catalog_version="v2", dimension=16)
+
+    assert load_snapshot(path).catalog_version == "v2"
+    assert open_shared_snapshot(path).matcher.ann_index is None
+
+
+def test_published_index_is_stored_at_the_catalog_precision(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "ann_min_catalog_size", 100)
+    embeddings = _clustered(120)
+    pokemon = _catalog(embeddings)
+
+    shared = publish_shared_snapshot("v1", lambda: pokemon, directory=tmp_path, precision="int8")
+
+    index = shared.matcher.ann_index
+    assert index is not None and index.vectors.dtype == np.int8
+    assert shared.snapshot.embeddings.dtype == np.int8
+    assert shared.matcher.find_best_matches(embeddings[5].tolist(), top_n=1)[0].pokemon.id == 6
@@ -0,0 +1,64 @@
+import pytest
+
+from benchmarks.analyze_pipeline import compare_to_baseline, summarize
+from benchmarks.load_test import Sample, parse_mix, parse_server_timing, summarize_level
+
+
+def test_summarize_reports_percentiles():
+    stats = summarize([float(value) for value in range(1, 101)])
+
+    assert stats["samples"] == 100
+    assert stats["p50_ms"] == 51.0
+    assert stats["p99_ms"] == 99.0
+    assert stats["max_ms"] == 100.0
+
+
+def test_compare_to_baseline_flags_only_regressions_beyond_threshold():
+    baseline = {"resize": {"p50_ms": 10.0}, "match": {"p50_ms": 1.0}}
+    current = {"resize": {"p50_ms": 11.0}, "match": {"p50_ms": 1.5}, "new_stage": {"p50_ms": 3.0}}
+
+    regressions = compare_to_baseline(current, baseline, metric="p50_ms", max_regression=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("match:")
+
+
+def test_compare_to_baseline_flags_throughput_drops_when_higher_is_better():
+    baseline = {"all[c=8]": {"throughput_rps": 100.0}, "all[c=32]": {"throughput_rps": 100.0}}
+    current = {"all[c=8]": {"throughput_rps": 70.0}, "all[c=32]": {"throughput_rps": 130.0}}
+
+    regressions = compare_to_baseline(
+        current, baseline, metric="throughput_rps", max_regression=0.2, higher_is_better=True
+    )
+
+    assert [line.split(":")[0] for line in regressions] == ["all[c=8]"]
+
+
+def test_load_test_parses_mix_and_server_timing():
+    assert parse_mix("analyze=3, suggest") == {"analyze": 3.0, "suggest": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("upload=1")
+
+    stages = parse_server_timing("read;dur=1.50, inference;dur=20.25, total;dur=21.75")
+
+    assert stages == {"read": 1.5, "inference": 20.25}
+
+
+def test_load_test_separates_errors_from_shed_requests():
+    samples = [
+        Sample("analyze", 200, 10.0, stages={"inference": 8.0}),
+        Sample("analyze", 200, 30.0, stages={"inference": 20.0}),
+        Sample("analyze", 503, 1.0, shed=True),
+        Sample("suggest", 500, 2.0),
+    ]
+
+    results = summarize_level(samples, elapsed=2.0, concurrency=4)
+
+    analyze = results["analyze[c=4]"]
+    assert analyze["throughput_rps"] == 1.0
+    assert analyze["shed_rate"] == round(1 / 3, 4)
+    assert analyze["error_rate"] == 0.0
+    assert analyze["max_ms"] == 30.0
+    assert analyze["stages"]["inference"]["mean_ms"] == 14.0
+    assert results["suggest[c=4]"]["error_rate"] == 1.0
+    assert results["all[c=4]"]["status_codes"] == {"200": 2, "500": 1, "503": 1}
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import time
+from datetime import timedelta
+from typing import List, Tuple
+
+import pytest
+
+from app.services.admission import AdmissionController
+from app.services.bulk_jobs import (
+    BulkJobWorker,
+    JobLimitExceeded,
+    JobNotFound,
+    JobStore,
+    LockLost,
+)
+
+
+def _store(tmp_path, **overrides) -> JobStore:
+    options = dict(
+        retention=timedelta(hours=1),
+        max_images=10,
+        max_image_bytes=100,
+        max_total_bytes=1_000,
+    )
+    options.update(overrides)
+    return JobStore(tmp_path, **options)
+
+
+async def _embed(images: List[bytes]) -> List[List[float] | Exception]:
+    return [ValueError("not an image") if data == b"bad" else [float(data[-1])] for data in images]
+
+
+async def _search(embeddings: List[List[float]], top_n: int) -> List[List[Tuple[int, float]]]:
+    return [[(int(e[0]), 0.9), (int(e[0]) + 1, 0.5)][:top_n] for e in embeddings]
+
+
+def _worker(store: JobStore, admission: AdmissionController | None = None) -> BulkJobWorker:
+    admission = admission or AdmissionController(1, 1, 1.0)
+    return BulkJobWorker(store, admission, _embed, _search, batch_size=2)
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_jobs_in_batches_and_records_failures(tmp_path):
+    store = _store(tmp_path)
+    images = [("a.png", b"\x07"), ("b.png", b"bad"), ("c.png", b"\x09")]
+    job = store.create(images, top_n=2)
+    assert store.status(job)["status"] == "queued"
+
+    assert await _worker(store).run_once() is True
+
+    status = store.status(job)
+    assert status["status"] == "completed"
+    assert (status["processed"], status["failed"]) == (3, 1)
+    assert not (job.path / "input").exists()
+    first, failed, last = store.results(job)
+    assert first.name == "a.png"
+    assert first.matches == [(7, pytest.approx(0.9, abs=1e-3)), (8, 0.5)]
+    assert failed.matches == [] and failed.error == "not an image"
+    assert [result.index for result in store.results(job, offset=2)] == [2]
+    assert (job.path / "results.bin").stat().st_size == 3 * 12
+    assert await _worker(store).run_once() is False
+
+
+@pytest.mark.asyncio
+async def test_stale_claims_are_taken_over_and_resumed(tmp_path):
+    store = _store(tmp_path, stale_lock_seconds=60)
+    job = store.create([("a", b"\x01"), ("b", b"\x02"), ("c", b"\x03")], top_n=1)
+    assert store.claim_next() == job
+    store.append_results(job, [[(1, 0.9)]])
+    assert store.claim_next() is None
+
+    # The owner died: its heartbeat goes stale and another worker finishes the rest.
+    stale = time.time() - 120
+    os.utime(job.path / "worker.lock", (stale, stale))
+    assert await _worker(store).run_once() is True
+    assert [result.matches[0][0] for result in store.results(job)] == [1, 2, 3]
+
+
+def test_submission_limits_and_expiry(tmp_path):
+    store = _store(tmp_path)
+    with pytest.raises(JobLimitExceeded):
+        store.create([("big", b"x" * 101)], top_n=5)
+    with pytest.raises(JobLimitExceeded):
+        store.create([(str(i), b"x") for i in range(11)], top_n=5)
+    with pytest.raises(ValueError):
+        store.create([], top_n=5)
+    assert list(tmp_path.iterdir()) == []
+
+    expired = _store(tmp_path, retention=timedelta(seconds=-1)).create([("a", b"x")], top_n=5)
+    with pytest.raises(JobNotFound):
+        store.get(expired.id)
+    with pytest.raises(JobNotFound):
+        store.get("../etc")
+    assert store.sweep_expired() == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_worker_waits_for_interactive_inference(tmp_path):
+    store = _store(tmp_path)
+    job = store.create([("a", b"\x01")], top_n=1)
+    admission = AdmissionController(1, 1, 1.0)
+    await admission.acquire()
+
+    task = asyncio.create_task(_worker(store, admission).run_once())
+    await asyncio.sleep(0.1)
+    assert store.processed(job) == 0
+
+    admission.release()
+    assert await asyncio.wait_for(task, timeout=1) is True
+    assert store.processed(job) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_worker_keeps_its_claim_fresh(tmp_path):
+    store = _store(tmp_path, stale_lock_seconds=0.2)
+    job = store.create([("a", b"\x01")], top_n=1)
+    admission = AdmissionController(1, 1, 1.0)
+    await admission.acquire()
+
+    task = asyncio.create_task(_worker(store, admission).run_once())
+    await asyncio.sleep(0.5)
+    assert store.status(job)["status"] == "running"
+    assert _store(tmp_path, stale_lock_seconds=0.2).claim_next() is None
+
+    admission.release()
+    assert await asyncio.wait_for(task, timeout=1) is True
+    assert store.processed(job) == 1
+
+
+def test_taken_over_claim_cannot_append(tmp_path):
+    first = _store(tmp_path, stale_lock_seconds=60)
+    job = first.create([("a", b"\x01"), ("b", b"\x02")], top_n=1)
+    assert first.claim_next() == job
+    stale = time.time() - 120
+    os.utime(job.path / "worker.lock", (stale, stale))
+
+    second = _store(tmp_path, stale_lock_seconds=60)
+    assert second.claim_next() == job
+    with pytest.raises(LockLost):
+        first.append_results(job, [[(1, 0.9)]])
+    first.release(job)
+
+    second.append_results(job, [[(1, 0.9)]])
+    assert second.processed(job) == 1
+    assert (job.path / "worker.lock").exists()
+
+
+@pytest.mark.asyncio
+async def test_failing_job_backs_off_then_fails(tmp_path):
+    store = _store(tmp_path, max_attempts=2, retry_backoff_seconds=60)
+    job = store.create([("a", b"\x01")], top_n=1)
+
+    async def broken(images: List[bytes]) -> List[List[float] | Exception]:
+        raise RuntimeError("model crashed")
+
+    worker = BulkJobWorker(store, AdmissionController(1, 1, 1.0), broken, _search, batch_size=2)
+
+    assert await worker.run_once() is True
+    assert store.status(job)["status"] == "queued"
+    # Backing off: the job is not claimed again right away.
+    assert await worker.run_once() is False
+
+    attempts = json.loads((job.path / "attempts.json").read_text())
+    attempts["retry_at"] = time.time() - 1
+    (job.path / "attempts.json").write_text(json.dumps(attempts))
+    assert await worker.run_once() is True
+
+    status = store.status(job)
+    assert (status["status"], status["error"]) == ("failed", "model crashed")
+    assert not (job.path / "input").exists()
+    assert await worker.run_once() is False
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.catalog_manager import CatalogManager
+
+
+def _catalog(version: str):
+    return SimpleNamespace(catalog_version=version, by_id={1: object()})
+
+
+class _Source:
+    def __init__(self) -> None:
+        self.version = "v1"
+        self.loads: list[bool] = []
+
+    async def probe(self):
+        return self.version
+
+    async def load(self, overwrite: bool):
+        self.loads.append(overwrite)
+        return _catalog(self.version)
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_catalog_only_when_version_changes():
+    source = _Source()
+    manager = CatalogManager(probe=source.probe, load=source.load)
+
+    assert await manager.refresh() is True
+    assert await manager.refresh() is False
+    first = manager.current
+
+    source.version = "v2"
+    assert await manager.refresh() is True
+
+    assert manager.catalog_version == "v2"
+    assert manager.current is not first
+    assert source.loads == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_forced_refresh_rebuilds_unchanged_version():
+    source = _Source()
+    manager = CatalogManager(probe=source.probe, load=source.load)
+    manager.install(_catalog("v1"))
+
+    assert await manager.refresh(force=True) is True
+    assert source.loads == [True]
@@ -0,0 +1,70 @@
+import pytest
+
+from app.models import Pokemon, PokemonStats
+from app.services.catalog_search import CatalogSearchIndex, SearchQuery, StatRange
+
+
+def _pokemon(pokemon_id, name, types, generation, abilities, attack, speed):
+    return Pokemon(
+        id=pokemon_id,
+        name=name,
+        types=types,
+        generation=generation,
+        abilities=abilities,
+        stats=PokemonStats(hp=50, attack=attack, speed=speed),
+    )
+
+
+@pytest.fixture()
+def index() -> CatalogSearchIndex:
+    return CatalogSearchIndex(
+        [
+            _pokemon(6, "Charizard", ["fire", "flying"], 1, ["Blaze"], 84, 100),
+            _pokemon(25, "Pikachu", ["electric"], 1, ["Static"], 55, 90),
+            _pokemon(135, "Jolteon", ["electric"], 1, ["Volt Absorb"], 65, 130),
+            _pokemon(145, "Zapdos", ["electric", "flying"], 1, ["Pressure", "Static"], 90, 100),
+            _pokemon(257, "Blaziken", ["fire", "fighting"], 3, ["Blaze"], 120, 80),
+        ]
+    )
+
+
+def test_types_must_all_match_case_insensitively(index):
+    page = index.search(SearchQuery(types=("Electric", "flying")))
+
+    assert page.ids == [145]
+
+
+def test_abilities_and_generations_match_any_listed_value(index):
+    assert index.search(SearchQuery(abilities=("static", "volt absorb"))).ids == [25, 135, 145]
+    assert index.search(SearchQuery(generations=(3, 4))).ids == [257]
+
+
+def test_stat_ranges_are_inclusive_and_may_be_open(index):
+    page = index.search(SearchQuery(ranges=(StatRange("speed", low=100),)))
+    assert page.ids == [6, 135, 145]
+
+    page = index.search(
+        SearchQuery(ranges=(StatRange("attack", 55, 84), StatRange("speed", high=100)))
+    )
+    assert page.ids == [6, 25]
+
+
+def test_combined_filters_sort_and_paginate(index):
+    query = SearchQuery(types=("electric",), sort="speed", descending=True, limit=2)
+
+    page = index.search(query)
+
+    assert page.total == 3
+    # Equal speeds keep ascending id order in both directions.
+    assert page.ids == [135, 145]
+    assert index.search(SearchQuery(types=("electric",), sort="speed", offset=2)).ids == [135]
+
+
+def test_sorts_by_name_and_total(index):
+    assert index.search(SearchQuery(sort="name")).ids == [257, 6, 135, 25, 145]
+    assert index.search(SearchQuery(sort="total", descending=True, limit=1)).ids == [257]
+
+
+def test_unknown_values_match_nothing(index):
+    assert index.search(SearchQuery(types=("shadow",))).total == 0
+    assert index.search(SearchQuery(abilities=("nope",))).ids == []
@@ -0,0 +1,154 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.models import Pokemon, PokemonStats
+from app.repositories.pokedex_repository import PokedexRepository
+from app.services import catalog_snapshot
+from app.services.catalog_snapshot import (
+    SnapshotFormatError,
+    load_snapshot,
+    open_shared_snapshot,
+    publish_shared_snapshot,
+    write_snapshot,
+)
+
+
+def _pokemon(pokemon_id: int, name: str, embedding) -> Pokemon:
+    return Pokemon(
+        id=pokemon_id,
+        name=name,
+        types=["grass", "poison"],
+        genus="Seed Pokémon",
+        abilities=["Overgrow"],
+        stats=PokemonStats(hp=45, attack=49, defense=49, speed=45),
+        embedding=embedding,
+    )
+
+
+def test_snapshot_round_trip_memory_maps_embeddings(tmp_path):
+    embedding = [float(i) / 4 for i in range(4)]
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(1, "Bulbasaur", embedding), _pokemon(2, "Ivysaur", None)],
+        catalog_version="v1",
+        model_version="test-model",
+        dimension=4,
+    )
+
+    snapshot = load_snapshot(path)
+
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert snapshot.catalog_version == "v1"
+    assert snapshot.model_version == "test-model"
+    first, second = snapshot.pokemon
+    assert first.name == "Bulbasaur"
+    assert first.types == ["grass", "poison"]
+    assert first.stats.attack == 49
+    assert list(first.embedding) == embedding
+    assert second.embedding is None
+
+
+def test_load_snapshot_rejects_foreign_files(tmp_path):
+    path = tmp_path / "catalog.pkdx"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+
+    with pytest.raises(SnapshotFormatError):
+        load_snapshot(path)
+
+
+@pytest.mark.asyncio
+async def test_repository_prefers_snapshot_over_json_seed(tmp_path):
+    seed_path = tmp_path / "seed.json"
+    seed_path.write_text(json.dumps([{"id": 4, "name": "Charmander", "types": ["fire"]}]))
+    snapshot_path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(1, "Bulbasaur", [1.0, 0.0])],
+        catalog_version="v1",
+        dimension=2,
+    )
+
+    repository = PokedexRepository(data_path=seed_path, snapshot_path=snapshot_path)
+    matches = await repository.find_similar_by_embedding([1.0, 0.0], top_n=1)
+
+    assert [pokemon.name for pokemon, _ in matches] == ["Bulbasaur"]
+    assert matches[0][1] == pytest.approx(1.0)
+
+
+def test_open_shared_snapshot_reuses_mapping_until_file_is_replaced(tmp_path):
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(1, "Bulbasaur", [1.0, 0.0])],
+        catalog_version="v1",
+        dimension=2,
+    )
+
+    first = open_shared_snapshot(path)
+    assert open_shared_snapshot(path) is first
+
+    write_snapshot(path, [_pokemon(2, "Ivysaur", [0.0, 1.0])], catalog_version="v2", dimension=2)
+    second = open_shared_snapshot(path)
+
+    assert second is not first
+    assert second.catalog_version == "v2"
+    assert list(second.by_id) == [2]
+
+
+def test_publish_shared_snapshot_only_builds_missing_versions(tmp_path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return [_pokemon(1, "Bulbasaur", [1.0, 0.0])]
+
+    first = publish_shared_snapshot("v1", build, directory=tmp_path)
+    second = publish_shared_snapshot("v1", build, directory=tmp_path)
+
+    assert calls == [1]
+    assert second is first
+    assert first.matcher.find_best_matches([1.0, 0.0], top_n=1)[0].pokemon.name == "Bulbasaur"
+
+
+def test_publish_shared_snapshot_only_removes_older_versions(tmp_path):
+    def build():
+        return [_pokemon(1, "Bulbasaur", [1.0, 0.0])]
+
+    old = publish_shared_snapshot("v1", build, directory=tmp_path).snapshot.path
+    # Published by another worker after this one started writing v2.
+    newer = tmp_path / "catalog-0123456789abcdef.pkdx"
+    newer.write_bytes(old.read_bytes())
+    later = time.time() + 60
+    os.utime(newer, (later, later))
+
+    current = publish_shared_snapshot("v2", build, directory=tmp_path).snapshot.path
+
+    assert not old.exists()
+    assert current.exists() and newer.exists()
+
+
+def test_publish_shared_snapshot_rewrites_a_file_removed_before_mapping(tmp_path, monkeypatch):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return [_pokemon(1, "Bulbasaur", [1.0, 0.0])]
+
+    path = publish_shared_snapshot("v1", build, directory=tmp_path).snapshot.path
+    original = catalog_snapshot.open_shared_snapshot
+    removed = []
+
+    def open_after_cleanup(target):
+        if not removed:
+            # Another worker's cleanup wins the race between exists() and the mapping.
+            removed.append(target)
+            target.unlink()
+        return original(target)
+
+    monkeypatch.setattr(catalog_snapshot, "open_shared_snapshot", open_after_cleanup)
+    shared = publish_shared_snapshot("v1", build, directory=tmp_path)
+
+    assert removed == [path] and calls == [1, 1]
+    assert shared.snapshot.path == path and path.exists()
@@ -0,0 +1,173 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.models import Pokemon, PokemonStats
+from app.repositories.pokedex_repository import PokedexRepository
+from app.services.catalog_snapshot import load_snapshot, write_snapshot
+from app.services.catalog_store import CatalogStore
+from app.services.embedding_precision import DequantizedRow
+
+
+def _pokemon(pokemon_id: int, name: str, embedding=None, **overrides) -> Pokemon:
+    fields = dict(
+        id=pokemon_id,
+        name=name,
+        types=["grass", "poison"],
+        description=f"{name} description",
+        image_url=f"/static/pokemon/{pokemon_id}.webp",
+        genus="Seed Pokémon",
+        generation=1,
+        height=0.7,
+        weight=6.9,
+        abilities=["Overgrow"],
+        stats=PokemonStats(hp=45, attack=49, defense=49, special_attack=65, speed=45),
+        embedding=embedding,
+    )
+    fields.update(overrides)
+    return Pokemon(**fields)
+
+
+def test_views_round_trip_every_field():
+    source = [
+        _pokemon(1, "Bulbasaur", [1.0, 0.0]),
+        _pokemon(4, "Charmander", None, types=["fire"], abilities=["Blaze", "Solar Power"]),
+    ]
+    store = CatalogStore.from_pokemon(source)
+
+    assert len(store) == 2
+    first, second = store
+    assert replace(first, embedding=None) == replace(source[0], embedding=None)
+    assert list(first.embedding) == [1.0, 0.0]
+    assert second.types == ["fire"]
+    assert second.abilities == ["Blaze", "Solar Power"]
+    assert second.embedding is None
+    assert store.has_embedding.tolist() == [True, False]
+
+
+def test_repeated_strings_are_stored_once():
+    store = CatalogStore.from_pokemon(
+        [_pokemon(pokemon_id, f"Mon{pokemon_id}", [1.0, 0.0]) for pokemon_id in range(1, 101)]
+    )
+
+    # One shared genus, one type vocabulary, one ability vocabulary.
+    assert store[0].genus == store[99].genus == "Seed Pokémon"
+    assert store._types.names == ("grass", "poison")
+    assert store._abilities.names == ("Overgrow",)
+    assert store._text.count("Seed Pokémon".encode("utf-8")) == 1
+
+
+def test_by_id_is_a_read_only_mapping_in_catalog_order():
+    store = CatalogStore.from_pokemon(
+        [_pokemon(7, "Squirtle", [0.0, 1.0]), _pokemon(1, "Bulbasaur", [1.0, 0.0])]
+    )
+    by_id = store.by_id
+
+    assert list(by_id) == [7, 1]
+    assert len(by_id) == 2
+    assert by_id[1].name == "Bulbasaur"
+    assert np.int64(7) in by_id
+    assert 4 not in by_id and "7" not in by_id
+    assert by_id.get(4) is None
+    with pytest.raises(KeyError):
+        by_id[4]
+    assert store.row_of(1) == 1
+
+
+def test_view_cache_returns_the_same_object_until_evicted():
+    store = CatalogStore.from_pokemon(
+        [_pokemon(pokemon_id, f"Mon{pokemon_id}", [1.0, 0.0]) for pokemon_id in range(1, 5)],
+        view_cache_size=2,
+    )
+
+    first = store[0]
+    assert store.get(1) is first
+    store[1]
+    store[2]
+
+    assert store[0] is not first
+    assert store[0].name == first.name
+
+
+def test_full_iteration_does_not_flush_cached_views():
+    store = CatalogStore.from_pokemon(
+        [_pokemon(pokemon_id, f"Mon{pokemon_id}", [1.0, 0.0]) for pokemon_id in range(1, 5)],
+        view_cache_size=1,
+    )
+    hot = store[3]
+
+    assert [pokemon.id for pokemon in store] == [1, 2, 3, 4]
+    assert store[3] is hot
+
+
+def test_quantized_rows_dequantize_on_access():
+    quantized = np.array([[127, 0], [0, -127]], dtype=np.int8)
+    scales = np.array([0.5, 0.25], dtype=np.float32) / 127
+    store = CatalogStore.from_pokemon(
+        [_pokemon(1, "Bulbasaur", [0.5, 0.0]), _pokemon(2, "Ivysaur", [0.0, -0.25])],
+        quantized,
+        scales,
+    )
+
+    embedding = store[1].embedding
+    assert isinstance(embedding, DequantizedRow)
+    assert np.asarray(embedding) == pytest.approx([0.0, -0.25])
+
+
+def test_loaded_snapshot_is_column_backed(tmp_path):
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(1, "Bulbasaur", [1.0, 0.0]), _pokemon(2, "Ivysaur", [0.0, 1.0])],
+        catalog_version="v1",
+        dimension=2,
+    )
+
+    snapshot = load_snapshot(path)
+
+    assert isinstance(snapshot.pokemon, CatalogStore)
+    assert snapshot.pokemon.get(2).description == "Ivysaur description"
+    assert np.shares_memory(np.asarray(snapshot.pokemon[1].embedding), snapshot.embeddings)
+
+
+@pytest.mark.asyncio
+async def test_repository_writes_overlay_the_shared_catalog(tmp_path):
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(1, "Bulbasaur", [1.0, 0.0])],
+        catalog_version="v1",
+        dimension=2,
+    )
+    first = PokedexRepository(snapshot_path=path)
+    second = PokedexRepository(snapshot_path=path)
+    assert len(await first.get_all_pokemon()) == 1
+
+    await first.add_or_update(_pokemon(1, "Renamed", [1.0, 0.0]))
+
+    assert (await first.get_pokemon_by_id(1)).name == "Renamed"
+    assert (await second.get_pokemon_by_id(1)).name == "Bulbasaur"
+
+
+@pytest.mark.asyncio
+async def test_repository_full_scans_bypass_the_view_cache(tmp_path):
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx",
+        [_pokemon(pokemon_id, f"Mon{pokemon_id}", [1.0, 0.0]) for pokemon_id in range(1, 6)],
+        catalog_version="v1",
+        dimension=2,
+    )
+    repository = PokedexRepository(snapshot_path=path)
+    hot = await repository.get_pokemon_by_id(3)
+    store = repository.shared_catalog.snapshot.pokemon
+
+    assert [pokemon.id for pokemon in await repository.get_all_pokemon()] == [1, 2, 3, 4, 5]
+    assert await repository.count_pokemon() == 5
+    assert list(store._views) == [2]
+    assert await repository.get_pokemon_by_id(3) is hot
+
+    await repository.add_or_update(_pokemon(3, "Renamed", [1.0, 0.0]))
+    await repository.add_or_update(_pokemon(6, "Added", [0.0, 1.0]))
+
+    names = [pokemon.name for pokemon in await repository.get_all_pokemon()]
+    assert names == ["Mon1", "Mon2", "Renamed", "Mon4", "Mon5", "Added"]
+    assert await repository.count_pokemon() == 6
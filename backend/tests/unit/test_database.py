@@ -0,0 +1,44 @@
+import pytest
+
+from app.database import LazySession, PoolCheckoutStats
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def execute(self, statement):
+        return statement
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_lazy_session_is_only_created_on_first_use():
+    created = []
+
+    def factory():
+        created.append(_FakeSession())
+        return created[-1]
+
+    session = LazySession(factory)
+    assert not session.started
+    await session.close()
+    assert created == []
+
+    assert await session.execute("select 1") == "select 1"
+    assert session.started
+    await session.close()
+    assert len(created) == 1 and created[0].closed
+
+
+def test_pool_checkout_stats_track_waits_and_timeouts():
+    stats = PoolCheckoutStats()
+
+    stats.record(0.002)
+    stats.record(0.010, timed_out=True)
+
+    assert stats.checkouts == 2
+    assert stats.timeouts == 1
+    assert stats.max_wait_seconds == pytest.approx(0.010)
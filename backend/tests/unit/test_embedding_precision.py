@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from pgvector import HalfVector
+
+from app.models import MatchResult, Pokemon
+from app.repositories.pokedex_repository import _embedding_values
+from app.services.catalog_snapshot import load_snapshot, write_snapshot
+from app.services.embedding_precision import (
+    DequantizedRow,
+    dequantize,
+    matvec,
+    quantize,
+    row_norms,
+)
+from app.services.pokemon_matcher import PokemonMatcher
+
+
+def _embeddings(count: int = 64, dimension: int = 32) -> np.ndarray:
+    matrix = np.random.default_rng(0).standard_normal((count, dimension)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("precision, itemsize", [("float16", 2), ("int8", 1)])
+def test_quantize_shrinks_matrix_and_round_trips_closely(precision, itemsize):
+    embeddings = _embeddings()
+
+    values, scales = quantize(embeddings, precision)
+
+    assert values.dtype.itemsize == itemsize
+    assert (scales is not None) == (precision == "int8")
+    assert np.abs(dequantize(values, scales) - embeddings).max() < 0.01
+
+
+def test_block_scans_match_full_precision():
+    embeddings = _embeddings(3000)
+    values, _ = quantize(embeddings, "int8")
+    query = embeddings[5]
+
+    scores = matvec(values, query) / (row_norms(values) * np.linalg.norm(query))
+
+    assert np.abs(scores - embeddings @ query).max() < 0.02
+
+
+def test_matcher_ranks_int8_catalog_like_float32():
+    embeddings = _embeddings()
+    catalog = [
+        Pokemon(id=row + 1, name=f"Entry-{row + 1}", types=["normal"], embedding=vector.tolist())
+        for row, vector in enumerate(embeddings)
+    ]
+
+    exact = PokemonMatcher(catalog).find_best_matches(embeddings[9].tolist(), top_n=3)
+    compact = PokemonMatcher(catalog, precision="int8").find_best_matches(
+        embeddings[9].tolist(), top_n=3
+    )
+
+    assert compact[0].pokemon.id == exact[0].pokemon.id == 10
+    assert compact[0].similarity_score == pytest.approx(exact[0].similarity_score, abs=1e-3)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_snapshot_stores_reduced_precision(tmp_path, precision):
+    embeddings = _embeddings(4, 8)
+    pokemon = [
+        Pokemon(id=1, name="Bulbasaur", types=["grass"], embedding=embeddings[0].tolist()),
+        Pokemon(id=2, name="Ivysaur", types=["grass"], embedding=None),
+    ]
+    path = write_snapshot(
+        tmp_path / "catalog.pkdx", pokemon, catalog_version="v1", dimension=8, precision=precision
+    )
+
+    snapshot = load_snapshot(path)
+
+    assert snapshot.precision == precision
+    first, second = snapshot.pokemon
+    assert second.embedding is None
+    assert np.allclose(np.asarray(first.embedding, dtype=np.float32), embeddings[0], atol=0.01)
+    if precision == "int8":
+        assert isinstance(first.embedding, DequantizedRow)
+    payload = MatchResult(pokemon=first, similarity_score=1.0, rank=1).model_dump()
+    assert payload["pokemon"]["embedding"] == pytest.approx(embeddings[0].tolist(), abs=0.01)
+
+
+def test_halfvec_column_values_become_floats():
+    assert _embedding_values(HalfVector([0.5, -1.0])) == [0.5, -1.0]
+    assert _embedding_values(None) is None
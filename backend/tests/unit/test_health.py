@@ -1,5 +1,22 @@
+import asyncio
+from typing import Iterator
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.dependencies import get_warmup
+from app.services.warmup import Warmup
+
+
+@pytest.fixture
+def warmup(client: TestClient) -> Iterator[Warmup]:
+    state = Warmup()
+    client.app.dependency_overrides[get_warmup] = lambda: state
+    try:
+        yield state
+    finally:
+        client.app.dependency_overrides.pop(get_warmup, None)
+
 
 def test_health_endpoint(client: TestClient) -> None:
     response = client.get("/api/v1/health/")
@@ -8,3 +25,24 @@ def test_health_endpoint(client: TestClient) -> None:
     assert "status" in payload
     assert "checks" in payload
     assert "pokemon_count" in payload["checks"]
+
+
+def test_readiness_reports_inference_queue(client: TestClient, warmup: Warmup) -> None:
+    warmup.skip()
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["ready"] is True
+    assert payload["inference"]["queue_depth"] == 0
+
+
+def test_readiness_waits_for_warmup(client: TestClient, warmup: Warmup) -> None:
+    assert client.get("/api/v1/health/ready").status_code == 503
+
+    async def catalog() -> None:
+        return None
+
+    asyncio.run(warmup.run([("catalog", catalog)]))
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 200
+    assert list(response.json()["warmup"]["phases_ms"]) == ["catalog"]
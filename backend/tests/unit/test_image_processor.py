@@ -0,0 +1,102 @@
+import threading
+from io import BytesIO
+from typing import Iterator
+
+import pytest
+from PIL import Image
+
+from app.services.image_processor import ImageProcessor, sniff_image_type
+from app.utils.timing import StageTimer
+from benchmarks.fixtures import install_tiny_model
+
+
+def _encode(size: tuple[int, int], fmt: str) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, color="orange").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def processor() -> Iterator[ImageProcessor]:
+    previous = ImageProcessor._clip_model, ImageProcessor._clip_processor
+    install_tiny_model()
+    try:
+        yield ImageProcessor()
+    finally:
+        ImageProcessor._clip_model, ImageProcessor._clip_processor = previous
+
+
+@pytest.mark.parametrize(
+    "fmt, mime_type",
+    [("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp"), ("GIF", None)],
+)
+def test_sniff_image_type_reads_magic_bytes(fmt, mime_type):
+    assert sniff_image_type(_encode((8, 8), fmt)) == mime_type
+
+
+def test_validate_image_ignores_client_content_type(processor):
+    assert processor.validate_image(_encode((8, 8), "JPEG"), "image/png") == "image/jpeg"
+    with pytest.raises(ValueError, match="Invalid image format"):
+        processor.validate_image(b"<svg xmlns='http://www.w3.org/2000/svg'/>", "image/png")
+
+
+def test_decode_rejects_oversized_headers_before_decoding(processor):
+    processor.settings = processor.settings.model_copy(
+        update={"max_image_dimension": 100, "max_image_pixels": 5_000}
+    )
+
+    with pytest.raises(ValueError, match="maximum side"):
+        processor.decode_image(_encode((200, 10), "PNG"))
+    with pytest.raises(ValueError, match="pixels"):
+        processor.decode_image(_encode((80, 80), "PNG"))
+
+
+def test_jpeg_is_decoded_at_reduced_scale_for_small_targets(processor):
+    payload = _encode((2000, 1000), "JPEG")
+
+    assert processor.decode_image(payload).size == (2000, 1000)
+    assert processor.decode_image(payload, target_size=224).size == (500, 250)
+    assert len(processor.process(payload, "image/jpeg")) == 512
+
+
+@pytest.mark.asyncio
+async def test_warm_up_runs_the_serving_path(processor, monkeypatch):
+    calls = []
+    original = processor.process
+
+    def counting_process(image_data, mime_type, timer=None):
+        calls.append(mime_type)
+        return original(image_data, mime_type, timer=timer)
+
+    monkeypatch.setattr(processor, "process", counting_process)
+    await processor.warm_up(2)
+
+    assert calls == ["image/jpeg", "image/jpeg"]
+
+
+@pytest.mark.asyncio
+async def test_in_process_inference_runs_off_the_event_loop(processor, monkeypatch):
+    threads = []
+    original = processor._infer
+
+    def recording_infer(inputs):
+        threads.append(threading.get_ident())
+        return original(inputs)
+
+    monkeypatch.setattr(processor, "_infer", recording_infer)
+    timer = StageTimer()
+    embedding = await processor.process_async(_encode((64, 64), "PNG"), "image/png", timer)
+
+    assert len(embedding) == 512
+    assert threads and threads[0] != threading.get_ident()
+    assert set(timer.stages) >= {"decode", "preprocess", "inference"}
+
+
+def test_extract_embeddings_batches_valid_images(processor):
+    images = [_encode((64, 64), "PNG"), b"not an image", _encode((32, 48), "JPEG")]
+
+    first, invalid, last = processor.extract_embeddings(images)
+
+    assert isinstance(invalid, ValueError)
+    assert len(first) == len(last) == len(processor.process(images[0], "image/png"))
+    assert first == pytest.approx(processor.process(images[0], "image/png"), abs=1e-5)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import torch
+
+from app.services.inference_pool import InferencePool
+from benchmarks.fixtures import TinyClipModel, load_tiny_model
+
+
+@pytest.mark.asyncio
+async def test_pool_embeds_through_shared_memory_like_in_process_model():
+    pixels = torch.rand(1, 3, 224, 224)
+    expected = torch.nn.functional.normalize(
+        TinyClipModel().eval().get_image_features(pixel_values=pixels), dim=-1
+    ).squeeze(0)
+    pool = InferencePool(1, 1, "tiny", model_loader=load_tiny_model)
+    pool.start()
+    try:
+        first = await pool.embed(pixels)
+        second = await pool.embed(pixels)
+    finally:
+        pool.close()
+
+    assert len(first) == 512
+    assert np.allclose(first, expected.detach().numpy(), atol=1e-5)
+    assert first == second
+    assert not pool.started
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_inputs_larger_than_a_slot():
+    pool = InferencePool(1, 1, "tiny", model_loader=load_tiny_model, input_shape=(1, 3, 8, 8))
+    pool.start()
+    try:
+        with pytest.raises(ValueError):
+            await pool.embed(torch.zeros(1, 3, 224, 224))
+    finally:
+        pool.close()
@@ -0,0 +1,84 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+import structlog
+
+from app.utils.logging import EventThrottle, _QueueLogger, configure_logging, stop_logging
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging(stream=stream, throttle_seconds=60)
+    yield stream
+    stop_logging()
+
+
+def _lines(stream: io.StringIO) -> list[dict]:
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_structlog_and_stdlib_records_are_written_as_json(log_stream):
+    logger = structlog.get_logger("app.test")
+    logger.info("catalog loaded", entries=3)
+    logger.debug("not written")
+    try:
+        raise ValueError("boom")
+    except ValueError as exc:
+        logger.warning("lookup failed", exc_info=exc)
+    logging.getLogger("uvicorn.access").info('%s - "%s"', "127.0.0.1", "GET /health")
+
+    first, second, third = _lines(log_stream)
+
+    assert first["event"] == "catalog loaded" and first["entries"] == 3
+    assert first["level"] == "info" and "timestamp" in first
+    assert "ValueError: boom" in second["exception"]
+    assert third["event"] == '127.0.0.1 - "GET /health"'
+    assert third["logger"] == "uvicorn.access"
+
+
+def test_throttled_events_repeat_once_per_interval(log_stream):
+    logger = structlog.get_logger("app.test")
+    for _ in range(5):
+        logger.warning("pgvector fallback", reason="no_db_session", throttle=True)
+    logger.warning("pgvector fallback", reason="no_db_session")
+
+    lines = _lines(log_stream)
+
+    assert len(lines) == 2
+    assert "throttle" not in lines[0]
+
+
+def test_throttle_reports_suppressed_repeats():
+    now = [0.0]
+    throttle = EventThrottle(10.0, clock=lambda: now[0])
+
+    def event():
+        return {"event": "pgvector fallback", "throttle": True}
+
+    assert throttle(None, "warning", event()) == {"event": "pgvector fallback"}
+    for _ in range(3):
+        with pytest.raises(structlog.DropEvent):
+            throttle(None, "warning", event())
+    # Another level (or throttle value) is a separate stream.
+    assert throttle(None, "error", event()) == {"event": "pgvector fallback"}
+
+    now[0] = 10.0
+    assert throttle(None, "warning", event())["suppressed"] == 3
+    now[0] = 20.0
+    assert "suppressed" not in throttle(None, "warning", event())
+
+
+def test_full_queue_drops_instead_of_blocking():
+    records: queue.Queue = queue.Queue(maxsize=1)
+    logger = _QueueLogger(records)
+
+    logger.info(event="first")
+    logger.info(event="second")
+
+    assert records.get_nowait() == {"event": "first"}
+    assert records.empty()
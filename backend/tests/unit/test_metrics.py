@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.utils.timing import StageTimer
+
+
+def test_stage_timer_renders_server_timing_header():
+    timer = StageTimer()
+    timer.add("decode", 1.5)
+    timer.add("decode", 0.5)
+    timer.add("inference", 3.0)
+
+    assert timer.total_ms == 5.0
+    assert timer.server_timing() == "decode;dur=2.00, inference;dur=3.00, total;dur=5.00"
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client: TestClient) -> None:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "pokedex_analyze_stage_seconds" in response.text
+    assert "pokedex_db_pool_checked_out" in response.text
@@ -0,0 +1,70 @@
+import pytest
+
+from app.models import Pokemon
+from app.services.name_suggest import NameSuggestIndex, normalize, prefix_distance
+
+
+@pytest.fixture()
+def index() -> NameSuggestIndex:
+    return NameSuggestIndex(
+        [
+            Pokemon(id=25, name="Pikachu", types=[], genus="Mouse Pokémon"),
+            Pokemon(id=26, name="Raichu", types=[], genus="Mouse Pokémon"),
+            Pokemon(id=122, name="Mr. Mime", types=[], genus="Barrier Pokémon"),
+            Pokemon(id=172, name="Pichu", types=[], genus="Tiny Mouse Pokémon"),
+            Pokemon(id=250, name="Ho-Oh", types=[], genus="Rainbow Pokémon"),
+            Pokemon(id=6, name="Charizard", types=[], genus="Flame Pokémon"),
+        ]
+    )
+
+
+def _names(suggestions):
+    return [suggestion.name for suggestion in suggestions]
+
+
+def test_normalize_folds_case_accents_and_punctuation():
+    assert normalize("  Flabébé ") == "flabebe"
+    assert normalize("Mr. Mime") == "mr mime"
+    assert normalize("Farfetch’d") == "farfetchd"
+    assert normalize("Ho-Oh") == "ho oh"
+
+
+def test_prefix_distance_counts_adjacent_swaps_as_one_edit():
+    assert prefix_distance("pikahcu", "pikachu", 2) == 1
+    assert prefix_distance("charzard", "charizard", 2) == 1
+    assert prefix_distance("chrz", "charizard", 2) == 2
+    assert prefix_distance("pika", "pikachu", 1) == 0
+    assert prefix_distance("abc", "xyz", 1) == 2
+
+
+def test_prefix_matches_rank_shorter_names_first(index):
+    suggestions = index.suggest("pi")
+
+    assert _names(suggestions) == ["Pichu", "Pikachu"]
+    assert {suggestion.match for suggestion in suggestions} == {"prefix"}
+
+
+def test_exact_and_later_word_matches_ignore_punctuation(index):
+    assert index.suggest("hooh")[0].match == "exact"
+    assert _names(index.suggest("mime")) == ["Mr. Mime"]
+    assert _names(index.suggest("MR MIME")) == ["Mr. Mime"]
+
+
+def test_genus_prefix_matches_follow_name_matches(index):
+    suggestions = index.suggest("mouse")
+
+    assert _names(suggestions) == ["Raichu", "Pikachu"]
+    assert suggestions[0].match == "genus"
+
+
+def test_typos_fall_back_to_trigram_candidates(index):
+    suggestions = index.suggest("pikahcu")
+
+    assert _names(suggestions)[0] == "Pikachu"
+    assert suggestions[0].match == "fuzzy"
+    assert _names(index.suggest("charzard")) == ["Charizard"]
+
+
+def test_short_queries_are_not_fuzzy_matched(index):
+    assert index.suggest("xq") == []
+    assert index.suggest("   ") == []
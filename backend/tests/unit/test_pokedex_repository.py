@@ -1,7 +1,13 @@
+import asyncio
 import json
+import threading
+from datetime import datetime, timezone
 
 import pytest
 
+from app.config import get_settings
+from app.models.db import PokemonRecord
+from app.repositories import pokedex_repository
 from app.repositories.pokedex_repository import PokedexRepository
 from app.utils.pokemon_images import local_image_url
 
@@ -77,3 +83,50 @@ async def test_repository_prefers_local_image_when_available(tmp_path):
 
     assert pokemon is not None
     assert pokemon.image_url == local_image_url(25)
+
+
+class _RecordsResult(_EmptyResult):
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _RecordsSession:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def execute(self, _):
+        return _RecordsResult(self._rows)
+
+
+@pytest.mark.asyncio
+async def test_cold_cache_publishes_once_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "catalog_shared_dir", tmp_path)
+    rows = [
+        PokemonRecord(
+            id=pokemon_id,
+            name=f"Mon{pokemon_id}",
+            types=["normal"],
+            image_url=f"https://example.com/{pokemon_id}.png",
+            generation=1,
+            embedding=[1.0, 0.0],
+            updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        )
+        for pokemon_id in (1, 2)
+    ]
+    threads = []
+    original = pokedex_repository.publish_shared_snapshot
+
+    def recording_publish(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pokedex_repository, "publish_shared_snapshot", recording_publish)
+    repositories = [PokedexRepository(session=_RecordsSession(rows)) for _ in range(3)]
+
+    catalogs = await asyncio.gather(*(repository.get_all_pokemon() for repository in repositories))
+
+    assert [[pokemon.id for pokemon in catalog] for catalog in catalogs] == [[1, 2]] * 3
+    assert len(threads) == 1 and threads[0] != threading.get_ident()
@@ -1,5 +1,10 @@
+from io import BytesIO
+
+from PIL import Image, features
+
 from app.utils.pokemon_images import choose_image_url, sprite_fallback_url
 from app.utils.pokemon_images import local_image_path, local_image_url, persist_image_bytes
+from app.utils.pokemon_images import is_artwork_variant, write_artwork_variants
 
 
 def test_choose_image_url_prefers_available_artwork():
@@ -27,3 +32,32 @@ def test_persist_image_bytes_writes_to_expected_path(tmp_path):
     assert target == local_image_path(10, root=tmp_path)
     assert target.read_bytes() == b"data"
     assert local_image_url(10) == "/static/pokemon/10.png"
+
+
+def test_write_artwork_variants_names_files_after_content(tmp_path):
+    buffer = BytesIO()
+    Image.new("RGBA", (475, 475), (255, 200, 0, 128)).save(buffer, format="PNG")
+
+    variants = write_artwork_variants(buffer.getvalue(), 25, root=tmp_path)
+
+    assert set(variants) == {"webp", "avif"}
+    assert variants["webp"].stem == variants["avif"].stem
+    assert all(is_artwork_variant(path.name) for path in variants.values())
+    with Image.open(variants["webp"]) as thumbnail:
+        assert thumbnail.size == (256, 256)
+        assert thumbnail.mode == "RGBA"
+    assert write_artwork_variants(buffer.getvalue(), 25, root=tmp_path) == variants
+    assert not is_artwork_variant("25.png")
+
+
+def test_write_artwork_variants_skips_formats_pillow_cannot_encode(tmp_path, monkeypatch):
+    # Pillow < 11.3 (or a build without libavif) has no AVIF encoder.
+    available = features.check
+    monkeypatch.setattr(features, "check", lambda name: name != "avif" and available(name))
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), "orange").save(buffer, format="PNG")
+
+    variants = write_artwork_variants(buffer.getvalue(), 25, root=tmp_path)
+
+    assert set(variants) == {"webp"}
+    assert [path.suffix for path in tmp_path.iterdir()] == [".webp"]
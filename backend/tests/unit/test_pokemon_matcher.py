@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.models import Pokemon
+from app.services.pokemon_matcher import PokemonMatcher
+
+
+def _catalog(size: int, dimension: int = 16) -> list[Pokemon]:
+    rng = np.random.default_rng(7)
+    return [
+        Pokemon(
+            id=index,
+            name=f"mon-{index}",
+            types=["normal"],
+            embedding=rng.normal(size=dimension).tolist(),
+        )
+        for index in range(size)
+    ]
+
+
+def test_matrix_ranking_matches_pairwise_similarity():
+    catalog = _catalog(64)
+    matcher = PokemonMatcher(catalog)
+    query = catalog[10].embedding
+
+    matches = matcher.find_best_matches(query, top_n=5)
+
+    expected = sorted(
+        catalog,
+        key=lambda pokemon: matcher.calculate_similarity(query, pokemon.embedding),
+        reverse=True,
+    )[:5]
+    assert [match.pokemon.id for match in matches] == [pokemon.id for pokemon in expected]
+    assert [match.rank for match in matches] == [1, 2, 3, 4, 5]
+    assert matches[0].similarity_score == pytest.approx(1.0, abs=1e-6)
+
+
+def test_matcher_reads_shared_matrix_without_per_entry_embeddings():
+    matrix = np.eye(3, dtype=np.float32)
+    matrix.setflags(write=False)
+    catalog = [Pokemon(id=index, name=f"mon-{index}", types=[]) for index in range(3)]
+    for pokemon, row in zip(catalog, matrix):
+        pokemon.embedding = row
+
+    matcher = PokemonMatcher(catalog, matrix)
+
+    assert matcher.find_best_matches([0.0, 1.0, 0.0], top_n=1)[0].pokemon.id == 1
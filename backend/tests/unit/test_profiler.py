@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.api.middleware.profiler import (
+    StackSampler,
+    collapse_stack,
+    sign_profile_request,
+    verify_profile_signature,
+    write_collapsed,
+)
+
+
+def test_profile_signature_is_bound_to_path_and_time():
+    header = sign_profile_request("secret", "/api/v1/analyze/", timestamp=1_000)
+
+    assert verify_profile_signature("secret", "/api/v1/analyze/", header, now=1_010)
+    assert not verify_profile_signature("secret", "/api/v1/pokemon", header, now=1_010)
+    assert not verify_profile_signature("other", "/api/v1/analyze/", header, now=1_010)
+    assert not verify_profile_signature("secret", "/api/v1/analyze/", header, now=5_000)
+    assert not verify_profile_signature("secret", "/api/v1/analyze/", "garbage", now=1_010)
+
+
+def _busy_loop(deadline: float) -> int:
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_stack_sampler_writes_collapsed_stacks(tmp_path):
+    sampler = StackSampler(threading.get_ident(), interval_seconds=0.001)
+    sampler.start()
+    _busy_loop(time.perf_counter() + 0.1)
+    samples = sampler.stop()
+
+    assert samples
+    assert any("_busy_loop" in stack for stack in samples)
+    target = write_collapsed(tmp_path / "profile.folded", dict(samples))
+    stack, count = target.read_text().splitlines()[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+
+def test_collapse_stack_orders_root_first():
+    import sys
+
+    stack = collapse_stack(sys._getframe())
+
+    assert stack.split(";")[-1].startswith("test_collapse_stack_orders_root_first")
+
+
+@pytest.mark.asyncio
+async def test_stack_sampler_labels_worker_thread_stacks():
+    sampler = StackSampler(threading.get_ident(), interval_seconds=0.001)
+    sampler.start()
+    await asyncio.to_thread(_busy_loop, time.perf_counter() + 0.1)
+    samples = sampler.stop()
+
+    serving = threading.current_thread().name
+    worker_stacks = [stack for stack in samples if "_busy_loop" in stack]
+    assert worker_stacks
+    assert all(stack.split(";", 1)[0] != serving for stack in worker_stacks)
+    assert any(stack.startswith(f"{serving};") for stack in samples)
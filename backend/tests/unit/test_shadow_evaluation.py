@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.shadow_evaluation import ShadowEvaluator, ShadowModel, compare_rankings
+from benchmarks.fixtures import TinyClipModel, TinyClipProcessor, make_image
+
+
+def _tiny_model() -> ShadowModel:
+    return ShadowModel("tiny", loader=lambda _name: (TinyClipModel().eval(), TinyClipProcessor()))
+
+
+def _count(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_compare_rankings_reports_top5_only_for_full_rankings():
+    assert compare_rankings([1, 2, 3, 4, 5], [1, 3, 9, 5, 8]) == {"top1": 1.0, "top5": 0.6}
+    assert compare_rankings([1, 2], [2, 1]) == {"top1": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_sampled_request_is_ranked_by_the_candidate_model():
+    model = _tiny_model()
+    images = [make_image(64, "png", seed=seed)[0] for seed in range(8)]
+    matrix = np.stack([model.embed(image) for image in images])
+    ids = np.arange(1, 9, dtype=np.int64)
+
+    async def load_catalog():
+        return ids, matrix
+
+    evaluator = ShadowEvaluator(model, 1.0, load_catalog, sample=lambda: 0.0)
+    agreed = _count("pokedex_shadow_agreement_total", metric="top1")
+    compared = _count("pokedex_shadow_comparisons_total", metric="top5")
+
+    # The candidate's own embedding of image 3 must rank Pokémon 3 first.
+    assert evaluator.maybe_submit(images[2], [3, 1, 2, 4, 5])
+    await evaluator.drain()
+    await evaluator.close()
+
+    assert _count("pokedex_shadow_agreement_total", metric="top1") == agreed + 1
+    assert _count("pokedex_shadow_comparisons_total", metric="top5") == compared + 1
+    assert _count("pokedex_shadow_stage_seconds_count", stage="inference") >= 1
+
+
+@pytest.mark.asyncio
+async def test_unsampled_and_excess_requests_are_skipped():
+    release = asyncio.Event()
+
+    async def load_catalog():
+        await release.wait()
+        return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+
+    rolls = iter([0.9, 0.0, 0.0])
+    evaluator = ShadowEvaluator(
+        _tiny_model(), 0.5, load_catalog, max_pending=1, sample=lambda: next(rolls)
+    )
+    busy = _count("pokedex_shadow_evaluations_total", outcome="busy")
+    no_catalog = _count("pokedex_shadow_evaluations_total", outcome="no_catalog")
+
+    assert not evaluator.maybe_submit(b"image", [1])
+    assert evaluator.maybe_submit(b"image", [1])
+    assert not evaluator.maybe_submit(b"image", [1])
+    release.set()
+    await evaluator.drain()
+
+    assert evaluator.pending == 0
+    assert _count("pokedex_shadow_evaluations_total", outcome="busy") == busy + 1
+    assert _count("pokedex_shadow_evaluations_total", outcome="no_catalog") == no_catalog + 1
+
+
+@pytest.mark.asyncio
+async def test_dimension_mismatch_is_recorded_not_raised():
+    async def load_catalog():
+        return np.array([1], dtype=np.int64), np.ones((1, 3), dtype=np.float32)
+
+    evaluator = ShadowEvaluator(_tiny_model(), 1.0, load_catalog, sample=lambda: 0.0)
+    errors = _count("pokedex_shadow_evaluations_total", outcome="error")
+
+    evaluator.maybe_submit(make_image(64, "png")[0], [1])
+    await evaluator.drain()
+    await evaluator.close()
+
+    assert _count("pokedex_shadow_evaluations_total", outcome="error") == errors + 1
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from app.models import Pokemon
+from app.repositories.pokedex_repository import PokedexRepository
+from app.services.catalog_snapshot import open_shared_snapshot, publish_shared_snapshot
+from app.services.similarity_graph import SimilarityGraph, similarity_graph_path
+
+
+def _embeddings(count: int, dimension: int = 16, seed: int = 0) -> np.ndarray:
+    matrix = np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _brute_force(ids: np.ndarray, embeddings: np.ndarray, k: int) -> dict:
+    scores = embeddings @ embeddings.T
+    np.fill_diagonal(scores, -np.inf)
+    return {
+        int(pokemon_id): ids[np.argsort(-scores[row], kind="stable")[:k]].tolist()
+        for row, pokemon_id in enumerate(ids)
+    }
+
+
+def test_build_matches_brute_force_and_skips_missing_embeddings():
+    ids = np.arange(1, 201) * 3
+    embeddings = _embeddings(200)
+    mask = np.ones(200, dtype=bool)
+    mask[7] = False
+
+    graph = SimilarityGraph.build(ids, embeddings, mask=mask, k=5)
+
+    expected = _brute_force(ids[mask], embeddings[mask], 5)
+    for pokemon_id, neighbours in expected.items():
+        assert graph.neighbours_of(pokemon_id)[0].tolist() == neighbours
+    assert graph.neighbours_of(int(ids[7]))[0].size == 0
+    assert graph.neighbours_of(9999)[0].size == 0
+
+
+def test_incremental_update_matches_full_rebuild():
+    ids = np.arange(1, 301)
+    embeddings = _embeddings(300)
+    graph = SimilarityGraph.build(ids, embeddings, k=8)
+
+    moved = _embeddings(300, seed=1)
+    changed = [5, 17, 120]
+    for pokemon_id in changed:
+        embeddings[pokemon_id - 1] = moved[pokemon_id - 1]
+    # 300 is removed and 301 is new.
+    new_ids = np.append(ids[:-1], 301)
+    new_embeddings = np.vstack([embeddings[:-1], moved[-1:]])
+
+    updated, differs = graph.update(new_ids, new_embeddings, changed)
+    rebuilt = SimilarityGraph.build(new_ids, new_embeddings, k=8)
+
+    assert np.array_equal(updated.neighbours, rebuilt.neighbours)
+    assert np.allclose(updated.scores, rebuilt.scores, atol=1e-6)
+    assert set(changed) | {301} <= set(differs.tolist())
+    assert len(differs) < len(new_ids)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    ids = np.arange(1, 51)
+    graph = SimilarityGraph.build(ids, _embeddings(50), k=4, catalog_version="v1")
+
+    loaded = SimilarityGraph.load(graph.save(tmp_path / "catalog.pkdx.knn"))
+
+    assert loaded.catalog_version == "v1"
+    assert np.array_equal(loaded.neighbours, graph.neighbours)
+    assert loaded.neighbours_of(10, limit=2)[0].tolist() == graph.neighbours_of(10)[0][:2].tolist()
+
+
+def test_from_lists_pads_short_lists():
+    graph = SimilarityGraph.from_lists([(2, [1], [0.5]), (1, [2], [0.5]), (3, [], [])], k=3)
+
+    assert graph.ids.tolist() == [1, 2, 3]
+    assert graph.neighbours_of(2)[0].tolist() == [1]
+    assert graph.neighbours_of(3)[0].size == 0
+
+
+def test_shared_catalog_maps_graph_of_matching_version(tmp_path):
+    pokemon = [
+        Pokemon(id=1, name="Bulbasaur", types=["grass"], embedding=[1.0, 0.0]),
+        Pokemon(id=2, name="Ivysaur", types=["grass"], embedding=[0.9, 0.1]),
+        Pokemon(id=4, name="Charmander", types=["fire"], embedding=[0.0, 1.0]),
+    ]
+    graph = lambda: SimilarityGraph.build(  # noqa: E731
+        [1, 2, 4], np.array([entry.embedding for entry in pokemon]), k=2, catalog_version="v1"
+    )
+
+    shared = publish_shared_snapshot(
+        "v1", lambda: pokemon, directory=tmp_path, similarity_graph=graph
+    )
+
+    assert similarity_graph_path(shared.snapshot.path).exists()
+    assert shared.similarity_graph.neighbours_of(1)[0].tolist() == [2, 4]
+
+    SimilarityGraph.build([1], np.ones((1, 2)), k=1, catalog_version="v0").save(
+        similarity_graph_path(shared.snapshot.path)
+    )
+    assert open_shared_snapshot(shared.snapshot.path).similarity_graph is None
+
+
+@pytest.mark.asyncio
+async def test_repository_falls_back_to_vector_search_without_graph(tmp_path):
+    shared = publish_shared_snapshot(
+        "v1",
+        lambda: [
+            Pokemon(id=1, name="Bulbasaur", types=["grass"], embedding=[1.0, 0.0]),
+            Pokemon(id=2, name="Ivysaur", types=["grass"], embedding=[0.9, 0.1]),
+            Pokemon(id=4, name="Charmander", types=["fire"], embedding=[0.0, 1.0]),
+        ],
+        directory=tmp_path,
+    )
+    repository = PokedexRepository(snapshot_path=shared.snapshot.path)
+
+    similar = await repository.similar_pokemon(1, limit=5)
+
+    assert [pokemon.id for pokemon, _ in similar] == [2, 4]
+    assert await repository.similar_pokemon(99, limit=5) is None
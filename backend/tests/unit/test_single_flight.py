@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return 42
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert [result for result, _ in results] == [42, 42, 42]
+    assert [shared for _, shared in results] == [False, True, True]
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing() -> int:
+        await release.wait()
+        raise ValueError("bad image")
+
+    waiters = [asyncio.create_task(flight.do("key", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeeding() -> int:
+        return 7
+
+    assert await flight.do("key", succeeding) == (7, False)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_shared_work():
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def work() -> int:
+        await release.wait()
+        return 1
+
+    leader = asyncio.create_task(flight.do("key", work))
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == (1, False)
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_every_waiter_leaves():
+    flight: SingleFlight[int] = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work() -> int:
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return 1
+
+    waiter = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_waits_for_followers_to_be_served():
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def work() -> int:
+        await release.wait()
+        return 5
+
+    leader = asyncio.create_task(flight.do("key", work))
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+
+    assert not leader.done()
+    release.set()
+    assert await follower == (5, True)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.static_files import IMMUTABLE_CACHE_CONTROL, ArtworkStaticFiles
+
+VARIANT = "25-256w.0123456789abcdef"
+
+
+def _client(directory: Path, accel_redirect: str | None = None) -> TestClient:
+    app = FastAPI()
+    app.mount(
+        "/static/pokemon",
+        ArtworkStaticFiles(directory=directory, accel_redirect=accel_redirect),
+    )
+    return TestClient(app)
+
+
+def _write_artwork(directory: Path) -> None:
+    (directory / f"{VARIANT}.webp").write_bytes(b"webp")
+    (directory / f"{VARIANT}.avif").write_bytes(b"avif")
+    (directory / "25.png").write_bytes(b"png")
+
+
+def test_hashed_variants_are_immutable_and_negotiate_avif(tmp_path):
+    _write_artwork(tmp_path)
+    client = _client(tmp_path)
+
+    webp = client.get(f"/static/pokemon/{VARIANT}.webp", headers={"Accept": "image/webp"})
+    avif = client.get(
+        f"/static/pokemon/{VARIANT}.webp", headers={"Accept": "image/avif,image/webp,*/*"}
+    )
+
+    assert webp.content == b"webp"
+    assert webp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert webp.headers["vary"] == "Accept"
+    assert avif.content == b"avif"
+    assert avif.headers["content-type"] == "image/avif"
+
+
+def test_original_artwork_is_revalidated(tmp_path):
+    _write_artwork(tmp_path)
+    client = _client(tmp_path)
+
+    response = client.get("/static/pokemon/25.png")
+    cached = client.get("/static/pokemon/25.png", headers={"If-None-Match": response.headers["etag"]})
+
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert cached.status_code == 304
+
+
+def test_accel_redirect_hands_the_file_to_the_proxy(tmp_path):
+    _write_artwork(tmp_path)
+    client = _client(tmp_path, accel_redirect="/_artwork/")
+
+    response = client.get(f"/static/pokemon/{VARIANT}.webp")
+
+    assert response.content == b""
+    assert response.headers["x-accel-redirect"] == f"/_artwork/{VARIANT}.webp"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
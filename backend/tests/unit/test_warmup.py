@@ -0,0 +1,58 @@
+from typing import Iterator
+
+import pytest
+
+from app.services.image_processor import ImageProcessor
+from app.services.warmup import Warmup
+from benchmarks.fixtures import install_tiny_model
+
+
+@pytest.fixture
+def processor() -> Iterator[ImageProcessor]:
+    previous = ImageProcessor._clip_model, ImageProcessor._clip_processor
+    install_tiny_model()
+    try:
+        yield ImageProcessor()
+    finally:
+        ImageProcessor._clip_model, ImageProcessor._clip_processor = previous
+
+
+@pytest.mark.asyncio
+async def test_warmup_times_each_phase_and_survives_failures():
+    warmup = Warmup()
+    ran = []
+
+    async def catalog() -> None:
+        ran.append("catalog")
+
+    async def database() -> None:
+        raise ConnectionRefusedError("db down")
+
+    async def inference() -> None:
+        ran.append("inference")
+
+    assert not warmup.done
+    await warmup.run([("database", database), ("catalog", catalog), ("inference", inference)])
+
+    status = warmup.status()
+    assert warmup.done
+    assert ran == ["catalog", "inference"]
+    assert list(status["phases_ms"]) == ["database", "catalog", "inference"]
+    assert status["failed"] == ["database"]
+
+
+@pytest.mark.asyncio
+async def test_inference_warmup_also_runs_one_bulk_sized_batch(processor, monkeypatch):
+    batches = []
+    original = processor.extract_embeddings
+
+    def recording_extract(images):
+        batches.append(len(images))
+        return original(images)
+
+    monkeypatch.setattr(processor, "extract_embeddings", recording_extract)
+
+    await processor.warm_up(1, batch_size=4)
+    await processor.warm_up(1)
+
+    assert batches == [4]